@@ -0,0 +1,143 @@
+import gzip
+import hashlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config import settings
+from app.services.delta import LRUCache
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install brotli
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Optional: pip install zstandard
+    zstandard = None
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    """Available encodings in order of preference"""
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        compressor = zstandard.ZstdCompressor(level=6)
+        compressors["zstd"] = compressor.compress
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=5)
+    compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=6, mtime=0)
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred available encoding the client accepts, if any"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    wildcard = accepted.get("*", 0.0)
+    candidates = [
+        encoding
+        for encoding in COMPRESSORS
+        if accepted.get(encoding, wildcard) > 0
+    ]
+    if not candidates:
+        return None
+    # Highest quality wins; ties go to the server's preference order
+    return max(candidates, key=lambda encoding: accepted.get(encoding, wildcard))
+
+
+class CompressionMiddleware:
+    """
+    Compress complete HTTP response bodies with zstd, brotli or gzip,
+    whichever the client accepts and is installed.
+
+    Compressed bodies are cached by a digest of the uncompressed body, so a
+    tree snapshot or version served repeatedly is compressed once per
+    revision of its content rather than once per request. Streaming
+    responses (NDJSON, server-sent events) pass through uncompressed so they
+    are not buffered.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = settings.COMPRESSION_MIN_SIZE,
+        cache_size: int = settings.COMPRESSION_CACHE_SIZE,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.cache = LRUCache(cache_size)
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        key = (hashlib.blake2b(body, digest_size=16).digest(), encoding)
+        compressed = self.cache.get(key)
+        if compressed is None:
+            compressed = COMPRESSORS[encoding](body)
+            self.cache.set(key, compressed)
+        return compressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            content_type = headers.get("content-type", "")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not content_type.startswith(_COMPRESSIBLE_TYPES)
+            ):
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            # A cache must not hand this response to a client with another
+            # Accept-Encoding, whether or not this one is compressed
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or len(body) < self.minimum_size:
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, send_compressed)
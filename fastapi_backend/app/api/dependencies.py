@@ -1,3 +1,8 @@
+from typing import Optional
+
+from starlette.requests import HTTPConnection
+
+from app.config import settings
 from app.core.services.document_service import DocumentService
 from app.core.services.edit_service import EditService, InlineEditService
 
@@ -14,3 +19,21 @@ def get_edit_service() -> EditService:
 def get_inline_edit_service() -> InlineEditService:
     """Dependency to get inline edit service instance"""
     return InlineEditService()
+
+
+def client_address(connection: HTTPConnection) -> Optional[str]:
+    """
+    Address a request counts against for per-client limits. Behind
+    TRUSTED_PROXY_HOPS proxies that is the address the outermost one saw,
+    read from the right of X-Forwarded-For (entries further left are
+    client-supplied); otherwise it is the peer address.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            address.strip() for address in connection.headers.get("x-forwarded-for", "").split(",")
+            if address.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return connection.client.host if connection.client else None
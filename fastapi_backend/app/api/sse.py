@@ -0,0 +1,73 @@
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi.websockets import WebSocketState
+
+from app.config import settings
+from app.api.subprotocols import message_text
+from app.models.websocket_events import MessageHeader
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx-style proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_sse(message: str, header: MessageHeader) -> str:
+    """Server-sent event frame for an encoded message, with its ``seq`` as the event id"""
+    lines = []
+    if header.seq is not None:
+        lines.append(f"id: {header.seq}")
+    if header.type:
+        lines.append(f"event: {header.type}")
+    lines.extend(f"data: {line}" for line in message.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class SSEConnection:
+    """
+    Stands in for a WebSocket so ConnectionManager can deliver a session's
+    events to a server-sent events response. Frames are handed to the
+    response one at a time, so a slow client backs up into the session's
+    outbox as it would on a socket. The manager hands messages over with
+    their header through ``send_message``, so the event id and name are
+    read from it rather than from the message. The stream ends after the
+    job's final event or when the manager closes the connection.
+    """
+
+    def __init__(self, keepalive: float = settings.SSE_KEEPALIVE_SECONDS):
+        self.client_state = WebSocketState.CONNECTED
+        self.keepalive = keepalive
+        self._frames: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def send_message(self, message: str, header: MessageHeader) -> None:
+        await self._frames.put(format_sse(message_text(message, header), header))
+        if header.final:
+            await self.close()
+
+    async def close(self, code: int = 1000) -> None:
+        if self.client_state == WebSocketState.DISCONNECTED:
+            return
+        self.client_state = WebSocketState.DISCONNECTED
+        try:
+            self._frames.put_nowait(None)
+        except asyncio.QueueFull:
+            # The stream stops after the pending frame
+            pass
+
+    async def frames(self) -> AsyncIterator[str]:
+        """Frames for the response body, with comment lines to keep idle proxies open"""
+        while True:
+            try:
+                frame: Optional[str] = await asyncio.wait_for(self._frames.get(), self.keepalive)
+            except asyncio.TimeoutError:
+                if self.client_state == WebSocketState.DISCONNECTED:
+                    return
+                yield ": keepalive\n\n"
+                continue
+            if frame is None:
+                return
+            yield frame
+            if self.client_state == WebSocketState.DISCONNECTED and self._frames.empty():
+                return
@@ -0,0 +1,90 @@
+import json
+from typing import List, Optional
+
+from fastapi import WebSocket
+
+from app.models.websocket_events import EditProgressEvent, MessageHeader, WebSocketMessage
+
+try:
+    import msgpack
+except ImportError:  # Optional: pip install msgpack
+    msgpack = None
+
+# Event encodings a client can ask for in Sec-WebSocket-Protocol, most
+# compact first. Without one, events are JSON text frames.
+MSGPACK_SUBPROTOCOL = "docsync.msgpack"
+JSON_SUBPROTOCOL = "docsync.json"
+
+
+def negotiate_subprotocol(requested: List[str]) -> Optional[str]:
+    """The subprotocol to accept from those the client offered, if any"""
+    if msgpack is not None and MSGPACK_SUBPROTOCOL in requested:
+        return MSGPACK_SUBPROTOCOL
+    if JSON_SUBPROTOCOL in requested:
+        return JSON_SUBPROTOCOL
+    return None
+
+
+def pack_message(event: EditProgressEvent, seq: Optional[int] = None) -> str:
+    """
+    MessagePack form of an event, packed from the model with the same schema
+    as ``encode_message``. The bytes are returned as text, one character per
+    byte, so they travel on the event bus like any other message.
+    """
+    packed = msgpack.packb(WebSocketMessage(event=event, seq=seq).model_dump(mode="json"), use_bin_type=True)
+    return packed.decode("latin-1")
+
+
+def encode_msgpack(message: str) -> bytes:
+    """MessagePack form of an encoded JSON message, with the same schema"""
+    return msgpack.packb(json.loads(message), use_bin_type=True)
+
+
+def message_bytes(message: str, header: MessageHeader) -> bytes:
+    """MessagePack frame of a queued message, converting a JSON one"""
+    if header.encoding == "msgpack":
+        return message.encode("latin-1")
+    return encode_msgpack(message)
+
+
+def message_text(message: str, header: MessageHeader) -> str:
+    """JSON text of a queued message, converting a packed one"""
+    if header.encoding == "msgpack":
+        return json.dumps(msgpack.unpackb(message.encode("latin-1"), raw=False), separators=(",", ":"))
+    return message
+
+
+class MessagePackWebSocket:
+    """
+    A WebSocket that negotiated the MessagePack subprotocol. Its session's
+    events are packed straight from the event models (see ``encoding``) and
+    go out as binary frames; anything else handed to it as JSON text is
+    converted, so ConnectionManager and the endpoint work with it unchanged.
+    Client requests are still read as JSON text.
+    """
+
+    # Tells ConnectionManager to publish this session's events packed
+    encoding = "msgpack"
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+
+    @property
+    def client_state(self):
+        return self.websocket.client_state
+
+    @property
+    def client(self):
+        return self.websocket.client
+
+    async def send_message(self, message: str, header: MessageHeader) -> None:
+        await self.websocket.send_bytes(message_bytes(message, header))
+
+    async def send_text(self, message: str) -> None:
+        await self.websocket.send_bytes(encode_msgpack(message))
+
+    async def receive_text(self) -> str:
+        return await self.websocket.receive_text()
+
+    async def close(self, code: int = 1000) -> None:
+        await self.websocket.close(code=code)
@@ -29,6 +29,80 @@ class Settings(BaseSettings):
     VECTOR_DIMENSION: int = 1536
     LANGUAGES: Union[List[str], str] = ["en"]
 
+    # Agent scheduling
+    EDIT_AGENT_MAX_CONCURRENCY: int = 8
+    EDIT_AGENT_MAX_CONCURRENCY_PER_SESSION: int = 3
+
+    # Retrieval
+    SPECULATIVE_RETRIEVAL: bool = True
+    RETRIEVAL_TOP_K: int = 5
+    CORPUS_ROUTING_ENABLED: bool = True
+    # Minimum top-similarity lead one corpus needs before the other is skipped
+    CORPUS_ROUTING_MARGIN: float = 0.08
+
+    # Patching
+    # Minimum similarity for an anchor resolved through normalized matching
+    ANCHOR_MIN_CONFIDENCE: float = 0.75
+
+    # Batched apply
+    # Most texts per embeddings request when enriching many versions at once
+    ENRICHMENT_BATCH_SIZE: int = 16
+    # Estimated token budget of one embeddings request (the API allows 300k)
+    EMBEDDING_BATCH_MAX_TOKENS: int = 100000
+    ENRICHMENT_MAX_CONCURRENCY: int = 8
+    # Change request items (edit batch, creates, deletes) running at once
+    CHANGE_APPLY_MAX_CONCURRENCY: int = 8
+    # How long Idempotency-Key results are replayed for
+    IDEMPOTENCY_TTL_SECONDS: int = 86400
+    # Longest a request may hold an Idempotency-Key's Redis lock before another worker can take it
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS: int = 600
+
+    # Version storage: a full keyframe every N versions, deltas in between
+    VERSION_KEYFRAME_INTERVAL: int = 20
+    # Materialized historical versions kept in memory
+    VERSION_CACHE_SIZE: int = 512
+    # Version diffs cached per version pair, and the largest page of hunks served
+    DIFF_CACHE_SIZE: int = 128
+    DIFF_MAX_HUNKS_PER_PAGE: int = 200
+
+    # Response compression: smallest body compressed, compressed bodies cached
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_CACHE_SIZE: int = 256
+
+    # WebSocket session events: memory:// for one worker, redis://host:6379/0 to share across workers
+    EVENT_BUS_URL: str = "memory://"
+    # Messages queued per socket, and what to do when a client falls that far
+    # behind: "drop_progress" or "disconnect"
+    WS_SEND_QUEUE_SIZE: int = 256
+    WS_SLOW_CONSUMER_POLICY: str = "drop_progress"
+    # Events kept per session for clients that reconnect, and how long a job
+    # keeps running (and its events stay available) without a client
+    WS_EVENT_LOG_SIZE: int = 1000
+    WS_RESUME_GRACE_SECONDS: float = 60
+    # Idle time before a comment line is sent on an edit SSE stream
+    SSE_KEEPALIVE_SECONDS: float = 15
+    # Concurrent edit jobs per worker, in total and per client address
+    MAX_EDIT_JOBS: int = 32
+    MAX_EDIT_JOBS_PER_CLIENT: int = 3
+    # Reverse proxies in front of the app that append to X-Forwarded-For;
+    # client addresses are read from that header instead of the peer when set
+    TRUSTED_PROXY_HOPS: int = 0
+    # Connections without a job or client message for this long are closed;
+    # the reaper looks for them every WS_REAP_INTERVAL_SECONDS
+    WS_IDLE_TIMEOUT_SECONDS: float = 600
+    WS_REAP_INTERVAL_SECONDS: float = 30
+    # Edit jobs (HTTP and streaming) running at once across the worker, and
+    # how many more may wait before new ones are refused
+    EDIT_JOB_MAX_RUNNING: int = 8
+    EDIT_JOB_MAX_QUEUED: int = 32
+    # SQLite file holding submitted edit jobs, and how long a job is kept
+    # after its last update
+    EDIT_JOB_DB_PATH: str = "edit_jobs.db"
+    EDIT_JOB_TTL_SECONDS: int = 86400
+    # Agent output text streamed to clients is batched into one delta event
+    # per this interval
+    AGENT_DELTA_FLUSH_SECONDS: float = 0.05
+
     @field_validator("LANGUAGES", mode="before")
     @classmethod
     def validate_languages(cls, v):
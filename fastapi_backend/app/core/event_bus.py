@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional, Set
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(ABC):
+    """Messages published to one channel, from the moment of subscribing"""
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[str]: ...
+
+    @abstractmethod
+    async def close(self) -> None: ...
+
+
+class EventBus(ABC):
+    """
+    Pub/sub between the process producing session events and the process
+    holding the session's socket. Messages are strings; delivery is at most
+    once to every subscriber connected at publish time.
+    """
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> int:
+        """Publish ``message`` and return how many subscribers received it"""
+
+    @abstractmethod
+    async def subscribe(self, channel: str) -> Subscription:
+        """Subscribe to ``channel``; returns once messages will be received"""
+
+    async def close(self) -> None:
+        """Release backend connections"""
+
+
+class _QueueSubscription(Subscription):
+    def __init__(self, bus: "InProcessEventBus", channel: str):
+        self._bus = bus
+        self._channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue()
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            message = await self.queue.get()
+            if message is None:
+                return
+            yield message
+
+    async def close(self) -> None:
+        self._bus._unsubscribe(self._channel, self)
+        self.queue.put_nowait(None)
+
+
+class InProcessEventBus(EventBus):
+    """Event bus for a single worker process"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[_QueueSubscription]] = {}
+
+    async def publish(self, channel: str, message: str) -> int:
+        subscribers = self._subscribers.get(channel, set())
+        for subscription in subscribers:
+            subscription.queue.put_nowait(message)
+        return len(subscribers)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        subscription = _QueueSubscription(self, channel)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, channel: str, subscription: _QueueSubscription) -> None:
+        subscribers = self._subscribers.get(channel)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[channel]
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, pubsub, channel: str):
+        self._pubsub = pubsub
+        self._channel = channel
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            data = message["data"]
+            yield data.decode() if isinstance(data, bytes) else data
+
+    async def close(self) -> None:
+        try:
+            await self._pubsub.unsubscribe(self._channel)
+        finally:
+            await self._pubsub.aclose()
+
+
+class RedisEventBus(EventBus):
+    """
+    Event bus over Redis pub/sub, shared by every worker and node pointed at
+    the same server. ``client`` is a ``redis.asyncio`` client or anything
+    with the same ``publish``/``pubsub`` API.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisEventBus":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BUS_URL points at Redis but the redis package is not installed") from e
+        return cls(redis.Redis.from_url(url))
+
+    async def publish(self, channel: str, message: str) -> int:
+        return await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> Subscription:
+        pubsub = self._client.pubsub()
+        await pubsub.subscribe(channel)
+        return _RedisSubscription(pubsub, channel)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_event_bus(url: Optional[str] = None) -> EventBus:
+    """Event bus for ``url`` (EVENT_BUS_URL by default): ``memory://`` or ``redis://...``"""
+    url = url or settings.EVENT_BUS_URL
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info("Using Redis event bus")
+        return RedisEventBus.from_url(url)
+    if url != "memory://":
+        raise ValueError(f"Unsupported EVENT_BUS_URL: {url}")
+    return InProcessEventBus()
+
+
+# Shared event bus for WebSocket sessions
+event_bus = create_event_bus()
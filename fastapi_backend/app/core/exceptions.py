@@ -24,6 +24,15 @@ class DocumentUpdateError(Exception):
         super().__init__(f"Failed to update document: {message}")
 
 
+class DocumentVersionConflictError(Exception):
+    def __init__(self, document_id: str, expected_version_id: str):
+        self.document_id = document_id
+        self.expected_version_id = expected_version_id
+        super().__init__(
+            f"Document {document_id} is no longer at version {expected_version_id}"
+        )
+
+
 class ContentProcessingError(Exception):
     def __init__(self, message: str):
         super().__init__(f"Content processing error: {message}")
@@ -35,14 +44,50 @@ class ValidationError(Exception):
         super().__init__(f"Validation error for {field}: {message}")
 
 
+class JobNotFoundError(Exception):
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Edit job {job_id} not found")
+
+
+class TooManyJobsError(Exception):
+    def __init__(self, limit: int, scope: str):
+        self.limit = limit
+        self.scope = scope
+        super().__init__(f"Too many concurrent edit jobs ({scope} limit is {limit})")
+
+
+class EditQueueFullError(Exception):
+    def __init__(self, queued: int, retry_after: float):
+        self.queued = queued
+        self.retry_after = retry_after
+        super().__init__(f"Edit queue is full ({queued} jobs waiting), retry in about {retry_after:.0f}s")
+
+
+class IdempotencyKeyMismatchError(Exception):
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Idempotency-Key {key} was already used with a different request body")
+
+
 def handle_service_exception(e: Exception) -> HTTPException:
     """Convert service exceptions to HTTP exceptions"""
-    if isinstance(e, DocumentNotFoundError):
+    if isinstance(e, (DocumentNotFoundError, JobNotFoundError)):
         return HTTPException(status_code=404, detail=str(e))
     elif isinstance(e, DocumentDeletedError):
         return HTTPException(status_code=410, detail=str(e))
+    elif isinstance(e, DocumentVersionConflictError):
+        return HTTPException(status_code=409, detail=str(e))
     elif isinstance(e, ValidationError):
         return HTTPException(status_code=400, detail=str(e))
+    elif isinstance(e, IdempotencyKeyMismatchError):
+        return HTTPException(status_code=422, detail=str(e))
+    elif isinstance(e, TooManyJobsError):
+        return HTTPException(status_code=429, detail=str(e))
+    elif isinstance(e, EditQueueFullError):
+        return HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": str(max(1, round(e.retry_after)))}
+        )
     elif isinstance(
         e, (DocumentCreationError, DocumentUpdateError, ContentProcessingError)
     ):
@@ -122,6 +122,12 @@ class CacheManager:
             del self._timestamps[key]
             self.logger.debug(f"Cache deleted for key: {key}")
 
+    def purge_expired(self, ttl: int = None) -> None:
+        """Drop entries older than ``ttl``"""
+        ttl = ttl or self.default_ttl
+        for key in [key for key in self._timestamps if self._is_expired(key, ttl)]:
+            self.delete(key)
+
     def clear(self) -> None:
         """Clear all cache"""
         self._cache.clear()
@@ -1,38 +1,87 @@
 from typing import List, Optional, Dict, Any
 from app.supabase import supabase
+from app.config import settings
 from app.core.exceptions import (
     DocumentNotFoundError,
     DocumentCreationError,
     DocumentUpdateError,
 )
+from app.core.repositories.revision import corpus_revision
+from app.services.delta import LRUCache, apply_delta, delta_size, make_delta
+
+# Every column but the embedding, which only the search functions read
+CONTENT_COLUMNS = (
+    "version, document_id, markdown_content, language, keywords_array, urls_array, "
+    "summary, created_at, updated_at, base_version, keyframe_version, delta, delta_depth"
+)
+# Storage details of delta-encoded versions, stripped before rows are returned
+_STORAGE_FIELDS = ("base_version", "keyframe_version", "delta", "delta_depth")
+_CHAIN_COLUMNS = "version, markdown_content, " + ", ".join(_STORAGE_FIELDS)
+
+# Materialized content of delta-encoded versions. Versions never change once
+# written, so entries never go stale.
+version_cache = LRUCache(settings.VERSION_CACHE_SIZE)
 
 
 class ContentRepository:
+    """
+    Document content versions.
+
+    A version is stored in full when written. Once a newer version replaces it
+    (see compact_version) it is rewritten as a delta from the version it was
+    based on, with a full keyframe every VERSION_KEYFRAME_INTERVAL versions, so
+    current versions are always stored in full. Reads return the full
+    ``markdown_content`` either way.
+    """
+
     @staticmethod
     async def create_content(content_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new document content version"""
         try:
             result = supabase.table("document_contents").insert(content_data).execute()
+            corpus_revision.bump()
             if not result.data:
                 raise DocumentCreationError("Failed to create document content")
             return result.data[0]
         except Exception as e:
             raise DocumentCreationError(str(e))
 
+    @staticmethod
+    async def create_contents(contents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create several document content versions in one insert, in order"""
+        try:
+            result = supabase.table("document_contents").insert(contents).execute()
+            corpus_revision.bump()
+            if not result.data or len(result.data) != len(contents):
+                raise DocumentCreationError("Failed to create document contents")
+            return result.data
+        except Exception as e:
+            raise DocumentCreationError(str(e))
+
+    @staticmethod
+    async def delete_content(version_id: str) -> None:
+        """Delete a version that never became current"""
+        try:
+            supabase.table("document_contents").delete().eq("version", str(version_id)).execute()
+            corpus_revision.bump()
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+
     @staticmethod
     async def get_document_versions(doc_id: str) -> List[Dict[str, Any]]:
         """List all versions of a document"""
         try:
             result = (
                 supabase.table("document_contents")
-                .select("*")
+                .select(CONTENT_COLUMNS)
                 .eq("document_id", str(doc_id))
                 .order("created_at", desc=True)
                 .execute()
             )
-            return result.data
         except Exception as e:
             raise DocumentUpdateError(str(e))
+        # The whole history is in hand, so chains rebuild without more reads
+        return await ContentRepository.materialize(result.data)
 
     @staticmethod
     async def get_document_version(doc_id: str, version_id: str) -> Dict[str, Any]:
@@ -40,7 +89,7 @@ class ContentRepository:
         try:
             result = (
                 supabase.table("document_contents")
-                .select("*")
+                .select(CONTENT_COLUMNS)
                 .eq("document_id", str(doc_id))
                 .eq("version", version_id)
                 .execute()
@@ -49,12 +98,51 @@ class ContentRepository:
             if not result.data:
                 raise DocumentNotFoundError(f"{doc_id}/version/{version_id}")
 
-            return result.data[0]
+            return (await ContentRepository.materialize(result.data[:1]))[0]
         except Exception as e:
-            if isinstance(e, DocumentNotFoundError):
+            if isinstance(e, (DocumentNotFoundError, DocumentUpdateError)):
                 raise
             raise DocumentUpdateError(str(e))
 
+    @staticmethod
+    async def get_versions_by_ids(version_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch several versions, across documents, in one query"""
+        if not version_ids:
+            return []
+        try:
+            result = (
+                supabase.table("document_contents")
+                .select(CONTENT_COLUMNS)
+                .in_("version", sorted({str(version_id) for version_id in version_ids}))
+                .execute()
+            )
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+        return await ContentRepository.materialize(result.data)
+
+    @staticmethod
+    async def apply_versions(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert new versions and move each document's current version pointer in
+        a single transaction (the ``apply_document_versions`` function).
+
+        Each item carries ``document_id``, an optional ``expected_version_id``
+        for compare-and-swap, and the content row fields (including the
+        ``base_version`` it was derived from). Returns one
+        ``{"document_id", "version", "status"}`` entry per item, in order, with
+        status ``applied``, ``conflict`` or ``not_found``.
+        """
+        if not items:
+            return []
+        try:
+            result = supabase.rpc("apply_document_versions", {"items": items}).execute()
+            corpus_revision.bump()
+        except Exception as e:
+            raise DocumentCreationError(str(e))
+        if not isinstance(result.data, list) or len(result.data) != len(items):
+            raise DocumentCreationError("apply_document_versions returned an unexpected result")
+        return result.data
+
     @staticmethod
     async def get_latest_version(
         doc_id: str, current_version_id: Optional[str]
@@ -64,3 +152,122 @@ class ContentRepository:
             raise DocumentNotFoundError(f"{doc_id} (no versions found)")
 
         return await ContentRepository.get_document_version(doc_id, current_version_id)
+
+    @staticmethod
+    async def materialize(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill in ``markdown_content`` of delta-encoded rows and drop storage fields"""
+        known = {row.get("version"): row for row in rows}
+        for row in rows:
+            if row.get("delta") is not None:
+                row["markdown_content"] = await ContentRepository._reconstruct(row, known)
+        for row in rows:
+            for field in _STORAGE_FIELDS:
+                row.pop(field, None)
+        return rows
+
+    @staticmethod
+    async def _fetch_chain(keyframe_id: str) -> List[Dict[str, Any]]:
+        """A keyframe and every delta stored against it, in one query"""
+        try:
+            result = (
+                supabase.table("document_contents")
+                .select(_CHAIN_COLUMNS)
+                .or_(f"version.eq.{keyframe_id},keyframe_version.eq.{keyframe_id}")
+                .execute()
+            )
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+        return result.data
+
+    @staticmethod
+    async def _reconstruct(row: Dict[str, Any], known: Dict[str, Dict[str, Any]]) -> str:
+        """
+        Content of a delta-encoded ``row``: walk back to the nearest full or
+        cached version, then replay the deltas. ``known`` holds rows already
+        read and gains the rows fetched here.
+        """
+        chain = []
+        current = row
+        while True:
+            if current.get("delta") is None and current.get("markdown_content") is not None:
+                content = current["markdown_content"]
+                break
+            cached = version_cache.get(current["version"])
+            if cached is not None:
+                content = cached
+                break
+
+            chain.append(current)
+            base_id = current.get("base_version")
+            if base_id not in known:
+                for fetched in await ContentRepository._fetch_chain(current["keyframe_version"]):
+                    known.setdefault(fetched["version"], fetched)
+            if base_id not in known:
+                raise DocumentUpdateError(
+                    f"Base version {base_id} of version {current['version']} is missing"
+                )
+            current = known[base_id]
+
+        for link in reversed(chain):
+            content = apply_delta(content, link["delta"])
+            version_cache.set(link["version"], content)
+        return content
+
+    @staticmethod
+    async def compact_version(version_id: str) -> bool:
+        """
+        Rewrite a version that is no longer current as a delta from its base.
+
+        The version stays full when it starts a new keyframe (every
+        VERSION_KEYFRAME_INTERVAL versions) or when the delta would not be
+        smaller. Its embedding is set to NULL either way, since only current
+        versions are searched; old versions have no vector afterwards.
+        Returns whether the version was delta-encoded.
+        """
+        row = await ContentRepository.get_chain_row(version_id)
+        if not row:
+            raise DocumentNotFoundError(f"version/{version_id}")
+        if row.get("delta") is not None:
+            return False
+
+        update: Dict[str, Any] = {"embedding": None}
+        base_id = row.get("base_version")
+        content = row.get("markdown_content") or ""
+        if base_id:
+            base = (await ContentRepository.get_chain_row(base_id)) or {}
+            depth = (base.get("delta_depth") or 0) + 1
+            if base and depth < settings.VERSION_KEYFRAME_INTERVAL:
+                base_content = await ContentRepository._reconstruct(base, {base_id: base})
+                delta = make_delta(base_content, content)
+                if delta_size(delta) < len(content.encode()):
+                    update.update(
+                        markdown_content=None,
+                        delta=delta,
+                        delta_depth=depth,
+                        keyframe_version=base.get("keyframe_version") or base_id,
+                    )
+
+        try:
+            supabase.table("document_contents").update(update).eq(
+                "version", str(version_id)
+            ).is_("delta", "null").execute()
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+        if "delta" in update:
+            version_cache.set(str(version_id), content)
+            return True
+        return False
+
+    @staticmethod
+    async def get_chain_row(version_id: str) -> Optional[Dict[str, Any]]:
+        """The storage fields of one version, without materializing it"""
+        try:
+            result = (
+                supabase.table("document_contents")
+                .select(_CHAIN_COLUMNS)
+                .eq("version", str(version_id))
+                .execute()
+            )
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+        return result.data[0] if result.data else None
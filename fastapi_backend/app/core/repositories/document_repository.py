@@ -4,8 +4,10 @@ from app.core.exceptions import (
     DocumentNotFoundError,
     DocumentCreationError,
     DocumentUpdateError,
+    DocumentVersionConflictError,
 )
 from app.core.logging import performance_monitor, cached
+from app.core.repositories.revision import corpus_revision
 
 
 class DocumentRepository:
@@ -14,6 +16,7 @@ class DocumentRepository:
         """Create a new document in the database"""
         try:
             result = supabase.table("documents").insert(doc_data).execute()
+            corpus_revision.bump()
             if not result.data:
                 raise DocumentCreationError("Failed to insert document")
             return result.data[0]
@@ -37,6 +40,22 @@ class DocumentRepository:
                 raise
             raise DocumentUpdateError(str(e))
 
+    @staticmethod
+    async def get_documents_by_ids(doc_ids: List[str]) -> List[Dict[str, Any]]:
+        """Fetch several documents in one query; missing IDs are simply absent"""
+        if not doc_ids:
+            return []
+        try:
+            result = (
+                supabase.table("documents")
+                .select("*")
+                .in_("id", sorted({str(doc_id) for doc_id in doc_ids}))
+                .execute()
+            )
+            return result.data
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+
     @staticmethod
     async def get_root_documents(
         is_api_ref: Optional[bool] = True,
@@ -136,6 +155,7 @@ class DocumentRepository:
                 .eq("id", str(doc_id))
                 .execute()
             )
+            corpus_revision.bump()
             if not result.data:
                 raise DocumentNotFoundError(doc_id)
             return result.data[0]
@@ -145,22 +165,65 @@ class DocumentRepository:
             raise DocumentUpdateError(str(e))
 
     @staticmethod
-    async def update_current_version(doc_id: str, version_id: str) -> None:
-        """Update the current version ID of a document"""
+    async def update_current_version(
+        doc_id: str, version_id: str, expected_version_id: Optional[str] = None
+    ) -> None:
+        """
+        Update the current version ID of a document.
+
+        With ``expected_version_id`` the update is a compare-and-swap: it only
+        matches while the document still points at that version.
+        """
         try:
-            result = (
+            query = (
                 supabase.table("documents")
                 .update({"current_version_id": version_id})
                 .eq("id", str(doc_id))
-                .execute()
             )
+            if expected_version_id is not None:
+                query = query.eq("current_version_id", expected_version_id)
+            result = query.execute()
+            corpus_revision.bump()
             if not result.data:
+                if expected_version_id is not None:
+                    raise DocumentVersionConflictError(doc_id, expected_version_id)
                 raise DocumentNotFoundError(doc_id)
         except Exception as e:
-            if isinstance(e, DocumentNotFoundError):
+            if isinstance(e, (DocumentNotFoundError, DocumentVersionConflictError)):
                 raise
             raise DocumentUpdateError(str(e))
 
+    @staticmethod
+    async def set_language_version(
+        doc_id: str,
+        language: str,
+        version_id: str,
+        expected_version_id: Optional[str] = None,
+    ) -> None:
+        """
+        Move one language's head of a multilingual document (the
+        ``set_language_version`` function). ``current_version_id`` follows when
+        that language is the primary one. With ``expected_version_id`` the move
+        is a compare-and-swap on the language's current head.
+        """
+        try:
+            result = supabase.rpc(
+                "set_language_version",
+                {
+                    "doc_id": str(doc_id),
+                    "lang": language,
+                    "new_version": version_id,
+                    "expected_version": expected_version_id,
+                },
+            ).execute()
+            corpus_revision.bump()
+        except Exception as e:
+            raise DocumentUpdateError(str(e))
+        if not result.data:
+            if expected_version_id is not None:
+                raise DocumentVersionConflictError(doc_id, expected_version_id)
+            raise DocumentNotFoundError(doc_id)
+
     @staticmethod
     async def delete_document(doc_id: str) -> bool:
         """Mark document as deleted (soft delete)"""
@@ -171,6 +234,7 @@ class DocumentRepository:
                 .eq("id", str(doc_id))
                 .execute()
             )
+            corpus_revision.bump()
             return bool(result.data)
         except Exception as e:
             raise DocumentUpdateError(str(e))
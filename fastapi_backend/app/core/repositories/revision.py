@@ -0,0 +1,15 @@
+class CorpusRevision:
+    """
+    Counter bumped by every write to documents or their content made through
+    this worker's repositories, so results computed from the corpus can tell
+    whether it has changed since.
+    """
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self) -> None:
+        self.value += 1
+
+
+corpus_revision = CorpusRevision()
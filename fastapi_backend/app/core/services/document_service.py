@@ -1,22 +1,81 @@
-from typing import List, Optional, Dict, Any
+import asyncio
+from typing import List, Optional, Dict, Any, Tuple
 from app.models.documents import (
     DocumentCreate,
     DocumentRead,
     DocumentUpdate,
     DocumentContentCreate,
     DocumentContentRead,
+    DiffResult,
+    DocumentDiffResponse,
     GetAllDocumentsResponse,
 )
 from app.core.repositories.document_repository import DocumentRepository
 from app.core.repositories.content_repository import ContentRepository
-from app.core.exceptions import ValidationError, DocumentNotFoundError
+from app.core.exceptions import (
+    ValidationError,
+    DocumentNotFoundError,
+    DocumentVersionConflictError,
+)
 from app.services.content_processor import (
     build_tree,
     process_document_content,
+    process_documents_content,
     clean_markdown_content,
 )
+from app.services.delta import LRUCache
+from app.services.diffing import diff_texts
 from app.config import settings
 
+# Diffs keyed by (document, from version, to version). Versions never change,
+# so a pair's diff is computed once.
+diff_cache = LRUCache(settings.DIFF_CACHE_SIZE)
+
+
+def language_head(document: Dict[str, Any], language: Optional[str]) -> Optional[str]:
+    """
+    Current version of ``document`` in ``language``.
+
+    Documents created with several languages keep one head per language in
+    ``language_versions``; ``current_version_id`` is the primary language's
+    head and the only head of single-language documents.
+    """
+    language_versions = document.get("language_versions") or {}
+    return language_versions.get(language) or document.get("current_version_id")
+
+
+def head_versions(document: Dict[str, Any]) -> set:
+    """Every current version of ``document``, across languages"""
+    heads = set((document.get("language_versions") or {}).values())
+    if document.get("current_version_id"):
+        heads.add(document["current_version_id"])
+    return heads
+
+
+def primary_language(document: Dict[str, Any]) -> Optional[str]:
+    """Language whose head is ``current_version_id``, for multilingual documents"""
+    for language, version in (document.get("language_versions") or {}).items():
+        if version == document.get("current_version_id"):
+            return language
+    return None
+
+
+def replaced_head(document: Dict[str, Any], language: Optional[str]) -> Optional[str]:
+    """
+    Version that a new version in ``language`` takes the place of, as
+    set_language_version and update_current_version move the pointers, or
+    None when no version stops being a head (a language's first version).
+    """
+    language_versions = document.get("language_versions") or {}
+    if not language_versions:
+        return document.get("current_version_id")
+    language = language or primary_language(document)
+    replaced = language_versions.get(language)
+    # current_version_id follows the head it points at, so only another
+    # language's pointer can keep the replaced version a head
+    others = {version for lang, version in language_versions.items() if lang != language}
+    return replaced if replaced not in others else None
+
 
 class DocumentService:
     def __init__(self):
@@ -59,6 +118,50 @@ class DocumentService:
         print(f"Document created with ID: {doc_id}, Version ID: {version_id}")
         return {**new_doc, "current_version_id": version_id}
 
+    async def create_multilingual_document(
+        self, document: DocumentCreate, contents: List[DocumentContentCreate]
+    ) -> DocumentRead:
+        """
+        Create one document holding a version per language.
+
+        All languages are enriched together, their versions are inserted in
+        one statement, and ``language_versions`` links them; the first
+        language is the primary one that ``current_version_id`` points at.
+        """
+        if not document.name:
+            raise ValidationError("name", "Path and name are required fields")
+        if not contents:
+            raise ValidationError("contents", "At least one language version is required")
+
+        new_doc = await self.doc_repo.create_document(document.model_dump())
+        doc_id = new_doc["id"]
+
+        processed = await process_documents_content(
+            [(content.markdown_content, content.language) for content in contents]
+        )
+        rows = []
+        for content, processed_content in zip(contents, processed):
+            content_data = content.model_dump()
+            content_data.update(processed_content)
+            content_data["document_id"] = doc_id
+            rows.append(content_data)
+        versions = await self.content_repo.create_contents(rows)
+
+        language_versions = {row["language"]: row["version"] for row in versions}
+        current_version_id = versions[0]["version"]
+        await self.doc_repo.update_document(
+            doc_id,
+            {"current_version_id": current_version_id, "language_versions": language_versions},
+        )
+        print(
+            f"Document created with ID: {doc_id}, versions: {language_versions}"
+        )
+        return {
+            **new_doc,
+            "current_version_id": current_version_id,
+            "language_versions": language_versions,
+        }
+
     async def get_root_documents(
         self, is_api_ref: Optional[bool] = True
     ) -> List[DocumentRead]:
@@ -74,27 +177,27 @@ class DocumentService:
 
     async def list_document_versions(self, doc_id: str) -> List[DocumentContentRead]:
         """List all versions of a document"""
-        # Get the document to find the current version ID
+        # Get the document to find the current version of each language
         doc_result = await self.doc_repo.get_document_by_id(doc_id)
-        current_version_id = doc_result.get("current_version_id")
+        heads = head_versions(doc_result)
 
         # Get all versions
         versions = await self.content_repo.get_document_versions(doc_id)
 
         # Add the 'latest' flag to each version
         for version in versions:
-            version["latest"] = version["version"] == current_version_id
+            version["latest"] = version["version"] in heads
 
         return versions
 
     async def get_document_version(
-        self, doc_id: str, version_id: str
+        self, doc_id: str, version_id: str, language: Optional[str] = None
     ) -> DocumentContentRead:
-        """Get a specific version (optional: `latest` as alias)"""
+        """Get a specific version (optional: `latest` as alias, per ``language``)"""
         doc_result = await self.doc_repo.get_document_by_id(doc_id)
 
         if version_id.lower() == "latest":
-            version_id = doc_result.get("current_version_id")
+            version_id = language_head(doc_result, language)
             if not version_id:
                 raise DocumentNotFoundError("No versions found for this document")
 
@@ -110,6 +213,70 @@ class DocumentService:
 
         return content
 
+    async def diff_versions(
+        self,
+        doc_id: str,
+        from_version: str,
+        to_version: str = "latest",
+        language: Optional[str] = None,
+    ) -> Tuple[str, str, DiffResult]:
+        """
+        Diff two versions of a document (either may be `latest`, per
+        ``language``). Returns the resolved version IDs and the diff.
+        """
+        document = await self.doc_repo.get_document_by_id(doc_id)
+        resolved = []
+        for version_id in (from_version, to_version):
+            if version_id.lower() == "latest":
+                version_id = language_head(document, language)
+                if not version_id:
+                    raise DocumentNotFoundError("No versions found for this document")
+            resolved.append(str(version_id))
+        from_id, to_id = resolved
+
+        key = (str(doc_id), from_id, to_id)
+        diff = diff_cache.get(key)
+        if diff is None:
+            old, new = await asyncio.gather(
+                self.content_repo.get_document_version(doc_id, from_id),
+                self.content_repo.get_document_version(doc_id, to_id),
+            )
+            diff = await asyncio.to_thread(
+                diff_texts, old.get("markdown_content") or "", new.get("markdown_content") or ""
+            )
+            diff_cache.set(key, diff)
+        return from_id, to_id, diff
+
+    async def get_document_diff(
+        self,
+        doc_id: str,
+        from_version: str,
+        to_version: str = "latest",
+        language: Optional[str] = None,
+        hunk_offset: int = 0,
+        hunk_limit: Optional[int] = None,
+    ) -> DocumentDiffResponse:
+        """One page of the diff between two versions"""
+        if hunk_offset < 0:
+            raise ValidationError("hunk_offset", "must not be negative")
+        limit = min(hunk_limit or settings.DIFF_MAX_HUNKS_PER_PAGE, settings.DIFF_MAX_HUNKS_PER_PAGE)
+        if limit < 1:
+            raise ValidationError("hunk_limit", "must be at least 1")
+
+        from_id, to_id, diff = await self.diff_versions(doc_id, from_version, to_version, language)
+        end = hunk_offset + limit
+        return DocumentDiffResponse(
+            document_id=str(doc_id),
+            from_version=from_id,
+            to_version=to_id,
+            added=diff.added,
+            removed=diff.removed,
+            total_hunks=len(diff.hunks),
+            hunk_offset=hunk_offset,
+            hunks=diff.hunks[hunk_offset:end],
+            next_offset=end if end < len(diff.hunks) else None,
+        )
+
     async def get_child_documents(self, parent_id: str) -> List[DocumentRead]:
         """Get all child documents"""
         return await self.doc_repo.get_child_documents(parent_id)
@@ -140,6 +307,8 @@ class DocumentService:
                 doc["keywords_array"] = content.get("keywords_array", [])
                 del doc["document_contents"]
 
+        all_docs.extend(await self._secondary_language_nodes(all_docs))
+
         # print(f"Total documents fetched: {len(all_docs)}")
 
         # Split into groups based on is_api_ref and language
@@ -170,6 +339,39 @@ class DocumentService:
 
         return output
 
+    async def _secondary_language_nodes(
+        self, docs: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Tree nodes for the non-primary languages of multilingual documents,
+        loaded in one query. Each carries the same document ID so every
+        language tree holds exactly one node per document.
+        """
+        wanted = {}
+        for doc in docs:
+            for version in (doc.get("language_versions") or {}).values():
+                if version != doc.get("current_version_id"):
+                    wanted[version] = doc
+        if not wanted:
+            return []
+
+        nodes = []
+        for content in await self.content_repo.get_versions_by_ids(list(wanted)):
+            doc = wanted.get(content["version"])
+            if doc is None:
+                continue
+            nodes.append(
+                {
+                    **doc,
+                    "markdown_content": clean_markdown_content(
+                        content.get("markdown_content", "")
+                    ),
+                    "language": content.get("language"),
+                    "keywords_array": content.get("keywords_array", []),
+                }
+            )
+        return nodes
+
     async def update_document(
         self, doc_id: str, document: DocumentUpdate
     ) -> DocumentRead:
@@ -186,11 +388,25 @@ class DocumentService:
         return await self.doc_repo.update_document(doc_id, update_data)
 
     async def create_document_version(
-        self, doc_id: str, content: DocumentContentCreate
+        self,
+        doc_id: str,
+        content: DocumentContentCreate,
+        expected_version_id: Optional[str] = None,
     ) -> DocumentContentRead:
-        """Create a new version for a document (and update latest version)"""
+        """
+        Create a new version for a document (and update latest version).
+
+        When ``expected_version_id`` is given the latest version pointer only
+        moves if the document is still at that version; otherwise
+        DocumentVersionConflictError is raised.
+        """
         # Check if document exists
-        await self.doc_repo.get_document_by_id(doc_id)
+        document = await self.doc_repo.get_document_by_id(doc_id)
+        multilingual = bool(document.get("language_versions"))
+        base_version = language_head(document, content.language)
+        if expected_version_id is not None and base_version != expected_version_id:
+            # Fail before inserting a version that could never become current
+            raise DocumentVersionConflictError(doc_id, expected_version_id)
 
         # Process the content to extract keywords, URLs, and generate summary
         processed_content = await process_document_content(
@@ -201,13 +417,58 @@ class DocumentService:
         content_data = content.model_dump()
         content_data.update(processed_content)  # Add the processed content fields
         content_data["document_id"] = str(doc_id)
+        if base_version:
+            content_data["base_version"] = str(base_version)
         new_version = await self.content_repo.create_content(content_data)
 
         version_id = new_version["version"]
 
         # Update the document with the new current version ID
-        await self.doc_repo.update_current_version(doc_id, version_id)
+        try:
+            if multilingual:
+                # Only this language's head moves; other languages are untouched
+                language = (
+                    new_version.get("language") or content.language or primary_language(document)
+                )
+                await self.doc_repo.set_language_version(
+                    doc_id,
+                    language,
+                    version_id,
+                    expected_version_id=expected_version_id,
+                )
+            else:
+                language = None
+                if expected_version_id is None:
+                    await self.doc_repo.update_current_version(doc_id, version_id)
+                else:
+                    await self.doc_repo.update_current_version(
+                        doc_id, version_id, expected_version_id=expected_version_id
+                    )
+        except DocumentVersionConflictError:
+            # The version never became current; keep it out of the history
+            try:
+                await self.content_repo.delete_content(version_id)
+            except Exception as e:
+                print(f"Failed to delete orphaned version {version_id}: {e}")
+            raise
         print(
             f"New version created for document {doc_id} with version ID: {version_id}"
         )
+        # Only the pointer that moved frees a version; other languages'
+        # heads stay searchable and in full
+        replaced = replaced_head(document, language)
+        if replaced:
+            await self.compact_versions([replaced])
         return new_version
+
+    async def compact_versions(self, version_ids: List[str]) -> None:
+        """
+        Delta-encode versions that have just been replaced. Failures are only
+        logged: the new version is already written, an uncompacted one just
+        takes more space.
+        """
+        for version_id in version_ids:
+            try:
+                await self.content_repo.compact_version(version_id)
+            except Exception as e:
+                print(f"Failed to compact version {version_id}: {e}")
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.exceptions import JobNotFoundError
+from app.models.edit_documentation import EditDocumentationRequest, EditDocumentationResponse, EditJob
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS edit_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    errors TEXT,
+    error TEXT,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS edit_jobs_updated_at ON edit_jobs (updated_at);
+"""
+
+# Status of jobs that were in flight when their worker stopped
+_INTERRUPTED = "Job was interrupted by a server restart"
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+# Identifies this boot of the host; empty where the kernel does not expose it
+_BOOT_ID = (_read("/proc/sys/kernel/random/boot_id") or "").strip()
+
+
+def _process_start(pid: int) -> Optional[str]:
+    """
+    Start time of ``pid`` in clock ticks since boot, which tells a process
+    from a later one that reused its pid. Empty without /proc, None when
+    there is no such process.
+    """
+    if not os.path.isdir("/proc"):
+        return ""
+    stat = _read(f"/proc/{pid}/stat")
+    # The fields after the parenthesized command start at field 3; starttime is field 22
+    return stat.rsplit(")", 1)[1].split()[19] if stat else None
+
+
+def _current_owner() -> str:
+    """Owner recorded on the jobs this process runs"""
+    pid = os.getpid()
+    return f"{_BOOT_ID}:{pid}:{_process_start(pid)}"
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """Whether the worker that recorded ``owner`` is still running"""
+    try:
+        boot, pid, start = owner.split(":")
+        pid = int(pid)
+    except (AttributeError, ValueError):
+        return False
+    if boot != _BOOT_ID:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return _process_start(pid) == start
+
+
+class EditJobStore:
+    """
+    Local SQLite store of edit jobs and their results.
+
+    A job and its result survive restarts of the process. Each job records
+    the worker running it; when the store is opened, jobs still queued or
+    running whose worker has exited (or ran before the host rebooted) are
+    marked failed, while other workers sharing the file keep theirs. Jobs are
+    kept for ``ttl`` seconds after their last update. Calls run in a thread
+    so the event loop never waits on disk.
+    """
+
+    def __init__(self, path: str, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            columns = {row["name"] for row in connection.execute("PRAGMA table_info(edit_jobs)")}
+            if "owner" not in columns:
+                connection.execute("ALTER TABLE edit_jobs ADD COLUMN owner TEXT")
+            owners = connection.execute(
+                "SELECT DISTINCT owner FROM edit_jobs WHERE status IN ('queued', 'running')"
+            ).fetchall()
+            for (owner,) in owners:
+                if not _owner_alive(owner):
+                    connection.execute(
+                        "UPDATE edit_jobs SET status = 'failed', error = ?, updated_at = ? "
+                        "WHERE status IN ('queued', 'running') AND owner IS ?",
+                        (_INTERRUPTED, time.time(), owner),
+                    )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            connection = self._connect()
+            rows = connection.execute(sql, params).fetchall()
+            connection.commit()
+            return rows
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> EditJob:
+        return EditJob(
+            job_id=row["id"],
+            status=row["status"],
+            request=EditDocumentationRequest.model_validate_json(row["request"]),
+            result=EditDocumentationResponse.model_validate_json(row["result"]) if row["result"] else None,
+            errors=json.loads(row["errors"]) if row["errors"] else [],
+            error=row["error"],
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    async def create(self, job_id: str, request: EditDocumentationRequest) -> EditJob:
+        now = time.time()
+        await asyncio.to_thread(self.purge_expired)
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO edit_jobs (id, status, request, owner, created_at, updated_at) "
+            "VALUES (?, 'queued', ?, ?, ?, ?)",
+            (job_id, request.model_dump_json(), _current_owner(), now, now),
+        )
+        return await self.get(job_id)
+
+    async def get(self, job_id: str) -> EditJob:
+        """The job, unless it is unknown or expired"""
+        rows = await asyncio.to_thread(
+            self._execute,
+            "SELECT * FROM edit_jobs WHERE id = ? AND updated_at > ?",
+            (job_id, time.time() - self.ttl),
+        )
+        if not rows:
+            raise JobNotFoundError(job_id)
+        return self._to_job(rows[0])
+
+    async def mark_running(self, job_id: str) -> None:
+        await self._update(job_id, status="running", owner=_current_owner())
+
+    async def succeed(
+        self, job_id: str, result: EditDocumentationResponse, errors: List[Dict[str, Any]]
+    ) -> None:
+        await self._update(
+            job_id, status="succeeded", result=result.model_dump_json(), errors=json.dumps(errors)
+        )
+
+    async def fail(self, job_id: str, error: str, errors: Optional[List[Dict[str, Any]]] = None) -> None:
+        await self._update(job_id, status="failed", error=error, errors=json.dumps(errors or []))
+
+    async def _update(self, job_id: str, **fields: Any) -> None:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        await asyncio.to_thread(
+            self._execute,
+            f"UPDATE edit_jobs SET {columns}, updated_at = ? WHERE id = ?",
+            (*fields.values(), time.time(), job_id),
+        )
+
+    def purge_expired(self) -> None:
+        self._execute("DELETE FROM edit_jobs WHERE updated_at <= ?", (time.time() - self.ttl,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Shared store for edit jobs submitted over HTTP
+edit_job_store = EditJobStore(settings.EDIT_JOB_DB_PATH, settings.EDIT_JOB_TTL_SECONDS)
@@ -1,11 +1,12 @@
 import asyncio
 import logging
 import uuid
-from typing import List, Optional, Tuple, AsyncGenerator
+from typing import Any, Dict, List, Optional, Tuple, AsyncGenerator
 
 from app.models.edit_documentation import (
     EditDocumentationRequest,
     EditDocumentationResponse,
+    EditJob,
     ChangeRequest,
     InLineEditGuardrailException,
     InLineEditRequest,
@@ -15,6 +16,7 @@ from app.models.edit_documentation import (
     DocumentEditWithOriginal
 )
 from app.models.websocket_events import (
+    BaseEvent,
     EditProgressEvent,
     IntentDetectedEvent,
     SuggestionsFoundEvent,
@@ -24,17 +26,120 @@ from app.models.websocket_events import (
     DocumentDeletedEvent,
     ErrorEvent,
     ProgressEvent,
+    InlineEditCompletedEvent,
 )
 from app.models.documents import DocumentContentCreate, DocumentCreate
 from app.services.agents.create_content_agent import GeneratedDocument
 from app.services.agents.delete_content_agent import DocumentToDelete
-from app.services.editor import MainEditor, update_markdown, InlineEditor
-from app.core.services.document_service import DocumentService
+from app.services.editor import MainEditor, apply_document_edit, InlineEditor
+from app.core.services.document_service import DocumentService, language_head, replaced_head
+from app.core.services.edit_jobs import edit_job_store
+from app.core.services.idempotency import idempotency_store
+from app.services.content_processor import process_documents_content
+from app.services.merging import three_way_merge
+from app.services.shared.admission import edit_admission
+from app.services.shared.single_flight import SingleFlight
+from app.services.shared.dag import DagNode, run_dag
+from app.config import settings
 from app.core.repositories.document_repository import DocumentRepository
-from app.core.exceptions import ValidationError, DocumentNotFoundError, DocumentDeletedError
+from app.core.repositories.content_repository import ContentRepository
+from app.core.repositories.revision import corpus_revision
+from app.core.exceptions import (
+    ContentProcessingError,
+    ValidationError,
+    DocumentNotFoundError,
+    DocumentDeletedError,
+    DocumentVersionConflictError,
+)
 
 logger = logging.getLogger(__name__)
 
+# Background edit jobs, held so they are not garbage collected mid-run
+_edit_job_tasks: set = set()
+
+# In-flight edit runs shared by identical concurrent requests
+edit_flights = SingleFlight()
+
+
+def edit_run_key(edit_request: EditDocumentationRequest) -> Tuple[str, Optional[str], int]:
+    """
+    Requests with the same key would make the same agent calls: the same
+    query up to case and whitespace, for the same document, against the
+    same corpus.
+
+    The corpus revision only counts writes made through this worker, so a
+    write on another worker does not change the key here. Runs are shared
+    within a worker only, and a request can still join one that started
+    before such a write, just as it would if it had arrived a moment sooner.
+    """
+    query = " ".join(edit_request.query.split()).casefold()
+    return query, edit_request.document_id, corpus_revision.value
+
+
+def collect_edit_results(events: List[Any]) -> Tuple[EditDocumentationResponse, List[Dict[str, Any]]]:
+    """The documents and errors reported by an edit run's events"""
+    result = EditDocumentationResponse()
+    errors: List[Dict[str, Any]] = []
+    for event in events:
+        if isinstance(event, DocumentCompletedEvent):
+            result.edit.append(event.payload)
+        elif isinstance(event, DocumentCreatedEvent):
+            result.create.append(event.payload)
+        elif isinstance(event, DocumentDeletedEvent):
+            result.delete.append(event.payload)
+        elif isinstance(event, ErrorEvent):
+            errors.append(event.payload)
+    return result, errors
+
+
+def edit_outcome(events: List[Any]) -> Tuple[EditDocumentationResponse, List[Dict[str, Any]]]:
+    """
+    Like collect_edit_results, but raises ContentProcessingError when parts
+    of the run errored and it produced nothing.
+    """
+    result, errors = collect_edit_results(events)
+    if errors and not (result.edit or result.create or result.delete):
+        raise ContentProcessingError(errors[0].get("message", "Edit failed"))
+    return result, errors
+
+
+def _is_queued(event: Any) -> bool:
+    """Whether ``event`` reports a run still waiting for admission"""
+    return isinstance(event, ProgressEvent) and event.payload.get("stage") == "queued"
+
+
+def _is_nested(path: Optional[str], parent_path: Optional[str]) -> bool:
+    parent = (parent_path or "").strip("/")
+    child = (path or "").strip("/")
+    return bool(parent) and child.startswith(parent + "/")
+
+
+def find_create_parents(creates: List[GeneratedDocument]) -> Dict[int, int]:
+    """
+    Map each create to the create in the same request that is its parent.
+
+    A child points at a new parent by setting ``parent_id`` to the parent's
+    name or path, or, without a ``parent_id``, by having a path nested under
+    the parent's path in the same corpus. The deepest matching path wins.
+    """
+    parents: Dict[int, int] = {}
+    for i, child in enumerate(creates):
+        candidates = []
+        for j, parent in enumerate(creates):
+            if i == j:
+                continue
+            if child.parent_id:
+                if child.parent_id in (parent.name, parent.path):
+                    candidates.append(j)
+            elif child.is_api_ref == parent.is_api_ref and _is_nested(child.path, parent.path):
+                candidates.append(j)
+        if candidates:
+            parents[i] = max(candidates, key=lambda j: len(creates[j].path or ""))
+    return parents
+
+# How often a version write is re-merged after losing a compare-and-swap race
+VERSION_WRITE_ATTEMPTS = 3
+
 class InlineEditService:
     def __init__(self):
         pass
@@ -56,35 +161,170 @@ class InlineEditService:
                 message="Inline edit processed successfully."
             )
         except InLineEditGuardrailException as guardrail_error:
-            return InLineEditResponse(
+            return self._guardrail_response(inline_edit_request, guardrail_error)
+
+    async def inline_edit_stream(
+        self, inline_edit_request: InLineEditRequest, session_id: str
+    ) -> AsyncGenerator[EditProgressEvent, None]:
+        """
+        Stream an inline edit: content_delta events with the edited text as it
+        is written, then an inline_edit_completed event with the same
+        response as ``inline_edit``, or a fatal error event.
+        """
+        editor = InlineEditor(
+            query=inline_edit_request.query,
+            selected_text=inline_edit_request.selected_text
+        )
+        try:
+            async for event in editor.stream(session_id):
+                yield event
+            response = InLineEditResponse(
                 query=inline_edit_request.query,
                 original_text=inline_edit_request.selected_text,
-                edited_text=inline_edit_request.selected_text,  # No changes made
-                message= guardrail_error.__str__()  # Return the guardrail error message as the response message
+                edited_text=editor.response.edited_text,
+                message="Inline edit processed successfully."
             )
+        except InLineEditGuardrailException as guardrail_error:
+            response = self._guardrail_response(inline_edit_request, guardrail_error)
+        except Exception as e:
+            logger.error(f"Inline edit failed: {e}")
+            yield ErrorEvent(
+                event_id=str(uuid.uuid4()),
+                session_id=session_id,
+                payload={"message": str(e), "error_type": type(e).__name__, "fatal": True},
+            )
+            return
+        yield InlineEditCompletedEvent(event_id=str(uuid.uuid4()), session_id=session_id, payload=response)
+
+    @staticmethod
+    def _guardrail_response(
+        inline_edit_request: InLineEditRequest, guardrail_error: InLineEditGuardrailException
+    ) -> InLineEditResponse:
+        return InLineEditResponse(
+            query=inline_edit_request.query,
+            original_text=inline_edit_request.selected_text,
+            edited_text=inline_edit_request.selected_text,  # No changes made
+            message= guardrail_error.__str__()  # Return the guardrail error message as the response message
+        )
 
 
 class EditService:
     def __init__(self):
         self.document_service = DocumentService()
         self.doc_repo = DocumentRepository()
+        self.content_repo = ContentRepository()
 
     async def edit_documentation(self, edit_request: EditDocumentationRequest) -> EditDocumentationResponse:
-        """Edit documentation based on a query"""
-        editor = MainEditor(query=edit_request.query,document_id=edit_request.document_id)
-        return await editor.run()
+        """
+        Edit documentation based on a query, once the admission controller
+        lets it run. All or nothing: if any part of the run fails, the error
+        is raised and nothing is returned. Identical concurrent calls (see
+        edit_run_key) share one run and its response.
+        """
+        key = ("response", *edit_run_key(edit_request))
+        stream = edit_flights.join(key, lambda: self._admitted_run(edit_request))
+        try:
+            async for result in stream:
+                return result
+        finally:
+            await stream.aclose()
+
+    async def _admitted_run(
+        self, edit_request: EditDocumentationRequest
+    ) -> AsyncGenerator[EditDocumentationResponse, None]:
+        """The response of one MainEditor run, as a single-item stream to share"""
+        async with edit_admission.slot():
+            editor = MainEditor(query=edit_request.query, document_id=edit_request.document_id)
+            yield await editor.run()
+
+    async def submit_edit_job(self, edit_request: EditDocumentationRequest) -> EditJob:
+        """Record an edit job and run it in the background; returns at once"""
+        job = await edit_job_store.create(str(uuid.uuid4()), edit_request)
+        task = asyncio.create_task(self.run_edit_job(job.job_id, edit_request))
+        _edit_job_tasks.add(task)
+        task.add_done_callback(_edit_job_tasks.discard)
+        return job
+
+    async def get_edit_job(self, job_id: str) -> EditJob:
+        return await edit_job_store.get(job_id)
+
+    async def run_edit_job(self, job_id: str, edit_request: EditDocumentationRequest):
+        """
+        Run a submitted job through the same event stream as the streaming
+        endpoints and store what it produced, with the errors of any parts
+        that failed. The job stays queued until the run is admitted, and
+        fails if parts errored and nothing was produced.
+        """
+        events: List[Any] = []
+        running = False
+        try:
+            async for event in self.edit_documentation_stream(edit_request, job_id):
+                if not running and not _is_queued(event):
+                    await edit_job_store.mark_running(job_id)
+                    running = True
+                events.append(event)
+            result, errors = edit_outcome(events)
+            await edit_job_store.succeed(job_id, result, errors)
+        except Exception as e:
+            logger.error(f"Edit job {job_id} failed: {e}")
+            await edit_job_store.fail(job_id, str(e), collect_edit_results(events)[1])
 
     async def edit_documentation_stream(
         self, 
         edit_request: EditDocumentationRequest, 
         session_id: str
     ) -> AsyncGenerator[EditProgressEvent, None]:
-        """Stream edit documentation progress events"""
+        """
+        Stream edit documentation progress events. While the job waits for
+        admission, progress events report its queue position; a full queue
+        raises EditQueueFullError. A request identical to one already in
+        flight (see edit_run_key) follows that run instead of starting its own.
+        """
+        stream = edit_flights.join(
+            edit_run_key(edit_request), lambda: self._admitted_stream(edit_request, session_id)
+        )
+        try:
+            async for event in stream:
+                if isinstance(event, BaseEvent) and event.session_id != session_id:
+                    event = event.model_copy(update={"session_id": session_id})
+                yield event
+        finally:
+            # Leave the flight now rather than when the stream is collected
+            await stream.aclose()
+
+    async def _admitted_stream(
+        self,
+        edit_request: EditDocumentationRequest,
+        session_id: str
+    ) -> AsyncGenerator[EditProgressEvent, None]:
+        ticket = edit_admission.enqueue()
+        try:
+            async for position, estimated_wait in edit_admission.wait(ticket):
+                yield ProgressEvent(
+                    event_id=str(uuid.uuid4()),
+                    session_id=session_id,
+                    payload={
+                        "stage": "queued",
+                        "queue_position": position,
+                        "estimated_wait_seconds": round(estimated_wait, 1),
+                    },
+                )
+            async for event in self._run_edit_stream(edit_request, session_id):
+                yield event
+        finally:
+            edit_admission.release(ticket)
+
+    async def _run_edit_stream(
+        self,
+        edit_request: EditDocumentationRequest,
+        session_id: str
+    ) -> AsyncGenerator[EditProgressEvent, None]:
         try:
             # Create streaming editor
             editor = MainEditor(
                 query=edit_request.query, 
-                document_id=edit_request.document_id
+                document_id=edit_request.document_id,
+                session_id=session_id,
             )
             
             # Stream events from the editor
@@ -156,25 +396,235 @@ class EditService:
             except DocumentNotFoundError:
                 return False, f"Document {edit.document_id} not found"
             
-            # Process the edit
-            updated_md = update_markdown(edit)
-            
-            # Create new document version with updated content
-            await self.document_service.create_document_version(
-                doc_id=edit.document_id,
-                content=DocumentContentCreate(
-                    markdown_content=updated_md,
-                    language=edit.original_content.language or "en",
-                    name=edit.original_content.name,
-                    title=edit.original_content.title,
-                    path=edit.original_content.path
+            # Process the edit; refuse to write a version that silently lacks changes
+            patch = apply_document_edit(edit)
+            if not patch.ok:
+                return False, (
+                    f"{len(patch.conflicts)} of {len(patch.changes)} changes could not be applied: "
+                    f"{patch.conflict_summary()}"
                 )
-            )
-            return True, None
+            return await self.write_edited_version(edit, document, patch.content)
         except Exception as e:
             logger.error(f"Error processing edit for document {edit.document_id}: {str(e)}")
             return False, str(e)
 
+    def merge_onto_current(
+        self,
+        edit: DocumentEditWithOriginal,
+        updated_md: str,
+        current_version_id: str,
+        current_md: str,
+    ) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Three-way merge an edit made against ``edit.version`` onto the current
+        version. Returns ``(merged_markdown, None)`` or ``(None, error_message)``.
+        """
+        merge = three_way_merge(edit.original_content.markdown_content, updated_md, current_md)
+        if not merge.ok:
+            return None, (
+                f"Document {edit.document_id} changed since version {edit.version} "
+                f"and {len(merge.conflicts)} regions conflict: {merge.conflict_summary()}"
+            )
+        logger.info(
+            f"Merged edit for document {edit.document_id} from version "
+            f"{edit.version} onto {current_version_id}"
+        )
+        return merge.content, None
+
+    async def write_edited_version(
+        self, edit: DocumentEditWithOriginal, document: dict, updated_md: str
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        Write ``updated_md`` as a new version, guarded by a compare-and-swap on
+        the document's current version.
+
+        If the document moved past ``edit.version`` the edit is three-way merged
+        (base: the original content, ours: the patched content, theirs: the
+        current version) and retried; only overlapping changes fail the item.
+        """
+        merged_md = updated_md
+        for _ in range(VERSION_WRITE_ATTEMPTS):
+            current_version_id = language_head(document, edit.original_content.language)
+            if current_version_id and current_version_id != edit.version:
+                current = await self.content_repo.get_document_version(
+                    edit.document_id, current_version_id
+                )
+                merged_md, merge_error = self.merge_onto_current(
+                    edit, updated_md, current_version_id, current["markdown_content"]
+                )
+                if merge_error:
+                    return False, merge_error
+
+            try:
+                await self.document_service.create_document_version(
+                    doc_id=edit.document_id,
+                    content=DocumentContentCreate(
+                        markdown_content=merged_md,
+                        language=edit.original_content.language or "en",
+                        name=edit.original_content.name,
+                        title=edit.original_content.title,
+                        path=edit.original_content.path
+                    ),
+                    expected_version_id=current_version_id or None,
+                )
+                return True, None
+            except DocumentVersionConflictError:
+                # Another write won the race; merge against the new head
+                document = await self.doc_repo.get_document_by_id(edit.document_id)
+
+        return False, (
+            f"Document {edit.document_id} kept changing; gave up after "
+            f"{VERSION_WRITE_ATTEMPTS} attempts"
+        )
+
+    async def process_edits_batch(
+        self, edits: List[DocumentEditWithOriginal]
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """
+        Apply many edits with a fixed number of database round trips.
+
+        Target documents are prefetched in one query, stale bases are merged
+        against heads fetched in one query, enrichment runs in batches, and
+        every version insert and pointer move commits in one RPC. Items that
+        lose a compare-and-swap race inside that RPC fall back to
+        process_single_edit, which re-merges against the new head. Returns
+        ``(success, error_message)`` per edit, in order.
+        """
+        results: List[Optional[Tuple[bool, Optional[str]]]] = [None] * len(edits)
+
+        pending = []
+        for i, edit in enumerate(edits):
+            validation_error = self.validate_edit_item(edit)
+            if validation_error:
+                results[i] = (False, f"Validation error: {validation_error}")
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+
+        documents = {
+            str(doc["id"]): doc
+            for doc in await self.doc_repo.get_documents_by_ids(
+                [edits[i].document_id for i in pending]
+            )
+        }
+
+        # Patch against the original content; remember which bases are stale
+        patched = {}
+        heads = {}
+        for i in pending:
+            edit = edits[i]
+            document = documents.get(str(edit.document_id))
+            if document is None:
+                results[i] = (False, f"Document {edit.document_id} not found")
+                continue
+            if document.get("is_deleted", False):
+                results[i] = (False, f"Document {edit.document_id} is deleted and cannot be edited")
+                continue
+            patch = apply_document_edit(edit)
+            if not patch.ok:
+                results[i] = (False, (
+                    f"{len(patch.conflicts)} of {len(patch.changes)} changes could not be applied: "
+                    f"{patch.conflict_summary()}"
+                ))
+                continue
+            patched[i] = patch.content
+            heads[i] = language_head(document, edit.original_content.language) or None
+
+        stale = {heads[i] for i in patched if heads[i] and heads[i] != edits[i].version}
+        if stale:
+            current_versions = {
+                str(row["version"]): row
+                for row in await self.content_repo.get_versions_by_ids(list(stale))
+            }
+            for i in list(patched):
+                head = heads[i]
+                if not head or head == edits[i].version:
+                    continue
+                current = current_versions.get(str(head))
+                if current is None:
+                    results[i] = (False, f"Version {head} of document {edits[i].document_id} not found")
+                    del patched[i]
+                    continue
+                merged_md, merge_error = self.merge_onto_current(
+                    edits[i], patched[i], head, current["markdown_content"]
+                )
+                if merge_error:
+                    results[i] = (False, merge_error)
+                    del patched[i]
+                else:
+                    patched[i] = merged_md
+
+        order = list(patched)
+        if order:
+            enriched = await process_documents_content(
+                [(patched[i], edits[i].original_content.language or "en") for i in order]
+            )
+            outcomes = await self.content_repo.apply_versions([
+                {
+                    **processed,
+                    "document_id": edits[i].document_id,
+                    "expected_version_id": heads[i],
+                    "base_version": heads[i],
+                    "markdown_content": patched[i],
+                }
+                for i, processed in zip(order, enriched)
+            ])
+
+            languages = {i: processed.get("language") for i, processed in zip(order, enriched)}
+            lost_races = []
+            replaced = []
+            for i, outcome in zip(order, outcomes):
+                status = outcome.get("status")
+                if status == "applied":
+                    results[i] = (True, None)
+                    head = replaced_head(documents[str(edits[i].document_id)], languages[i])
+                    if head:
+                        replaced.append(head)
+                elif status == "conflict":
+                    lost_races.append(i)
+                else:
+                    results[i] = (False, f"Document {edits[i].document_id} not found")
+            if replaced:
+                await self.document_service.compact_versions(replaced)
+
+            if lost_races:
+                retried = await asyncio.gather(
+                    *(self.process_single_edit(edits[i]) for i in lost_races),
+                    return_exceptions=True,
+                )
+                for i, result in zip(lost_races, retried):
+                    results[i] = result
+
+        return results
+
+    async def create_generated_document(
+        self, doc: GeneratedDocument, parent_id: Optional[str] = None
+    ) -> str:
+        """
+        Create one document holding every language the generated document has
+        content for, enriched and inserted together. Returns the document ID.
+
+        ``parent_id`` overrides ``doc.parent_id`` when the parent was created
+        earlier in the same request.
+        """
+        contents = [
+            DocumentContentCreate(markdown_content=markdown_content, language=language)
+            for language, markdown_content in [("en", doc.markdown_content_en), ("ja", doc.markdown_content_ja)]
+            if markdown_content  # Only create if content exists
+        ]
+        new_doc = await self.document_service.create_multilingual_document(
+            document=DocumentCreate(
+                name=doc.name,
+                title=doc.title,
+                path=doc.path,
+                is_api_ref=doc.is_api_ref,
+                parent_id=parent_id or doc.parent_id or None
+            ),
+            contents=contents,
+        )
+        return new_doc["id"]
+
     async def process_single_create(self, doc: GeneratedDocument) -> Tuple[bool, Optional[str]]:
         """Process a single create item. Returns (success, error_message)."""
         try:
@@ -183,22 +633,7 @@ class EditService:
             if validation_error:
                 return False, f"Validation error: {validation_error}"
             
-            # Process both languages
-            for language, markdown_content in [("en", doc.markdown_content_en), ("ja", doc.markdown_content_ja)]:
-                if markdown_content:  # Only create if content exists
-                    await self.document_service.create_document(
-                        document=DocumentCreate(
-                            name=doc.name,
-                            title=doc.title,
-                            path=doc.path,
-                            is_api_ref=doc.is_api_ref,
-                            parent_id=doc.parent_id or None
-                        ),
-                        content=DocumentContentCreate(
-                            markdown_content=markdown_content,
-                            language=language,
-                        )
-                    )
+            await self.create_generated_document(doc)
             return True, None
         except Exception as e:
             logger.error(f"Error creating document {doc.name}: {str(e)}")
@@ -231,10 +666,162 @@ class EditService:
             logger.error(f"Error processing delete for document {doc.document_id}: {str(e)}")
             return False, str(e)
 
-    async def update_documentation(self, change_request: ChangeRequest) -> UpdateDocumentationResponse:
-        """Update documentation based on a change request. Processes items concurrently and returns detailed results including failures."""
+    async def run_change_graph(
+        self, change_request: ChangeRequest, recorded: Optional[Dict[str, Any]] = None
+    ) -> Tuple[list, list, list, Dict[int, str]]:
+        """
+        Run the items of a change request as a dependency graph.
+
+        Edits run as one batch node and each create and delete is its own node.
+        A create waits only for the create in the same request that is its
+        parent (see find_create_parents); everything else starts at once, with
+        at most CHANGE_APPLY_MAX_CONCURRENCY nodes running. Edits and creates
+        that target a document deleted by the same request are rejected
+        instead of racing the delete. Returns the edit, create and delete
+        results in item order, each a ``(success, error_message)`` tuple or
+        an exception, plus the IDs of the documents created keyed by create
+        index.
+
+        ``recorded`` holds results of items already applied under the same
+        idempotency key, keyed ``edit:<i>``, ``create:<i>`` or ``delete:<i>``.
+        Those items are not run again; a recorded create still resolves to its
+        document ID so children created now link to it.
+        """
+        recorded = recorded or {}
+        edit_items = change_request.edit or []
+        create_items = change_request.create or []
+        delete_items = change_request.delete or []
+        deleting = {str(doc.document_id) for doc in delete_items if doc.document_id}
+
+        edit_results: list = [None] * len(edit_items)
+        batch = []
+        for i, edit in enumerate(edit_items):
+            if f"edit:{i}" in recorded:
+                edit_results[i] = recorded[f"edit:{i}"]
+            elif str(edit.document_id) in deleting:
+                edit_results[i] = (False, f"Document {edit.document_id} is deleted by the same request")
+            else:
+                batch.append(i)
+
+        nodes: List[DagNode] = []
+        if batch:
+            async def run_edits(_):
+                return await self.process_edits_batch([edit_items[i] for i in batch])
+
+            nodes.append(DagNode(key="edit", run=run_edits))
+
+        parents = find_create_parents(create_items)
+        for i, doc in enumerate(create_items):
+            parent_key = f"create:{parents[i]}" if i in parents else None
+
+            async def run_create(prerequisites, i=i, doc=doc, parent_key=parent_key):
+                if f"create:{i}" in recorded:
+                    return recorded[f"create:{i}"]
+                validation_error = self.validate_create_item(doc)
+                if validation_error:
+                    raise ValidationError("create", validation_error)
+                if parent_key is None and doc.parent_id and str(doc.parent_id) in deleting:
+                    raise ValidationError(
+                        "parent_id", f"parent {doc.parent_id} is deleted by the same request"
+                    )
+                parent_id = prerequisites[parent_key] if parent_key else None
+                return await self.create_generated_document(doc, parent_id)
+
+            nodes.append(
+                DagNode(key=f"create:{i}", run=run_create, deps={parent_key} if parent_key else set())
+            )
+
+        for i, doc in enumerate(delete_items):
+            async def run_delete(_, i=i, doc=doc):
+                if f"delete:{i}" in recorded:
+                    return recorded[f"delete:{i}"]
+                return await self.process_single_delete(doc)
+
+            nodes.append(DagNode(key=f"delete:{i}", run=run_delete))
+
+        results = await run_dag(nodes, settings.CHANGE_APPLY_MAX_CONCURRENCY)
+
+        if batch:
+            batch_results = results["edit"]
+            if isinstance(batch_results, Exception):
+                logger.error(f"Batched edit apply failed: {batch_results}")
+                batch_results = [batch_results] * len(batch)
+            for i, result in zip(batch, batch_results):
+                edit_results[i] = result
+
+        create_results = []
+        created: Dict[int, str] = {}
+        for i, doc in enumerate(create_items):
+            result = results[f"create:{i}"]
+            if isinstance(result, Exception):
+                logger.error(f"Error creating document {doc.name}: {result}")
+                create_results.append((False, str(result)))
+            else:
+                create_results.append((True, None))
+                created[i] = result
+
+        delete_results = [results[f"delete:{i}"] for i in range(len(delete_items))]
+        return edit_results, create_results, delete_results, created
+
+    async def update_documentation(
+        self, change_request: ChangeRequest, idempotency_key: Optional[str] = None
+    ) -> UpdateDocumentationResponse:
+        """
+        Update documentation based on a change request. Processes items concurrently and returns detailed results including failures.
+
+        With an ``idempotency_key`` items that already succeeded under the key
+        are counted as successful without being applied again, so a replayed
+        request touches neither the database nor OpenAI for them. Requests
+        sharing a key run one at a time, and may only repeat the items of the
+        first one (IdempotencyKeyMismatchError otherwise).
+        """
         if not change_request.edit and not change_request.create and not change_request.delete:
             raise ValidationError("change_request", "No changes to apply")
+
+        if not idempotency_key:
+            return await self._apply_change_request(change_request)
+
+        async with idempotency_store.lock(idempotency_key):
+            await idempotency_store.claim_body(
+                idempotency_key,
+                {
+                    "edit": change_request.edit or [],
+                    "create": change_request.create or [],
+                    "delete": change_request.delete or [],
+                },
+            )
+            return await self._apply_change_request(change_request, idempotency_key)
+
+    async def _apply_change_request(
+        self, change_request: ChangeRequest, idempotency_key: Optional[str] = None
+    ) -> UpdateDocumentationResponse:
+        """Run a change request and aggregate the per-item results"""
+        item_kinds = {
+            "edit": change_request.edit or [],
+            "create": change_request.create or [],
+            "delete": change_request.delete or [],
+        }
+        recorded: Dict[str, Any] = {}
+        if idempotency_key:
+            for kind, items in item_kinds.items():
+                for i, item in enumerate(items):
+                    result = await idempotency_store.get_item(idempotency_key, kind, item)
+                    if result is not None:
+                        recorded[f"{kind}:{i}"] = result
+
+        # Every item starts as soon as its own prerequisites are done
+        edit_results, create_results, delete_results, created = await self.run_change_graph(
+            change_request, recorded
+        )
+
+        if idempotency_key:
+            # Only successes are recorded so failed items stay retryable
+            for kind, results in (("edit", edit_results), ("delete", delete_results)):
+                for item, result in zip(item_kinds[kind], results):
+                    if isinstance(result, tuple) and result[0]:
+                        await idempotency_store.record_item(idempotency_key, kind, item, result)
+            for i, document_id in created.items():
+                await idempotency_store.record_item(idempotency_key, "create", item_kinds["create"][i], document_id)
         
         # Initialize counters and lists
         successful = 0
@@ -244,14 +831,10 @@ class EditService:
         failed_delete_items: List[DocumentToDelete] = []
         errors: List[ProcessingError] = []
         
-        # Process edits concurrently
-        edit_tasks = []
+        # Collect edit results
         edit_items = change_request.edit or []
         
         if edit_items:
-            edit_tasks = [self.process_single_edit(edit) for edit in edit_items]
-            edit_results = await asyncio.gather(*edit_tasks, return_exceptions=True)
-            
             for i, result in enumerate(edit_results):
                 if isinstance(result, Exception):
                     failed += 1
@@ -273,14 +856,10 @@ class EditService:
                             error_type="ProcessingError"
                         ))
         
-        # Process creates concurrently
-        create_tasks = []
+        # Collect create results
         create_items = change_request.create or []
         
         if create_items:
-            create_tasks = [self.process_single_create(doc) for doc in create_items]
-            create_results = await asyncio.gather(*create_tasks, return_exceptions=True)
-            
             for i, result in enumerate(create_results):
                 if isinstance(result, Exception):
                     failed += 1
@@ -302,14 +881,10 @@ class EditService:
                             error_type="ProcessingError"
                         ))
         
-        # Process deletes concurrently
-        delete_tasks = []
+        # Collect delete results
         delete_items = change_request.delete or []
         
         if delete_items:
-            delete_tasks = [self.process_single_delete(doc) for doc in delete_items]
-            delete_results = await asyncio.gather(*delete_tasks, return_exceptions=True)
-            
             for i, result in enumerate(delete_results):
                 if isinstance(result, Exception):
                     failed += 1
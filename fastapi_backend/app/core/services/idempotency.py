@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, List, Optional
+
+from pydantic import BaseModel
+
+from app.config import settings
+from app.core.exceptions import IdempotencyKeyMismatchError
+from app.core.logging import CacheManager
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint(model: BaseModel) -> str:
+    """Stable hash of an item body"""
+    return hashlib.sha256(model.model_dump_json().encode()).hexdigest()
+
+
+class IdempotencyStore(ABC):
+    """
+    TTL store of item results recorded under a client's ``Idempotency-Key``.
+
+    Only items that succeeded are recorded, keyed by a fingerprint of the
+    item body, so a replayed request (or one resubmitting ``failed_items``)
+    skips the work already done while failed items are retried. The item
+    fingerprints of the first request under a key are kept too, and a later
+    request carrying anything else is refused. Values are stored as JSON so
+    backends only deal in strings.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+
+    @abstractmethod
+    def lock(self, key: str) -> AsyncContextManager[None]:
+        """Serialize requests that share a key so a replay waits for the original"""
+
+    @abstractmethod
+    async def _get(self, name: str) -> Optional[str]: ...
+
+    @abstractmethod
+    async def _set(self, name: str, value: str, only_new: bool = False) -> bool:
+        """Store ``value`` for ``ttl``; with ``only_new`` only if ``name`` is unset. True if stored"""
+
+    async def claim_body(self, key: str, items: Dict[str, List[BaseModel]]) -> None:
+        """
+        Record the items, by kind, of the first request sent with ``key``. A
+        later request may repeat them or send any subset; one with other items
+        raises IdempotencyKeyMismatchError.
+        """
+        body = sorted(
+            f"{kind}:{fingerprint(item)}" for kind, kind_items in items.items() for item in kind_items
+        )
+        if await self._set(f"{key}:body", json.dumps(body), only_new=True):
+            return
+        claimed = await self._get(f"{key}:body")
+        if claimed is not None and not set(body) <= set(json.loads(claimed)):
+            raise IdempotencyKeyMismatchError(key)
+
+    async def get_item(self, key: str, kind: str, item: BaseModel) -> Optional[Any]:
+        value = await self._get(f"{key}:{kind}:{fingerprint(item)}")
+        if value is None:
+            return None
+        result = json.loads(value)
+        # (success, error) tuples come back from JSON as lists
+        return tuple(result) if isinstance(result, list) else result
+
+    async def record_item(self, key: str, kind: str, item: BaseModel, result: Any) -> None:
+        await self._set(f"{key}:{kind}:{fingerprint(item)}", json.dumps(result, default=str))
+
+
+class InProcessIdempotencyStore(IdempotencyStore):
+    """Idempotency records of a single worker process"""
+
+    def __init__(self, ttl: int):
+        super().__init__(ttl)
+        self._cache = CacheManager(default_ttl=ttl)
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._holders: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._holders[key] = self._holders.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._holders[key] -= 1
+            if not self._holders[key]:
+                del self._holders[key]
+                del self._locks[key]
+
+    async def _get(self, name: str) -> Optional[str]:
+        return self._cache.get(name)
+
+    async def _set(self, name: str, value: str, only_new: bool = False) -> bool:
+        self._cache.purge_expired()
+        if only_new and self._cache.get(name) is not None:
+            return False
+        self._cache.set(name, value)
+        return True
+
+
+class RedisIdempotencyStore(IdempotencyStore):
+    """
+    Idempotency records in Redis, shared by every worker pointed at the same
+    server, so a retry landing on another worker still finds them. The
+    per-key lock is a Redis lock that expires after
+    IDEMPOTENCY_LOCK_TIMEOUT_SECONDS in case its holder dies. ``client`` is
+    a ``redis.asyncio`` client or anything with the same ``get``/``set``/
+    ``lock`` API.
+    """
+
+    def __init__(self, client, ttl: int, lock_timeout: float = settings.IDEMPOTENCY_LOCK_TIMEOUT_SECONDS):
+        super().__init__(ttl)
+        self._client = client
+        self.lock_timeout = lock_timeout
+
+    @classmethod
+    def from_url(cls, url: str, ttl: int) -> "RedisIdempotencyStore":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_BUS_URL points at Redis but the redis package is not installed") from e
+        return cls(redis.Redis.from_url(url), ttl)
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        async with self._client.lock(f"idempotency:{key}:lock", timeout=self.lock_timeout):
+            yield
+
+    async def _get(self, name: str) -> Optional[str]:
+        value = await self._client.get(f"idempotency:{name}")
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def _set(self, name: str, value: str, only_new: bool = False) -> bool:
+        return bool(await self._client.set(f"idempotency:{name}", value, ex=self.ttl, nx=only_new))
+
+
+def create_idempotency_store(url: Optional[str] = None) -> IdempotencyStore:
+    """Idempotency store on the backend of ``url`` (EVENT_BUS_URL by default)"""
+    url = url or settings.EVENT_BUS_URL
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        logger.info("Using Redis idempotency store")
+        return RedisIdempotencyStore.from_url(url, settings.IDEMPOTENCY_TTL_SECONDS)
+    return InProcessIdempotencyStore(ttl=settings.IDEMPOTENCY_TTL_SECONDS)
+
+
+# Shared store for update_documentation
+idempotency_store = create_idempotency_store()
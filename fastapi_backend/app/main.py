@@ -1,12 +1,26 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.utils import simple_generate_unique_route_id
 from app.routes.documents import router as documents_router
 from app.routes.edit_documentation import router as edit_documentation_router
-from app.routes.websocket import router as websocket_router
+from app.routes.websocket import manager as connection_manager, router as websocket_router
 from app.config import settings
 from app.api.middleware import setup_openai_config
+from app.api.compression import CompressionMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the connection reaper for the life of the app"""
+    reaper = asyncio.create_task(connection_manager.run_reaper())
+    try:
+        yield
+    finally:
+        reaper.cancel()
 
 
 def create_app() -> FastAPI:
@@ -14,6 +28,7 @@ def create_app() -> FastAPI:
     app = FastAPI(
         generate_unique_id_function=simple_generate_unique_route_id,
         openapi_url=settings.OPENAPI_URL,
+        lifespan=lifespan,
     )
 
     # Setup OpenAI configuration
@@ -28,6 +43,9 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    # zstd/brotli/gzip for JSON and markdown responses
+    app.add_middleware(CompressionMiddleware)
+
     # Include routes
     app.include_router(documents_router, prefix="/api/documents")
     app.include_router(edit_documentation_router, prefix="/api/edit")
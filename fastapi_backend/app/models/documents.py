@@ -1,4 +1,4 @@
-from typing import List, Optional, TYPE_CHECKING
+from typing import Dict, List, Literal, Optional, TYPE_CHECKING
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -19,6 +19,7 @@ class DocumentRead(DocumentBase):
     id: str
     created_at: datetime
     current_version_id: Optional[str] = None
+    language_versions: Optional[Dict[str, str]] = None
     is_deleted: bool = False
 
     class Config:
@@ -95,4 +96,52 @@ class GetAllDocumentsResponse(BaseModel):
         from_attributes = True
 
 
+class WordSegment(BaseModel):
+    """Part of a changed line"""
+
+    op: Literal["equal", "added", "removed"]
+    text: str
+
+
+class DiffLine(BaseModel):
+    op: Literal["context", "added", "removed"]
+    text: str
+    old_line: Optional[int] = None
+    """1-based line number in the old text, for context and removed lines."""
+    new_line: Optional[int] = None
+    """1-based line number in the new text, for context and added lines."""
+    segments: Optional[List[WordSegment]] = None
+    """Word-level changes against the paired line, when the pair is similar."""
+
+
+class DiffHunk(BaseModel):
+    """A run of changes with surrounding context, as in a unified diff"""
+
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    lines: List[DiffLine] = Field(default_factory=list)
+
+
+class DiffResult(BaseModel):
+    hunks: List[DiffHunk] = Field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+
+class DocumentDiffResponse(BaseModel):
+    """One page of hunks of the diff between two versions of a document"""
+
+    document_id: str
+    from_version: str
+    to_version: str
+    added: int
+    removed: int
+    total_hunks: int
+    hunk_offset: int
+    hunks: List[DiffHunk] = []
+    next_offset: Optional[int] = None  # Offset of the next page, if any
+
+
 DocumentWithContent.model_rebuild()
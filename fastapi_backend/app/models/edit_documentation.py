@@ -1,4 +1,4 @@
-from typing import List, Optional, TYPE_CHECKING
+from typing import Any, Dict, List, Literal, Optional, TYPE_CHECKING
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -78,6 +78,23 @@ class EditDocumentationResponse(BaseModel):
     )
 
 
+class EditJob(BaseModel):
+    """An edit_documentation request run in the background"""
+
+    job_id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    request: EditDocumentationRequest
+    result: Optional[EditDocumentationResponse] = Field(
+        default=None, description="Suggested changes, once the job has succeeded."
+    )
+    errors: List[Dict[str, Any]] = Field(
+        default_factory=list, description="Errors reported by parts of the run that failed."
+    )
+    error: Optional[str] = Field(default=None, description="Why the job failed, if it did.")
+    created_at: datetime
+    updated_at: datetime
+
+
 # Create OriginalContent model for storing original document content
 class OriginalContent(BaseModel):
     markdown_content: str
@@ -1,4 +1,4 @@
-from typing import Any, Literal, Union
+from typing import Any, Literal, NamedTuple, Optional, Tuple, Union
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -7,6 +7,7 @@ from app.services.agents.editor_agent import DocumentEdit
 from app.services.agents.create_content_agent import GeneratedDocument
 from app.services.agents.delete_content_agent import DocumentToDelete
 from app.services.agents.intent_detection_agent import Detected_Intent
+from app.models.edit_documentation import InLineEditResponse
 
 
 class BaseEvent(BaseModel):
@@ -70,6 +71,18 @@ class ProgressEvent(BaseEvent):
     payload: dict = Field(..., description="Progress information with current step and total steps")
 
 
+class ContentDeltaEvent(BaseEvent):
+    """Event emitted with text an agent has just written, before its output is complete"""
+    type: Literal["content_delta"] = "content_delta"
+    payload: dict = Field(..., description="The output field's JSON path and the text appended to it")
+
+
+class InlineEditCompletedEvent(BaseEvent):
+    """Event emitted when a streamed inline edit is complete"""
+    type: Literal["inline_edit_completed"] = "inline_edit_completed"
+    payload: InLineEditResponse
+
+
 # Union type for all possible events
 EditProgressEvent = Union[
     IntentDetectedEvent,
@@ -81,14 +94,62 @@ EditProgressEvent = Union[
     ErrorEvent,
     FinishedEvent,
     ProgressEvent,
+    ContentDeltaEvent,
+    InlineEditCompletedEvent,
 ]
 
 
+# Events kept out of the session's resume log. A resumed client gets their
+# content again in a later event (the created document or completed edit
+# holds all of the streamed text), and a long run of them would push out
+# the events it does need.
+UNLOGGED_EVENT_TYPES = frozenset({"content_delta"})
+
+
 class WebSocketMessage(BaseModel):
     """WebSocket message wrapper"""
     event: EditProgressEvent
+    seq: Optional[int] = Field(None, description="Position in the session's event log, for resuming")
     
     class Config:
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+
+
+def encode_message(event: EditProgressEvent, seq: Optional[int] = None) -> str:
+    """Wire form of an event, shared by the WebSocket and SSE transports"""
+    return WebSocketMessage(event=event, seq=seq).model_dump_json()
+
+
+class MessageHeader(NamedTuple):
+    """What the transports need to know about an encoded message, kept beside it"""
+    seq: Optional[int]
+    type: Optional[str]
+    final: bool = False
+    # "json" for JSON text, "msgpack" for MessagePack bytes held one
+    # character per byte
+    encoding: str = "json"
+
+
+def event_header(event: EditProgressEvent, seq: Optional[int] = None, encoding: str = "json") -> MessageHeader:
+    """Header of ``event`` encoded with ``seq``; final for the job's last event"""
+    final = event.type == "finished" or (event.type == "error" and bool(event.payload.get("fatal")))
+    return MessageHeader(seq, event.type, final, encoding)
+
+
+def frame_message(header: MessageHeader, message: str) -> str:
+    """
+    Bus form of an encoded message: one line of header, then the message.
+    Subscribers read the header with ``split_frame`` instead of parsing the
+    whole message, which can hold complete documents.
+    """
+    seq = "" if header.seq is None else header.seq
+    return f"{seq} {header.type or ''} {int(header.final)} {header.encoding}\n{message}"
+
+
+def split_frame(frame: str) -> Tuple[MessageHeader, str]:
+    """The header and encoded message of a ``frame_message`` frame"""
+    head, _, message = frame.partition("\n")
+    seq, event_type, final, encoding = head.split(" ")
+    return MessageHeader(int(seq) if seq else None, event_type or None, final == "1", encoding), message
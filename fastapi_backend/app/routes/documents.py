@@ -1,6 +1,8 @@
-from typing import List, Optional
+import json
+from typing import Iterator, List, Optional
 
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 
 from app.models.documents import (
     DocumentCreate,
@@ -9,6 +11,8 @@ from app.models.documents import (
     DocumentUpdate,
     DocumentContentCreate,
     DocumentContentRead,
+    DocumentDiffResponse,
+    DiffResult,
 )
 from app.core.services.document_service import DocumentService
 from app.core.exceptions import handle_service_exception
@@ -71,11 +75,59 @@ async def list_document_versions(
 async def get_document_version(
     doc_id: str,
     version_id: str,
+    language: Optional[str] = None,
     service: DocumentService = Depends(get_document_service),
 ):
-    """Get a specific version (optional: `latest` as alias)"""
+    """Get a specific version (optional: `latest` as alias, per `language`)"""
     try:
-        return await service.get_document_version(doc_id, version_id)
+        return await service.get_document_version(doc_id, version_id, language)
+    except Exception as e:
+        raise handle_service_exception(e)
+
+
+def _stream_diff(doc_id: str, from_id: str, to_id: str, diff: DiffResult, hunk_offset: int) -> Iterator[str]:
+    """NDJSON: a summary line, then one line per hunk"""
+    yield json.dumps({
+        "document_id": doc_id,
+        "from_version": from_id,
+        "to_version": to_id,
+        "added": diff.added,
+        "removed": diff.removed,
+        "total_hunks": len(diff.hunks),
+        "hunk_offset": hunk_offset,
+    }) + "\n"
+    for hunk in diff.hunks[hunk_offset:]:
+        yield hunk.model_dump_json(exclude_none=True) + "\n"
+
+
+@router.get("/{doc_id}/diff", response_model=DocumentDiffResponse)
+async def get_document_diff(
+    doc_id: str,
+    from_version: str = Query(..., alias="from"),
+    to_version: str = Query("latest", alias="to"),
+    language: Optional[str] = None,
+    hunk_offset: int = Query(0, ge=0),
+    hunk_limit: Optional[int] = Query(None, ge=1),
+    stream: bool = Query(False),
+    service: DocumentService = Depends(get_document_service),
+):
+    """
+    Line and word level diff between two versions (`latest` allowed, per `language`).
+    Hunks are paginated with `hunk_offset`/`hunk_limit`; `stream=true` streams every
+    hunk from `hunk_offset` on as NDJSON instead.
+    """
+    try:
+        if stream:
+            from_id, to_id, diff = await service.diff_versions(
+                doc_id, from_version, to_version, language
+            )
+            return StreamingResponse(
+                _stream_diff(doc_id, from_id, to_id, diff, hunk_offset),
+                media_type="application/x-ndjson",
+            )
+        return await service.get_document_diff(
+            doc_id, from_version, to_version, language, hunk_offset, hunk_limit
+        )
     except Exception as e:
         raise handle_service_exception(e)
 
@@ -133,10 +185,16 @@ async def update_document(
 async def create_document_version(
     doc_id: str,
     content: DocumentContentCreate,
+    base_version: Optional[str] = Query(None),
     service: DocumentService = Depends(get_document_service),
 ) -> DocumentContentRead:
-    """Create a new version for a document (and update latest version)"""
+    """
+    Create a new version for a document (and update latest version).
+    Pass ``base_version`` to fail with 409 if the document moved on since it was read.
+    """
     try:
-        return await service.create_document_version(doc_id, content)
+        return await service.create_document_version(
+            doc_id, content, expected_version_id=base_version
+        )
     except Exception as e:
         raise handle_service_exception(e)
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from app.models.edit_documentation import (
     EditDocumentationRequest,
     EditDocumentationResponse,
+    EditJob,
     ChangeRequest,
     UpdateDocumentationResponse,
     InLineEditRequest,
@@ -10,7 +15,10 @@ from app.models.edit_documentation import (
 )
 from app.core.services.edit_service import EditService, InlineEditService
 from app.core.exceptions import handle_service_exception
-from app.api.dependencies import get_edit_service, get_inline_edit_service
+from app.api.dependencies import client_address, get_edit_service, get_inline_edit_service
+from app.api.sse import SSE_HEADERS, SSEConnection, format_sse
+from app.models.websocket_events import encode_message, event_header
+from app.routes.websocket import manager, process_edit_request_with_streaming
 
 router = APIRouter(tags=["edit_documentation"])
 
@@ -31,20 +39,115 @@ async def edit_documentation(
         raise handle_service_exception(e)
 
 
+@router.post("/jobs", response_model=EditJob, status_code=202, summary="Submit Edit Job")
+async def submit_edit_job(
+    edit_request: EditDocumentationRequest,
+    response: Response,
+    service: EditService = Depends(get_edit_service),
+):
+    """
+    Start an edit in the background and return its job at once. Poll
+    GET /api/edit/jobs/{job_id} for its status and result.
+    """
+    try:
+        job = await service.submit_edit_job(edit_request)
+    except Exception as e:
+        raise handle_service_exception(e)
+    response.headers["Location"] = f"/api/edit/jobs/{job.job_id}"
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=EditJob, summary="Get Edit Job")
+async def get_edit_job(job_id: str, service: EditService = Depends(get_edit_service)):
+    """
+    Status of a submitted edit job, with its result once it has succeeded.
+    Jobs are kept for EDIT_JOB_TTL_SECONDS after their last update.
+    """
+    try:
+        return await service.get_edit_job(job_id)
+    except Exception as e:
+        raise handle_service_exception(e)
+
+
+async def _sse_response(session_id: str, connection: SSEConnection) -> StreamingResponse:
+    async def body():
+        try:
+            async for frame in connection.frames():
+                yield frame
+        finally:
+            # Leaves the job running for the resume grace period
+            await manager.disconnect(session_id, connection)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Session-ID": session_id},
+    )
+
+
+@router.post("/stream", summary="Stream Edit Documentation")
+async def stream_edit_documentation(
+    edit_request: EditDocumentationRequest,
+    request: Request,
+    session_id: Optional[str] = Header(None, alias="X-Session-ID"),
+    service: EditService = Depends(get_edit_service),
+) -> StreamingResponse:
+    """
+    Run an edit and stream its progress events as server-sent events, the
+    same events the /ws/edit-documentation socket sends. Each event's id is
+    its sequence number; the session id is returned in X-Session-ID.
+    """
+    session_id = session_id or str(uuid.uuid4())
+    connection = SSEConnection()
+    await manager.register(session_id, connection)
+    try:
+        await manager.start_job(
+            session_id,
+            process_edit_request_with_streaming(edit_request, session_id, service),
+            client_id=client_address(request),
+        )
+    except Exception as e:
+        await manager.disconnect(session_id, connection)
+        raise handle_service_exception(e)
+    return await _sse_response(session_id, connection)
+
+
+@router.get("/stream/{session_id}", summary="Resume Edit Stream")
+async def resume_edit_stream(
+    session_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    last_event_id_param: Optional[int] = Query(None, alias="last_event_id"),
+) -> StreamingResponse:
+    """
+    Reattach to a session's edit job after a dropped stream, replaying the
+    events after Last-Event-ID (or the last_event_id parameter) before the
+    live ones.
+    """
+    after_seq = last_event_id if last_event_id is not None else last_event_id_param
+    connection = SSEConnection()
+    if not await manager.resume(session_id, connection, after_seq or 0):
+        await manager.disconnect(session_id, connection)
+        raise HTTPException(status_code=404, detail=f"No edit job to resume for session {session_id}")
+    return await _sse_response(session_id, connection)
+
+
 @router.post(
     "/update_documentation",
     response_model=UpdateDocumentationResponse,
     summary="Update Documentation",
 )
 async def update_documentation(
-    change_request: ChangeRequest, service: EditService = Depends(get_edit_service)
+    change_request: ChangeRequest,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    service: EditService = Depends(get_edit_service),
 ) -> UpdateDocumentationResponse:
     """
     Endpoint to update documentation based on a change request.
     Processes items concurrently and returns detailed results including failures.
+    Retries sent with the same Idempotency-Key skip items that already succeeded.
     """
     try:
-        return await service.update_documentation(change_request)
+        return await service.update_documentation(change_request, idempotency_key=idempotency_key)
     except Exception as e:
         raise handle_service_exception(e)
 
@@ -63,4 +166,25 @@ async def inline_edit(
         
         return await service.inline_edit(edit_request)
     except Exception as e:
-        raise handle_service_exception(e)
\ No newline at end of file
+        raise handle_service_exception(e)
+
+
+@router.post("/inline_edit/stream", summary="Stream Inline Edit")
+async def inline_edit_stream(
+    edit_request: InLineEditRequest,
+    session_id: Optional[str] = Header(None, alias="X-Session-ID"),
+    service: InlineEditService = Depends(get_inline_edit_service),
+):
+    """
+    Inline edit as server-sent events: ``content_delta`` events carry the
+    edited text as the model writes it, and the stream ends with an
+    ``inline_edit_completed`` event holding the same response as
+    POST /api/edit/inline_edit, or a fatal ``error`` event.
+    """
+    session_id = session_id or str(uuid.uuid4())
+
+    async def frames():
+        async for event in service.inline_edit_stream(edit_request, session_id):
+            yield format_sse(encode_message(event), event_header(event))
+
+    return StreamingResponse(frames(), media_type="text/event-stream", headers=SSE_HEADERS)
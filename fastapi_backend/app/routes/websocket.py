@@ -1,67 +1,475 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
-from typing import Dict, Set
+from collections import Counter
+from typing import Any, Coroutine, Dict, Optional, Set
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from fastapi.websockets import WebSocketState
 
 from app.models.edit_documentation import EditDocumentationRequest
 from app.models.websocket_events import (
-    WebSocketMessage,
     ErrorEvent,
     FinishedEvent,
+    UNLOGGED_EVENT_TYPES,
+    encode_message,
+    event_header,
+    frame_message,
+    split_frame,
 )
-from app.core.services.edit_service import EditService
-from app.api.dependencies import get_edit_service
-from app.core.exceptions import handle_service_exception
+from app.core.services.edit_service import EditService, edit_flights
+from app.api.dependencies import client_address, get_edit_service
+from app.api.subprotocols import (
+    MSGPACK_SUBPROTOCOL,
+    MessagePackWebSocket,
+    message_text,
+    negotiate_subprotocol,
+    pack_message,
+)
+from app.core.exceptions import TooManyJobsError, handle_service_exception
+from app.core.event_bus import EventBus, Subscription, event_bus
+from app.core.logging import PerformanceLogger
+from app.services.shared.admission import edit_admission
+from app.services.shared.event_log import SessionEventLog
+from app.services.shared.outbox import SessionOutbox, SlowConsumerError
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
+# Close code asking a client that fell behind to reconnect later
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close codes for a socket whose session moved to another socket, and for
+# one reaped for being idle
+SESSION_TAKEN_OVER_CLOSE_CODE = 4409
+IDLE_CLOSE_CODE = 1001
+
+# Published on a session's events channel ahead of a replay, with the
+# sequence number of the first replayed event
+REPLAY_MARKER = "replay:"
+
+
 # Connection manager to track active WebSocket connections
 class ConnectionManager:
-    def __init__(self):
+    """
+    Sockets held by this process, with session events routed through the
+    event bus: events published by an edit job on any worker reach the
+    socket on whichever worker holds it, and a job can be cancelled from any
+    worker.
+
+    Events for a socket go through a bounded SessionOutbox drained by a
+    writer task, so a slow client never holds up the bus or the job, and
+    queued progress events are coalesced.
+
+    The worker running a job numbers the job's events in a SessionEventLog.
+    When the job's last socket goes away the job keeps running for
+    WS_RESUME_GRACE_SECONDS; a client reconnecting in that time (or within
+    that time after the job ended) resumes from the last sequence number it
+    saw and gets the events it missed.
+
+    Jobs are capped per worker by MAX_EDIT_JOBS and per client address
+    (``client_address``, which honours TRUSTED_PROXY_HOPS) by
+    MAX_EDIT_JOBS_PER_CLIENT, and ``run_reaper`` closes connections that
+    have gone away or sat idle without a job.
+    """
+
+    def __init__(self, bus: EventBus = event_bus):
+        self.bus = bus
         self.active_connections: Dict[str, WebSocket] = {}
         self.session_tasks: Dict[str, asyncio.Task] = {}
+        self.event_logs: Dict[str, SessionEventLog] = {}
+        self.outboxes: Dict[str, SessionOutbox] = {}
+        self.attachments: Dict[str, str] = {}
+        self.job_clients: Dict[str, Optional[str]] = {}
+        self.job_encodings: Dict[str, str] = {}
+        self.last_activity: Dict[str, float] = {}
+        self._forwarders: Dict[str, asyncio.Task] = {}
+        self._resuming: Set[str] = set()
+        self.perf_logger = PerformanceLogger("websocket")
+
+    @staticmethod
+    def events_channel(session_id: str) -> str:
+        return f"ws:{session_id}:events"
+
+    @staticmethod
+    def control_channel(session_id: str) -> str:
+        return f"ws:{session_id}:control"
 
     async def connect(self, websocket: WebSocket, session_id: str):
         """Accept WebSocket connection and store it"""
         await websocket.accept()
-        self.active_connections[session_id] = websocket
+        await self.register(session_id, websocket)
         logger.info(f"WebSocket connected for session: {session_id}")
 
-    def disconnect(self, session_id: str):
-        """Remove WebSocket connection"""
-        if session_id in self.active_connections:
-            del self.active_connections[session_id]
-            
-        # Cancel any running task for this session
-        if session_id in self.session_tasks:
-            task = self.session_tasks[session_id]
-            if not task.done():
-                task.cancel()
-            del self.session_tasks[session_id]
-            
-        logger.info(f"WebSocket disconnected for session: {session_id}")
+    async def register(self, session_id: str, websocket: WebSocket, resume_from: Optional[int] = None):
+        """
+        Forward the session's events from the bus to ``websocket``. With
+        ``resume_from``, nothing is forwarded until the replay of the events
+        after that sequence number arrives.
+        """
+        if (
+            self.active_connections.get(session_id) is websocket
+            and resume_from is None
+            and session_id not in self._resuming
+        ):
+            return
+        current = self.active_connections.get(session_id)
+        if current is not None and current is not websocket:
+            await self._take_over(session_id, current)
+        self._stop_forwarding(session_id)
+        subscription = await self.bus.subscribe(self.events_channel(session_id))
+        outbox = SessionOutbox(settings.WS_SEND_QUEUE_SIZE, settings.WS_SLOW_CONSUMER_POLICY)
+        attachment = uuid.uuid4().hex
+        self.active_connections[session_id] = websocket
+        self.outboxes[session_id] = outbox
+        self.attachments[session_id] = attachment
+        self.touch(session_id)
+        if resume_from is not None:
+            self._resuming.add(session_id)
+        self._forwarders[session_id] = asyncio.create_task(
+            self._forward(session_id, websocket, subscription, outbox, attachment, resume_from)
+        )
+
+    async def _take_over(self, session_id: str, previous: WebSocket):
+        """Detach and close the socket a session is moving away from"""
+        logger.warning(f"Session {session_id} moved to a new connection, closing the previous one")
+        await self._detach(session_id, self.attachments.get(session_id))
+        if previous.client_state == WebSocketState.CONNECTED:
+            try:
+                await previous.close(code=SESSION_TAKEN_OVER_CLOSE_CODE)
+            except Exception as e:
+                logger.error(f"Error closing previous WebSocket for session {session_id}: {e}")
 
-    async def send_event(self, session_id: str, event):
-        """Send event to specific WebSocket connection"""
-        if session_id in self.active_connections:
-            websocket = self.active_connections[session_id]
+    def touch(self, session_id: str):
+        """Record activity on the session's connection"""
+        self.last_activity[session_id] = time.monotonic()
+
+    async def _forward(
+        self,
+        session_id: str,
+        websocket: WebSocket,
+        subscription: Subscription,
+        outbox: SessionOutbox,
+        attachment: str,
+        resume_from: Optional[int] = None,
+    ):
+        """
+        Queue the session's events from the bus while a writer task sends
+        them. If this ends on its own (the socket went away, or the client
+        fell too far behind) the session is detached as on disconnect.
+        """
+        started = time.monotonic()
+        forwarder = asyncio.current_task()
+        writer = asyncio.create_task(self._write(session_id, websocket, outbox, self.touch))
+        # A writer that stopped (socket gone) ends the subscription too
+        writer.add_done_callback(lambda task: task.cancelled() or forwarder.cancel())
+        last_seq = resume_from
+        resuming = resume_from is not None
+        try:
+            async for message in subscription:
+                if message.startswith(REPLAY_MARKER):
+                    if resuming:
+                        last_seq = int(message[len(REPLAY_MARKER):]) - 1
+                        resuming = False
+                        self._resuming.discard(session_id)
+                    continue
+                if resuming:
+                    continue
+                header, message = split_frame(message)
+                seq = header.seq
+                if seq is not None:
+                    # Skip events already sent, replayed for another client
+                    if last_seq is not None and seq <= last_seq:
+                        continue
+                    last_seq = seq
+                outbox.put(message, header.type, header)
+        except SlowConsumerError as e:
+            logger.warning(f"Closing slow WebSocket for session {session_id}: {e}")
             try:
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    message = WebSocketMessage(event=event)
-                    await websocket.send_text(message.model_dump_json())
+                await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+            except Exception as close_error:
+                logger.error(f"Error closing WebSocket for session {session_id}: {close_error}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error forwarding events to session {session_id}: {e}")
+        finally:
+            writer.cancel()
+            await asyncio.gather(writer, return_exceptions=True)
+            await subscription.close()
+            # A forwarder stopped by register or disconnect is no longer listed
+            if self._forwarders.get(session_id) is forwarder:
+                await self._detach(session_id, attachment)
+            self.perf_logger.log_operation(
+                "websocket_session", time.monotonic() - started, session_id=session_id, **outbox.snapshot()
+            )
+
+    @staticmethod
+    async def _write(session_id: str, websocket: WebSocket, outbox: SessionOutbox, touch):
+        """
+        Send queued messages one at a time, recording queue-to-wire latency.
+        A connection with a ``send_message`` method (SSEConnection,
+        MessagePackWebSocket) gets each message's header with it; others get
+        JSON text.
+        """
+        send_message = getattr(websocket, "send_message", None)
+        while True:
+            message, header, enqueued_at = await outbox.get()
+            if websocket.client_state != WebSocketState.CONNECTED:
+                logger.warning(f"WebSocket not connected for session: {session_id}")
+                return
+            try:
+                if send_message is not None:
+                    await send_message(message, header)
                 else:
-                    logger.warning(f"WebSocket not connected for session: {session_id}")
+                    await websocket.send_text(message_text(message, header))
             except Exception as e:
                 logger.error(f"Error sending message to session {session_id}: {e}")
-                self.disconnect(session_id)
+                return
+            outbox.stats.record_send(time.monotonic() - enqueued_at)
+            touch(session_id)
+
+    def _stop_forwarding(self, session_id: str):
+        forwarder = self._forwarders.pop(session_id, None)
+        if forwarder and not forwarder.done() and forwarder is not asyncio.current_task():
+            forwarder.cancel()
+        self.active_connections.pop(session_id, None)
+        self.outboxes.pop(session_id, None)
+        self.last_activity.pop(session_id, None)
+        self._resuming.discard(session_id)
+
+    async def disconnect(self, session_id: str, websocket: Optional[WebSocket] = None):
+        """
+        Remove the session's WebSocket connection (only if it is still
+        ``websocket``, when given). The session's job keeps running for the
+        grace period in case the client comes back.
+        """
+        if websocket is not None and self.active_connections.get(session_id) is not websocket:
+            # Taken over by another socket, or already detached when its
+            # forwarder stopped
+            return
+        await self._detach(session_id, self.attachments.get(session_id))
+
+    async def _detach(self, session_id: str, attachment: Optional[str]) -> bool:
+        """
+        Drop the connection that ``attachment`` identifies and tell the
+        session's job, which starts its grace period once no client is
+        attached. Does nothing if the session has moved on to another
+        attachment, so each one is detached once.
+        """
+        if attachment is None or self.attachments.get(session_id) != attachment:
+            return False
+        del self.attachments[session_id]
+        self._stop_forwarding(session_id)
+        await self._control(session_id, f"detach:{attachment}")
+        logger.info(f"WebSocket disconnected for session: {session_id}")
+        return True
+
+    async def resume(self, session_id: str, websocket: WebSocket, after_seq: int) -> bool:
+        """
+        Attach ``websocket`` to the session's job, wherever it runs, and
+        replay the events after ``after_seq``. False when no worker has a
+        job (running or recently finished) for the session.
+        """
+        await self.register(session_id, websocket, resume_from=after_seq)
+        attachment = self.attachments[session_id]
+        encoding = getattr(websocket, "encoding", "json")
+        if await self._control(session_id, f"resume:{attachment}:{after_seq}:{encoding}"):
+            return True
+        # Nothing will be replayed; forward new events as they come
+        await self.register(session_id, websocket)
+        return False
+
+    async def _control(self, session_id: str, message: str) -> int:
+        try:
+            return await self.bus.publish(self.control_channel(session_id), message)
+        except Exception as e:
+            logger.error(f"Error sending {message.split(':')[0]} for session {session_id}: {e}")
+            return 0
+
+    async def cancel_job(self, session_id: str):
+        """Cancel the session's running job on any worker"""
+        await self._control(session_id, "cancel")
+        task = self.session_tasks.pop(session_id, None)
+        self.job_clients.pop(session_id, None)
+        self.job_encodings.pop(session_id, None)
+        if task and not task.done():
+            task.cancel()
+
+    def _admit(self, session_id: str, client_id: Optional[str]):
+        """Raise TooManyJobsError if another job would exceed the caps"""
+        others = {sid: client for sid, client in self.job_clients.items() if sid != session_id}
+        if len(others) >= settings.MAX_EDIT_JOBS:
+            raise TooManyJobsError(settings.MAX_EDIT_JOBS, "server")
+        if client_id is not None and sum(
+            1 for client in others.values() if client == client_id
+        ) >= settings.MAX_EDIT_JOBS_PER_CLIENT:
+            raise TooManyJobsError(settings.MAX_EDIT_JOBS_PER_CLIENT, "client")
+
+    async def start_job(
+        self, session_id: str, job: Coroutine, client_id: Optional[str] = None
+    ) -> asyncio.Task:
+        """
+        Run ``job`` for the session, replacing any job it already has.
+        Raises TooManyJobsError (and closes ``job``) when the caps are reached.
+        """
+        try:
+            self._admit(session_id, client_id)
+        except TooManyJobsError:
+            job.close()
+            raise
+        await self.cancel_job(session_id)
+        control = await self.bus.subscribe(self.control_channel(session_id))
+        previous = self.event_logs.get(session_id)
+        log = SessionEventLog(settings.WS_EVENT_LOG_SIZE, start=previous.last_seq if previous else 0)
+        self.event_logs[session_id] = log
+        attached = {self.attachments[session_id]} if session_id in self.attachments else set()
+        task = asyncio.create_task(job)
+        watcher = asyncio.create_task(self._watch_control(session_id, task, control, log, attached))
+        self.session_tasks[session_id] = task
+        self.job_clients[session_id] = client_id
+        # Publish in the encoding of the socket the job reports to
+        self.job_encodings[session_id] = getattr(self.active_connections.get(session_id), "encoding", "json")
+
+        def finished(_):
+            if self.session_tasks.get(session_id) is task:
+                del self.session_tasks[session_id]
+                del self.job_clients[session_id]
+                del self.job_encodings[session_id]
+            # Keep serving resumes for a while so a client that dropped near
+            # the end still gets the final events
+            asyncio.get_running_loop().call_later(settings.WS_RESUME_GRACE_SECONDS, watcher.cancel)
+
+        task.add_done_callback(finished)
+        return task
+
+    async def _watch_control(
+        self,
+        session_id: str,
+        task: asyncio.Task,
+        control: Subscription,
+        log: SessionEventLog,
+        attached: Set[str],
+    ):
+        """Handle cancel, detach and resume requests for a job"""
+        grace: Optional[asyncio.TimerHandle] = None
+        try:
+            async for message in control:
+                command, _, argument = message.partition(":")
+                if command == "cancel":
+                    task.cancel()
+                    break
+                if command == "detach":
+                    attached.discard(argument)
+                    if not attached and not task.done() and grace is None:
+                        logger.info(f"No client for session {session_id}, cancelling its job in "
+                                    f"{settings.WS_RESUME_GRACE_SECONDS}s unless one resumes")
+                        grace = asyncio.get_running_loop().call_later(
+                            settings.WS_RESUME_GRACE_SECONDS, task.cancel
+                        )
+                elif command == "resume":
+                    attachment, _, rest = argument.partition(":")
+                    after_seq, _, encoding = rest.partition(":")
+                    attached.add(attachment)
+                    if self.session_tasks.get(session_id) is task:
+                        self.job_encodings[session_id] = encoding or "json"
+                    if grace is not None:
+                        grace.cancel()
+                        grace = None
+                    await self._replay(session_id, log, int(after_seq))
+        finally:
+            if grace is not None:
+                grace.cancel()
+            await control.close()
+            if self.event_logs.get(session_id) is log:
+                del self.event_logs[session_id]
+
+    async def _replay(self, session_id: str, log: SessionEventLog, after_seq: int):
+        """Publish the logged events after ``after_seq``, preceded by a replay marker"""
+        channel = self.events_channel(session_id)
+        async with log.lock:
+            entries = log.since(after_seq)
+            first_seq = entries[0][0] if entries else log.next_seq
+            await self.bus.publish(channel, f"{REPLAY_MARKER}{first_seq}")
+            for _, message in entries:
+                await self.bus.publish(channel, message)
+
+    @staticmethod
+    def _frame(event, seq: Optional[int] = None, encoding: str = "json") -> str:
+        """
+        Bus frame of ``event``: its encoded message behind a header line.
+        MessagePack sessions get the event packed from the model, so it is
+        never encoded as JSON only to be decoded again.
+        """
+        header = event_header(event, seq, encoding)
+        if encoding == "msgpack":
+            return frame_message(header, pack_message(event, seq))
+        return frame_message(header, encode_message(event, seq=seq))
+
+    async def send_event(self, session_id: str, event) -> bool:
+        """Publish an event to the session's socket; False when no socket received it"""
+        channel = self.events_channel(session_id)
+        log = self.event_logs.get(session_id)
+        try:
+            encoding = self.job_encodings.get(session_id, "json")
+            if log is None:
+                return await self.bus.publish(channel, self._frame(event, encoding=encoding)) > 0
+            async with log.lock:
+                if event.type in UNLOGGED_EVENT_TYPES:
+                    return await self.bus.publish(channel, self._frame(event, encoding=encoding)) > 0
+                frame = self._frame(event, seq=log.next_seq, encoding=encoding)
+                log.append(frame)
+                return await self.bus.publish(channel, frame) > 0
+        except Exception as e:
+            logger.error(f"Error sending message to session {session_id}: {e}")
+            return False
+
+    async def reap(self) -> int:
+        """Close connections that have gone away or idled past WS_IDLE_TIMEOUT_SECONDS without a job"""
+        now = time.monotonic()
+        reaped = 0
+        for session_id, websocket in list(self.active_connections.items()):
+            if websocket.client_state == WebSocketState.CONNECTED:
+                idle = now - self.last_activity.get(session_id, now)
+                if session_id in self.session_tasks or idle < settings.WS_IDLE_TIMEOUT_SECONDS:
+                    continue
+                logger.info(f"Closing WebSocket for session {session_id} after {idle:.0f}s idle")
+                try:
+                    await websocket.close(code=IDLE_CLOSE_CODE)
+                except Exception as e:
+                    logger.error(f"Error closing idle WebSocket for session {session_id}: {e}")
+            await self.disconnect(session_id, websocket)
+            reaped += 1
+        return reaped
+
+    async def run_reaper(self, interval: Optional[float] = None):
+        """Reap connections every ``interval`` seconds until cancelled"""
+        interval = interval or settings.WS_REAP_INTERVAL_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                reaped = await self.reap()
+                if reaped:
+                    logger.info(f"Reaped {reaped} WebSocket connections")
+            except Exception as e:
+                logger.error(f"Error reaping WebSocket connections: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection, job and buffer figures for this process, with send queue stats per session"""
+        return {
+            "connections": len(self.active_connections),
+            "jobs": len(self.session_tasks),
+            "jobs_per_client": dict(Counter(client for client in self.job_clients.values() if client)),
+            "event_logs": len(self.event_logs),
+            "buffered_bytes": sum(log.size_bytes for log in self.event_logs.values())
+            + sum(outbox.size_bytes for outbox in self.outboxes.values()),
+            "sessions": {session_id: outbox.snapshot() for session_id, outbox in self.outboxes.items()},
+        }
 
     def is_connected(self, session_id: str) -> bool:
-        """Check if session is still connected"""
+        """Check if session is still connected to this process"""
         return (session_id in self.active_connections and 
                 self.active_connections[session_id].client_state == WebSocketState.CONNECTED)
 
@@ -78,45 +486,51 @@ async def process_edit_request_with_streaming(
     try:
         # Use the streaming version of the edit service
         async for event in edit_service.edit_documentation_stream(edit_request, session_id):
-            if manager.is_connected(session_id):
-                await manager.send_event(session_id, event)
-            else:
-                logger.info(f"Session {session_id} disconnected, stopping processing")
-                break
-                
+            # Undelivered events stay in the session's log for a resuming client
+            await manager.send_event(session_id, event)
+
         # Send final completion event
-        if manager.is_connected(session_id):
-            finished_event = FinishedEvent(
-                event_id=str(uuid.uuid4()),
-                session_id=session_id,
-                payload={"message": "Edit documentation process completed successfully"}
-            )
-            await manager.send_event(session_id, finished_event)
-            
+        finished_event = FinishedEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            payload={"message": "Edit documentation process completed successfully"}
+        )
+        await manager.send_event(session_id, finished_event)
+
     except asyncio.CancelledError:
         logger.info(f"Edit processing cancelled for session: {session_id}")
-        if manager.is_connected(session_id):
-            error_event = ErrorEvent(
-                event_id=str(uuid.uuid4()),
-                session_id=session_id,
-                payload={
-                    "message": "Processing was cancelled",
-                    "error_type": "CancelledError"
-                }
-            )
-            await manager.send_event(session_id, error_event)
+        error_event = ErrorEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            payload={
+                "message": "Processing was cancelled",
+                "error_type": "CancelledError",
+                "fatal": True,
+            }
+        )
+        await manager.send_event(session_id, error_event)
     except Exception as e:
         logger.error(f"Error in edit processing for session {session_id}: {e}")
-        if manager.is_connected(session_id):
-            error_event = ErrorEvent(
-                event_id=str(uuid.uuid4()),
-                session_id=session_id,
-                payload={
-                    "message": str(e),
-                    "error_type": type(e).__name__
-                }
-            )
-            await manager.send_event(session_id, error_event)
+        error_event = ErrorEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            payload={
+                "message": str(e),
+                "error_type": type(e).__name__,
+                "fatal": True,
+            }
+        )
+        await manager.send_event(session_id, error_event)
+
+
+@router.get("/sessions", summary="Session Stats")
+async def session_stats():
+    """Live connection and job counts, buffered event bytes and edit admission load on this worker"""
+    return {
+        **manager.stats(),
+        "admission": edit_admission.stats(),
+        "single_flight": edit_flights.stats(),
+    }
 
 
 @router.websocket("/edit-documentation")
@@ -135,25 +549,53 @@ async def websocket_edit_documentation(
             "document_id": "optional-document-id"
         }
     }
+
+    After a dropped connection, resume the session's job with the ``seq`` of
+    the last event received (0 for all retained events):
+    {
+        "session_id": "unique-session-id",
+        "resume_from": 42
+    }
+
+    Events are JSON text frames unless the client offers the
+    ``docsync.msgpack`` subprotocol (and msgpack is installed), in which case
+    they are MessagePack binary frames with the same schema. Requests are
+    JSON text either way.
     """
     session_id = None
     try:
-        await websocket.accept()
-        logger.info("WebSocket connection accepted")
+        subprotocol = negotiate_subprotocol(websocket.scope.get("subprotocols", []))
+        client_id = client_address(websocket)
+        await websocket.accept(subprotocol=subprotocol)
+        if subprotocol == MSGPACK_SUBPROTOCOL:
+            websocket = MessagePackWebSocket(websocket)
+        logger.info(f"WebSocket connection accepted ({subprotocol or 'json'})")
         
         while True:
             # Receive message from client
             data = await websocket.receive_text()
+            if session_id:
+                manager.touch(session_id)
             try:
                 message = json.loads(data)
                 session_id = message.get("session_id")
                 edit_request_data = message.get("edit_request")
+                resume_from = message.get("resume_from")
                 
                 if not session_id:
                     await websocket.send_text(json.dumps({
                         "error": "session_id is required"
                     }))
                     continue
+
+                if resume_from is not None and not edit_request_data:
+                    if not await manager.resume(session_id, websocket, int(resume_from)):
+                        await websocket.send_text(json.dumps({
+                            "error": "No job to resume for this session"
+                        }))
+                    else:
+                        logger.info(f"Resumed session {session_id} after event {resume_from}")
+                    continue
                     
                 if not edit_request_data:
                     await websocket.send_text(json.dumps({
@@ -161,26 +603,25 @@ async def websocket_edit_documentation(
                     }))
                     continue
                 
-                # Store the connection
-                manager.active_connections[session_id] = websocket
-                
                 # Parse edit request
                 edit_request = EditDocumentationRequest(**edit_request_data)
-                
-                # Cancel any existing task for this session
-                if session_id in manager.session_tasks:
-                    old_task = manager.session_tasks[session_id]
-                    if not old_task.done():
-                        old_task.cancel()
-                
-                # Start processing in background task
-                task = asyncio.create_task(
-                    process_edit_request_with_streaming(edit_request, session_id, edit_service)
+
+                # Route the session's events to this socket
+                await manager.register(session_id, websocket)
+
+                # Start processing in background task, replacing any running job
+                await manager.start_job(
+                    session_id,
+                    process_edit_request_with_streaming(edit_request, session_id, edit_service),
+                    client_id=client_id,
                 )
-                manager.session_tasks[session_id] = task
                 
                 logger.info(f"Started edit processing for session: {session_id}")
                 
+            except TooManyJobsError as e:
+                await websocket.send_text(json.dumps({
+                    "error": str(e)
+                }))
             except json.JSONDecodeError:
                 await websocket.send_text(json.dumps({
                     "error": "Invalid JSON format"
@@ -197,4 +638,4 @@ async def websocket_edit_documentation(
         logger.error(f"WebSocket error: {e}")
     finally:
         if session_id:
-            manager.disconnect(session_id)
\ No newline at end of file
+            await manager.disconnect(session_id, websocket)
\ No newline at end of file
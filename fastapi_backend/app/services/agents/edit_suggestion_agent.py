@@ -37,6 +37,8 @@ class EditSuggestion(BaseModel):
     """Indicates if the document is an API reference document."""
     path: str
     """The path to the document."""
+    priority: Literal["high", "medium", "low"] = "medium"
+    """How important the edit is: "high" for incorrect or breaking content, "medium" for missing or outdated content, "low" for cosmetic improvements."""
 
 
 class EditAgentResponse(BaseModel):
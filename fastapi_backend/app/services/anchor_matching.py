@@ -0,0 +1,143 @@
+import re
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel
+
+# Whitespace and <br> artifacts collapse to a single space. A run that ends in
+# a newline followed by a list marker becomes " - " so "*", "+", "-" and
+# "1." bullets all compare equal.
+_TOKEN_PATTERN = re.compile(
+    r"(?P<list>(?P<lead>(?:^|(?:\s|<br\s*/?>)*\n)[ \t]*)(?P<marker>[*+-]|\d+[.)])(?P<gap>[ \t]+))"
+    r"|(?P<space>(?:\s|<br\s*/?>)+)"
+    r"|(?P<quote>[‘’‚‛“”„‟])"
+)
+
+_QUOTES = {
+    "‘": "'",
+    "’": "'",
+    "‚": "'",
+    "‛": "'",
+    "“": '"',
+    "”": '"',
+    "„": '"',
+    "‟": '"',
+}
+_QUOTE_TABLE = str.maketrans(_QUOTES)
+
+
+class NormalizedText:
+    """
+    Markdown normalized for tolerant matching, with a map from every
+    normalized character back to the raw span it came from.
+    """
+
+    def __init__(self, raw: str):
+        self.raw = raw
+        pieces: List[str] = []
+        starts: List[int] = []
+        ends: List[int] = []
+        markers: List[Tuple[int, int]] = []
+
+        position = 0
+        for match in _TOKEN_PATTERN.finditer(raw):
+            if match.start() > position:
+                # Ordinary characters map one to one
+                pieces.append(raw[position : match.start()])
+                starts.extend(range(position, match.start()))
+                ends.extend(range(position + 1, match.start() + 1))
+
+            if match.group("list") is not None:
+                # Map the separator, marker and gap to their own raw spans so a
+                # match starting at the marker keeps the preceding newline
+                spans = [("-", "marker"), (" ", "gap")]
+                if "\n" in match.group("lead"):
+                    spans.insert(0, (" ", "lead"))
+                for text, group in spans:
+                    pieces.append(text)
+                    starts.append(match.start(group))
+                    ends.append(match.end(group))
+                markers.append((match.start("marker"), match.end("gap")))
+            else:
+                text = " " if match.group("space") is not None else _QUOTES[match.group()]
+                pieces.append(text)
+                starts.append(match.start())
+                ends.append(match.end())
+            position = match.end()
+
+        if position < len(raw):
+            pieces.append(raw[position:])
+            starts.extend(range(position, len(raw)))
+            ends.extend(range(position + 1, len(raw) + 1))
+
+        self.text = "".join(pieces)
+        self._starts = starts
+        self._ends = ends
+        self._markers = markers
+
+    def in_list_marker(self, offset: int) -> bool:
+        """Whether raw ``offset`` is part of a list marker or the gap after it"""
+        return any(start <= offset < end for start, end in self._markers)
+
+    def to_raw(self, start: int, end: int) -> Tuple[int, int]:
+        """Map a normalized ``[start, end)`` span to raw offsets"""
+        return self._starts[start], self._ends[end - 1]
+
+
+def _fold(text: str) -> str:
+    """Collapse whitespace and fold smart quotes, the drift that costs nothing"""
+    return " ".join(text.translate(_QUOTE_TABLE).split())
+
+
+def normalize(text: str) -> str:
+    """Normalized form of ``text`` with surrounding whitespace removed"""
+    return NormalizedText(text).text.strip()
+
+
+class AnchorMatch(BaseModel):
+    """Result of a tolerant anchor lookup"""
+
+    status: str
+    """"found", "not_found" or "ambiguous"."""
+    start: Optional[int] = None
+    end: Optional[int] = None
+    confidence: float = 0.0
+
+
+def find_normalized(index: NormalizedText, anchor: str) -> AnchorMatch:
+    """
+    Locate ``anchor`` in the raw text behind ``index`` ignoring whitespace,
+    list-marker, smart-quote and ``<br>`` differences.
+
+    The raw span is widened over whitespace the anchor itself starts or ends
+    with, so the replacement supplies that whitespace, but never into the
+    gap after a list marker, which belongs to the marker. Confidence is the
+    similarity between the anchor and the raw text it resolved to once
+    whitespace and quotes are folded, so only list-marker and ``<br>`` drift
+    lowers it.
+    """
+    needle = normalize(anchor)
+    if not needle:
+        return AnchorMatch(status="not_found")
+
+    found = index.text.find(needle)
+    if found == -1:
+        return AnchorMatch(status="not_found")
+    if index.text.find(needle, found + 1) != -1:
+        return AnchorMatch(status="ambiguous")
+
+    start, end = index.to_raw(found, found + len(needle))
+    raw = index.raw
+    leading = len(anchor) - len(anchor.lstrip())
+    trailing = len(anchor) - len(anchor.rstrip())
+    while leading and start > 0 and raw[start - 1].isspace() and not index.in_list_marker(start - 1):
+        start -= 1
+        leading -= 1
+    while trailing and end < len(raw) and raw[end].isspace():
+        end += 1
+        trailing -= 1
+
+    confidence = SequenceMatcher(
+        None, _fold(anchor), _fold(raw[start:end]), autojunk=False
+    ).ratio()
+    return AnchorMatch(status="found", start=start, end=end, confidence=confidence)
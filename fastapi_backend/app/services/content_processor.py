@@ -1,5 +1,5 @@
 import re
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 import json
 import asyncio
 from langdetect import detect
@@ -9,6 +9,7 @@ from bs4 import BeautifulSoup
 from app.config import settings
 from app.services.openai_service import (
     create_embedding,
+    create_embeddings,
     extract_keywords,
     generate_summary,
 )
@@ -156,3 +157,67 @@ async def process_document_content(
         "summary": summary,
         "embedding": embedding,
     }
+
+
+async def process_documents_content(
+    items: List[Tuple[str, Optional[str]]]
+) -> List[Dict[str, Any]]:
+    """
+    Batch version of process_document_content for ``(markdown_content, language)``
+    pairs. Embeddings are requested in batches sized by create_embeddings, and
+    the keyword/summary calls and embedding fallbacks run with at most
+    ENRICHMENT_MAX_CONCURRENCY in flight. Results are returned in input order.
+    """
+    contents = [content or "" for content, _ in items]
+    languages = [
+        language or (detect_language(content) if content else "en")
+        for content, (_, language) in zip(contents, items)
+    ]
+
+    embeddings = await create_embeddings(contents)
+
+    semaphore = asyncio.Semaphore(max(1, settings.ENRICHMENT_MAX_CONCURRENCY))
+
+    async def describe(content: str, language: str):
+        if not content:
+            return [], "No content available"
+        async with semaphore:
+            return await asyncio.gather(
+                extract_keywords(content, language),
+                generate_summary(content, language),
+            )
+
+    descriptions = await asyncio.gather(
+        *(describe(content, language) for content, language in zip(contents, languages))
+    )
+
+    async def fallback(embedding, keywords: List[str], summary: str):
+        # Same fallback as the single-document path
+        if embedding is not None:
+            return embedding
+        async with semaphore:
+            if summary:
+                embedding = await create_embedding(summary)
+            elif keywords:
+                embedding = await create_embedding(" ".join(keywords))
+        return embedding if embedding is not None else [0.0] * settings.VECTOR_DIMENSION
+
+    embeddings = await asyncio.gather(
+        *(
+            fallback(embedding, keywords, summary)
+            for embedding, (keywords, summary) in zip(embeddings, descriptions)
+        )
+    )
+
+    return [
+        {
+            "language": language,
+            "keywords_array": keywords,
+            "urls_array": extract_urls_from_markdown(content) if content else [],
+            "summary": summary,
+            "embedding": embedding,
+        }
+        for content, language, embedding, (keywords, summary) in zip(
+            contents, languages, embeddings, descriptions
+        )
+    ]
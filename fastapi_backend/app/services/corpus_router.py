@@ -0,0 +1,127 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from app.config import settings
+from app.services.retrieval import RetrievalResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CorpusRoute:
+    """Which edit suggestion runs to launch for a query"""
+
+    api_ref: bool
+    documentation: bool
+    reason: str
+    api_ref_score: float = 0.0
+    documentation_score: float = 0.0
+
+    @property
+    def corpora(self) -> List[bool]:
+        """``is_api_ref`` values to run, API reference first"""
+        return [flag for flag, run in ((True, self.api_ref), (False, self.documentation)) if run]
+
+    @property
+    def skipped(self) -> Optional[bool]:
+        """The ``is_api_ref`` value that was skipped, if any"""
+        if not self.api_ref:
+            return True
+        if not self.documentation:
+            return False
+        return None
+
+
+class CorpusRouter:
+    """
+    Decide whether a query needs the API reference corpus, the regular
+    documentation corpus, or both, from the best vector score in each.
+
+    A corpus is skipped only when the other one's top similarity beats it by at
+    least ``margin``; without retrieval results both runs are launched.
+    """
+
+    def __init__(self, margin: float, enabled: bool = True):
+        self.margin = margin
+        self.enabled = enabled
+        self._counts: Dict[str, int] = {
+            "routed": 0,
+            "skipped": 0,
+            "fallbacks": 0,
+            "empty_after_skip": 0,
+        }
+
+    def route(self, retrieval: Optional[RetrievalResult]) -> CorpusRoute:
+        """Choose the corpora to run for the given retrieval results"""
+        self._counts["routed"] += 1
+
+        if not self.enabled:
+            return CorpusRoute(True, True, "routing disabled")
+        if retrieval is None or retrieval.query_embedding is None:
+            return CorpusRoute(True, True, "no retrieval scores")
+
+        api_score = max((d.similarity for d in retrieval.api_references), default=0.0)
+        docs_score = max((d.similarity for d in retrieval.documentation), default=0.0)
+
+        if api_score - docs_score >= self.margin:
+            route = CorpusRoute(True, False, "api reference ahead", api_score, docs_score)
+        elif docs_score - api_score >= self.margin:
+            route = CorpusRoute(False, True, "documentation ahead", api_score, docs_score)
+        else:
+            route = CorpusRoute(True, True, "within margin", api_score, docs_score)
+
+        if route.skipped is not None:
+            self._counts["skipped"] += 1
+        logger.info(
+            f"Corpus route: api_ref={route.api_ref} | documentation={route.documentation} "
+            f"| reason={route.reason} | api_ref_score={api_score:.3f} "
+            f"| documentation_score={docs_score:.3f} | margin={self.margin} "
+            f"| skip_rate={self.skip_rate:.2f}"
+        )
+        return route
+
+    def record_outcome(
+        self, route: CorpusRoute, suggestions: int, fallback_suggestions: Optional[int] = None
+    ) -> None:
+        """
+        Log how a skipped route performed. ``fallback_suggestions`` is set when
+        the skipped corpus had to be run after all because the routed run came
+        back empty.
+        """
+        if route.skipped is None:
+            return
+        if fallback_suggestions is not None:
+            self._counts["fallbacks"] += 1
+            if fallback_suggestions == 0:
+                self._counts["empty_after_skip"] += 1
+        logger.info(
+            f"Corpus route outcome: skipped_is_api_ref={route.skipped} "
+            f"| suggestions={suggestions} | fallback_suggestions={fallback_suggestions} "
+            f"| fallback_rate={self.fallback_rate:.2f}"
+        )
+
+    @property
+    def skip_rate(self) -> float:
+        routed = self._counts["routed"]
+        return self._counts["skipped"] / routed if routed else 0.0
+
+    @property
+    def fallback_rate(self) -> float:
+        skipped = self._counts["skipped"]
+        return self._counts["fallbacks"] / skipped if skipped else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        """Routing counters plus skip and fallback rates"""
+        return {
+            **self._counts,
+            "skip_rate": self.skip_rate,
+            "fallback_rate": self.fallback_rate,
+        }
+
+
+# Shared router for edit suggestion runs
+corpus_router = CorpusRouter(
+    margin=settings.CORPUS_ROUTING_MARGIN,
+    enabled=settings.CORPUS_ROUTING_ENABLED,
+)
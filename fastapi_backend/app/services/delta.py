@@ -0,0 +1,70 @@
+import json
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Hashable, List, Optional, Union
+
+# A delta is a list of ops over the lines of the base text: ``[start, end]``
+# copies base lines ``start:end`` and a string is inserted as is.
+DeltaOp = Union[List[int], str]
+
+
+def make_delta(base: str, target: str) -> List[DeltaOp]:
+    """Line-based delta that rebuilds ``target`` from ``base``"""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+
+    ops: List[DeltaOp] = []
+    matcher = SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, b_start, b_end, t_start, t_end in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append([b_start, b_end])
+        elif t_start < t_end:
+            inserted = "".join(target_lines[t_start:t_end])
+            if ops and isinstance(ops[-1], str):
+                ops[-1] += inserted
+            else:
+                ops.append(inserted)
+    return ops
+
+
+def apply_delta(base: str, delta: List[DeltaOp]) -> str:
+    """Rebuild the target text of ``delta`` from ``base``"""
+    base_lines = base.splitlines(keepends=True)
+    return "".join(
+        op if isinstance(op, str) else "".join(base_lines[op[0] : op[1]])
+        for op in delta
+    )
+
+
+def delta_size(delta: List[DeltaOp]) -> int:
+    """Encoded size of ``delta`` in bytes, as stored"""
+    return len(json.dumps(delta, ensure_ascii=False).encode())
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
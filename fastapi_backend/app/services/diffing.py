@@ -0,0 +1,141 @@
+import re
+from difflib import SequenceMatcher
+from typing import List, Optional, Sequence
+
+from app.models.documents import DiffHunk, DiffLine, DiffResult, WordSegment
+
+# Words and the whitespace between them are separate tokens so a word-level
+# diff never splits a word and still reproduces the line exactly
+_WORD_PATTERN = re.compile(r"\s+|\w+|[^\w\s]")
+
+# Changed line pairs less similar than this are shown as a plain
+# removal/addition instead of word-level segments
+_WORD_DIFF_MIN_RATIO = 0.5
+
+
+def _word_segments(old: str, new: str) -> Optional[List[List[WordSegment]]]:
+    """Word-level segments of a changed line pair, as ``[old, new]``"""
+    old_words = _WORD_PATTERN.findall(old)
+    new_words = _WORD_PATTERN.findall(new)
+    matcher = SequenceMatcher(None, old_words, new_words, autojunk=False)
+    if matcher.ratio() < _WORD_DIFF_MIN_RATIO:
+        return None
+
+    old_segments: List[WordSegment] = []
+    new_segments: List[WordSegment] = []
+    for tag, o_start, o_end, n_start, n_end in matcher.get_opcodes():
+        if tag == "equal":
+            text = "".join(old_words[o_start:o_end])
+            old_segments.append(WordSegment(op="equal", text=text))
+            new_segments.append(WordSegment(op="equal", text=text))
+            continue
+        if o_start < o_end:
+            old_segments.append(WordSegment(op="removed", text="".join(old_words[o_start:o_end])))
+        if n_start < n_end:
+            new_segments.append(WordSegment(op="added", text="".join(new_words[n_start:n_end])))
+    return [old_segments, new_segments]
+
+
+def _opcodes(old: Sequence[str], new: Sequence[str]) -> List[tuple]:
+    """
+    Line opcodes, matching only the part between the common prefix and
+    suffix. Edits to large pages usually touch a small region, so this keeps
+    the quadratic part of SequenceMatcher to that region.
+    """
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < limit - prefix
+        and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]
+    ):
+        suffix += 1
+
+    opcodes = []
+    if prefix:
+        opcodes.append(("equal", 0, prefix, 0, prefix))
+    matcher = SequenceMatcher(
+        None, old[prefix : len(old) - suffix], new[prefix : len(new) - suffix], autojunk=False
+    )
+    for tag, o_start, o_end, n_start, n_end in matcher.get_opcodes():
+        opcodes.append((tag, o_start + prefix, o_end + prefix, n_start + prefix, n_end + prefix))
+    if suffix:
+        opcodes.append(("equal", len(old) - suffix, len(old), len(new) - suffix, len(new)))
+    return opcodes
+
+
+def _group(opcodes: List[tuple], context: int) -> List[List[tuple]]:
+    """
+    Split opcodes into hunks with ``context`` lines around each change, the
+    same grouping as SequenceMatcher.get_grouped_opcodes.
+    """
+    codes = list(opcodes)
+    if not codes:
+        return []
+    if codes[0][0] == "equal":
+        tag, o_start, o_end, n_start, n_end = codes[0]
+        codes[0] = tag, max(o_start, o_end - context), o_end, max(n_start, n_end - context), n_end
+    if codes[-1][0] == "equal":
+        tag, o_start, o_end, n_start, n_end = codes[-1]
+        codes[-1] = tag, o_start, min(o_end, o_start + context), n_start, min(n_end, n_start + context)
+
+    groups: List[List[tuple]] = []
+    group: List[tuple] = []
+    for tag, o_start, o_end, n_start, n_end in codes:
+        if tag == "equal" and o_end - o_start > 2 * context:
+            group.append((tag, o_start, min(o_end, o_start + context), n_start, min(n_end, n_start + context)))
+            groups.append(group)
+            group = []
+            o_start, n_start = max(o_start, o_end - context), max(n_start, n_end - context)
+        group.append((tag, o_start, o_end, n_start, n_end))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        groups.append(group)
+    return groups
+
+
+def diff_texts(old: str, new: str, context: int = 3) -> DiffResult:
+    """
+    Line diff of two texts grouped into hunks, with word-level segments for
+    changed lines that pair up with a similar line on the other side.
+    """
+    if old == new:
+        return DiffResult()
+
+    old_lines = old.splitlines()
+    new_lines = new.splitlines()
+    result = DiffResult()
+    for group in _group(_opcodes(old_lines, new_lines), context):
+        hunk = DiffHunk(
+            old_start=group[0][1] + 1,
+            old_count=group[-1][2] - group[0][1],
+            new_start=group[0][3] + 1,
+            new_count=group[-1][4] - group[0][3],
+        )
+        for tag, o_start, o_end, n_start, n_end in group:
+            if tag == "equal":
+                hunk.lines.extend(
+                    DiffLine(op="context", text=old_lines[o], old_line=o + 1, new_line=n + 1)
+                    for o, n in zip(range(o_start, o_end), range(n_start, n_end))
+                )
+                continue
+
+            removed = [
+                DiffLine(op="removed", text=old_lines[o], old_line=o + 1)
+                for o in range(o_start, o_end)
+            ]
+            added = [
+                DiffLine(op="added", text=new_lines[n], new_line=n + 1)
+                for n in range(n_start, n_end)
+            ]
+            if tag == "replace":
+                for old_line, new_line in zip(removed, added):
+                    segments = _word_segments(old_line.text, new_line.text)
+                    if segments:
+                        old_line.segments, new_line.segments = segments
+            hunk.lines.extend(removed + added)
+            result.removed += len(removed)
+            result.added += len(added)
+        result.hunks.append(hunk)
+    return result
@@ -1,5 +1,6 @@
 from app.services.agents.edit_suggestion_agent import (
     EditAgentResponse,
+    EditSuggestion,
     edit_suggestion_agent,
 )
 from app.services.agents.editor_agent import DocumentEdit, edit_content_agent, Edits
@@ -18,12 +19,17 @@ from app.services.agents.inlineedit_agent import (
     inline_edit_agent,
 )
 from app.services.shared.models import ApiRef
+from app.services.shared.scheduler import edit_agent_scheduler
+from app.services.shared.streamed_run import StreamedAgentRun
+from app.services.retrieval import RetrievalResult, retrieve_candidates
+from app.services.corpus_router import corpus_router
+from app.services.patching import PatchResult, apply_changes
 from agents import InputGuardrailTripwireTriggered, Runner, set_default_openai_key, set_tracing_disabled
 from app.config import settings
 import json
 import asyncio
 import uuid
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from app.models.edit_documentation import (
     DocumentEditWithOriginal,
@@ -42,15 +48,28 @@ from app.models.websocket_events import (
     DocumentDeletedEvent,
     ErrorEvent,
     ProgressEvent,
+    ContentDeltaEvent,
 )
 
+# Output fields of the create and inline edit agents streamed to clients as
+# they are written
+CREATE_STREAMED_FIELDS = ("markdown_content_en", "markdown_content_ja")
+INLINE_STREAMED_FIELDS = ("edited_text",)
+
+# Intents whose handlers make use of speculatively retrieved candidates
+RETRIEVAL_INTENTS = {"edit", "create", "delete"}
+
 
 class MainEditor:
-    def __init__(self, query: str, document_id: str = None):
+    def __init__(self, query: str, document_id: str = None, session_id: str = None):
         self.query = query
         self.document_id: str = (
             document_id  # Initialize document_id to None, can be set later if needed
         )
+        # Identifies this run to the shared agent scheduler
+        self.session_id: str = session_id or str(uuid.uuid4())
+        # Query embedding + candidate ranking, started alongside intent detection
+        self._retrieval_task: Optional[asyncio.Task] = None
         self.edit_changes: list[DocumentEdit] = []
         self.create_documents: list[GeneratedDocument] = []
         self.delete_documents: list[DocumentToDelete] = []
@@ -66,7 +85,16 @@ class MainEditor:
         EditDocumentationResponse
             Aggregated results from all handler tasks.
         """
+        self._start_retrieval()
+        try:
+            return await self._run_intents()
+        finally:
+            self._cancel_retrieval()
+
+    async def _run_intents(self) -> "EditDocumentationResponse":
+        """Detect intents and run their handlers concurrently"""
         detected_intents = await self._detect_intent()
+        self._settle_retrieval(detected_intents)
 
         # Map intent names to their corresponding handler coroutine factories.
         intent_handlers = {
@@ -102,6 +130,8 @@ class MainEditor:
         """
         Streaming version of run() that yields progress events as operations complete.
         """
+        self.session_id = session_id
+        self._start_retrieval()
         try:
             # Step 1: Detect intent
             yield ProgressEvent(
@@ -111,6 +141,7 @@ class MainEditor:
             )
             
             detected_intents = await self._detect_intent()
+            self._settle_retrieval(detected_intents)
             
             yield IntentDetectedEvent(
                 event_id=str(uuid.uuid4()),
@@ -135,34 +166,15 @@ class MainEditor:
                 "delete": self._handle_delete_intent_streaming,
             }
             
-            current_step = 2
-            for i, intent in enumerate(detected_intents.intents):
-                yield ProgressEvent(
-                    event_id=str(uuid.uuid4()),
-                    session_id=session_id,
-                    payload={
-                        "message": f"Processing {intent.intent} intent ({i+1}/{total_intents})",
-                        "step": current_step,
-                        "total_steps": 4
-                    }
+            # Run every intent concurrently and forward events as they arrive
+            intent_streams = [
+                self._intent_stream(
+                    intent_handlers.get(intent.intent), intent, i, total_intents, session_id
                 )
-                
-                handler = intent_handlers.get(intent.intent)
-                if handler is not None:
-                    # Stream events from the handler
-                    async for event in handler(intent, session_id):
-                        yield event
-                else:
-                    yield ErrorEvent(
-                        event_id=str(uuid.uuid4()),
-                        session_id=session_id,
-                        payload={
-                            "message": f"No handler found for intent '{intent.intent}'",
-                            "error_type": "UnknownIntent"
-                        }
-                    )
-                
-                current_step += 1
+                for i, intent in enumerate(detected_intents.intents)
+            ]
+            async for event in merge_event_streams(intent_streams):
+                yield event
             
             # Step 4: Final progress
             yield ProgressEvent(
@@ -194,6 +206,82 @@ class MainEditor:
                     "error_type": type(e).__name__
                 }
             )
+        finally:
+            self._cancel_retrieval()
+
+    def _start_retrieval(self) -> None:
+        """
+        Start embedding the query and ranking candidate documents in the
+        background so the work overlaps with intent detection.
+        """
+        if settings.SPECULATIVE_RETRIEVAL and self._retrieval_task is None:
+            self._retrieval_task = asyncio.create_task(retrieve_candidates(self.query))
+
+    def _settle_retrieval(self, detected_intents: Detected_Intent) -> None:
+        """Cancel speculative retrieval when no detected intent needs it"""
+        if not any(i.intent in RETRIEVAL_INTENTS for i in detected_intents.intents):
+            self._cancel_retrieval()
+
+    def _cancel_retrieval(self) -> None:
+        if self._retrieval_task is not None and not self._retrieval_task.done():
+            self._retrieval_task.cancel()
+
+    async def _get_retrieval(self) -> Optional[RetrievalResult]:
+        """Warmed retrieval results, or None if unavailable"""
+        task = self._retrieval_task
+        if task is None or task.cancelled():
+            return None
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():
+                return None
+            raise
+        except Exception as e:
+            print(f"Speculative retrieval failed: {str(e)}")
+            return None
+
+    async def _agent_input(
+        self, intent, instruction: str, is_api_ref: Optional[bool] = None
+    ) -> str:
+        """
+        Build the agent input for an intent, appending retrieved candidate
+        documents when speculative retrieval produced any.
+        """
+        text = f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. {instruction}"
+        retrieval = await self._get_retrieval()
+        if retrieval is not None:
+            hint = retrieval.to_prompt(is_api_ref)
+            if hint:
+                text = f"{text}\n\n{hint}"
+        return text
+
+    async def _intent_stream(
+        self, handler, intent, index: int, total_intents: int, session_id: str
+    ) -> AsyncGenerator[EditProgressEvent, None]:
+        """Announce an intent and stream the events of its handler"""
+        yield ProgressEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            payload={
+                "message": f"Processing {intent.intent} intent ({index+1}/{total_intents})",
+                "step": 2 + index,
+                "total_steps": 4
+            }
+        )
+        
+        if handler is not None:
+            async for event in handler(intent, session_id):
+                yield event
+        else:
+            yield ErrorEvent(
+                event_id=str(uuid.uuid4()),
+                session_id=session_id,
+                payload={
+                    "message": f"No handler found for intent '{intent.intent}'",
+                    "error_type": "UnknownIntent"
+                }
+            )
 
     async def _handle_edit_intent(self, intent) -> None:
         """
@@ -216,7 +304,9 @@ class MainEditor:
         """
         create_content_agent_response = await Runner.run(
             create_content_agent,
-            f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. Create new documentation based on the task",
+            await self._agent_input(
+                intent, "Create new documentation based on the task"
+            ),
         )
         created_documents = create_content_agent_response.final_output_as(
             CreateContentResponse
@@ -233,7 +323,9 @@ class MainEditor:
         """
         delete_content_agent_response = await Runner.run(
             delete_content_agent,
-            f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. Identify documents to delete based on the task",
+            await self._agent_input(
+                intent, "Identify documents to delete based on the task"
+            ),
         )
         delete_response = delete_content_agent_response.final_output_as(
             DeleteContentResponse
@@ -248,50 +340,70 @@ class MainEditor:
     async def _get_edit_suggestions(self, intent) -> EditAgentResponse:
         """
         Get edit suggestions from the edit suggestion agent.
-        Runs two agents concurrently - one with API reference context and one without.
+        The corpus router decides from the retrieval scores whether to run the
+        API reference agent, the regular documentation agent, or both
+        concurrently. If a routed run comes back empty, the skipped corpus is
+        run as a fallback.
         """
-        query_text = f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. Provide edit suggestions for the documentation based on the task"
+        retrieval = await self._get_retrieval()
+        route = corpus_router.route(retrieval)
 
-        # Run two agents concurrently
-        api_ref_task = Runner.run(
-            edit_suggestion_agent, query_text, context=ApiRef(is_api_ref=True)
-        )
-        non_api_ref_task = Runner.run(
-            edit_suggestion_agent, query_text, context=ApiRef(is_api_ref=False)
-        )
+        suggestions = await self._run_edit_suggestion_agents(intent, route.corpora)
 
-        # Await both tasks concurrently
-        api_ref_response, non_api_ref_response = await asyncio.gather(
-            api_ref_task, non_api_ref_task
-        )
+        if route.skipped is not None:
+            fallback_count = None
+            if not suggestions:
+                suggestions = await self._run_edit_suggestion_agents(
+                    intent, [route.skipped]
+                )
+                fallback_count = len(suggestions)
+            corpus_router.record_outcome(route, len(suggestions), fallback_count)
 
-        # Parse both responses
-        api_ref_suggestions = api_ref_response.final_output_as(EditAgentResponse)
-        print("API Reference Suggestions:")
-        print(api_ref_suggestions.model_dump_json(indent=2))
-        non_api_ref_suggestions = non_api_ref_response.final_output_as(
-            EditAgentResponse
-        )
-        print("Non-API Reference Suggestions:")
-        print(non_api_ref_suggestions.model_dump_json(indent=2))
+        return EditAgentResponse(suggestions=suggestions)
 
-        # Combine suggestions from both agents
-        combined_suggestions = EditAgentResponse(
-            suggestions=api_ref_suggestions.suggestions
-            + non_api_ref_suggestions.suggestions
-        )
+    async def _run_edit_suggestion_agents(self, intent, corpora: list[bool]) -> list[EditSuggestion]:
+        """
+        Run one edit suggestion agent per corpus concurrently, each seeded with
+        its own corpus' candidates, and combine their suggestions.
+        """
+        instruction = "Provide edit suggestions for the documentation based on the task"
+
+        tasks = [
+            Runner.run(
+                edit_suggestion_agent,
+                await self._agent_input(intent, instruction, is_api_ref=is_api_ref),
+                context=ApiRef(is_api_ref=is_api_ref),
+            )
+            for is_api_ref in corpora
+        ]
+        responses = await asyncio.gather(*tasks)
 
-        return combined_suggestions
+        # Combine suggestions from all agents
+        suggestions = []
+        for is_api_ref, response in zip(corpora, responses):
+            corpus_suggestions = response.final_output_as(EditAgentResponse)
+            print("API Reference Suggestions:" if is_api_ref else "Non-API Reference Suggestions:")
+            print(corpus_suggestions.model_dump_json(indent=2))
+            suggestions.extend(corpus_suggestions.suggestions)
+
+        return suggestions
 
     async def _process_edit_suggestions(self, suggestions) -> list[DocumentEdit]:
         """
         Process edit suggestions concurrently and return all changes.
+        Suggestions targeting the same document version are sent to the editor
+        agent together, so each document is fetched and edited in a single run.
         """
-        # Create async tasks for each suggestion
+        groups = group_suggestions_by_document(suggestions)
+
+        # Create async tasks for each document; the shared scheduler bounds
+        # how many of them actually hit the LLM at once
         tasks = []
-        for suggestion in suggestions:
-            task_input = json.dumps({"suggestions": [suggestion.model_dump()]})
-            task = Runner.run(edit_content_agent, task_input)
+        for group in groups:
+            task_input = json.dumps(
+                {"suggestions": [suggestion.model_dump() for suggestion in group]}
+            )
+            task = self._run_edit_content_agent(task_input, group_priority(group))
             tasks.append(task)
 
         # Run all tasks concurrently
@@ -301,17 +413,24 @@ class MainEditor:
         all_changes = []
         for i, result in enumerate(results):
             if isinstance(result, Exception):
-                print(f"Error processing suggestion {i}: {str(result)}")
+                print(f"Error processing suggestions for document group {i}: {str(result)}")
             else:
                 try:
                     documents_edits = result.final_output_as(Edits)
                     changes = documents_edits.changes
                     all_changes.extend(changes)
-                    print(f"Processed suggestion {i}: {len(changes)} document(s)")
+                    print(f"Processed document group {i}: {len(changes)} document(s)")
                 except Exception as e:
-                    print(f"Error parsing result for suggestion {i}: {str(e)}")
+                    print(f"Error parsing result for document group {i}: {str(e)}")
 
-        return all_changes
+        return merge_document_edits(all_changes)
+
+    async def _run_edit_content_agent(self, task_input: str, priority: str = None):
+        """
+        Run the edit content agent once a scheduler slot is free for this session.
+        """
+        async with edit_agent_scheduler.slot(self.session_id, priority):
+            return await Runner.run(edit_content_agent, task_input)
 
     async def _detect_intent(self) -> Detected_Intent:
         """
@@ -337,57 +456,20 @@ class MainEditor:
                 payload=edit_suggestions
             )
             
-            # Process suggestions if any exist
+            # Process suggestions if any exist, one editor run per document,
+            # all documents concurrently
             if edit_suggestions.suggestions:
-                total_suggestions = len(edit_suggestions.suggestions)
+                groups = group_suggestions_by_document(edit_suggestions.suggestions)
+                total_suggestions = len(groups)
                 
-                for i, suggestion in enumerate(edit_suggestions.suggestions):
-                    # Get document title from document ID
-                    document_title = "Unknown"
-                    try:
-                        from app.core.repositories.document_repository import DocumentRepository
-                        doc_repo = DocumentRepository()
-                        doc = await doc_repo.get_document_by_id(suggestion.document_id)
-                        document_title = doc.get("title", f"Document {suggestion.document_id[:8]}")
-                    except Exception:
-                        document_title = f"Document {suggestion.document_id[:8]}"
-                    
-                    yield DocumentProcessingEvent(
-                        event_id=str(uuid.uuid4()),
-                        session_id=session_id,
-                        payload={
-                            "suggestion_index": i + 1,
-                            "total_suggestions": total_suggestions,
-                            "document_title": document_title,
-                            "document_path": suggestion.path,
-                        }
+                document_streams = [
+                    self._process_document_group_streaming(
+                        group, i, total_suggestions, session_id
                     )
-                    
-                    try:
-                        # Process single suggestion
-                        task_input = json.dumps({"suggestions": [suggestion.model_dump()]})
-                        result = await Runner.run(edit_content_agent, task_input)
-                        documents_edits = result.final_output_as(Edits)
-                        changes = documents_edits.changes
-                        
-                        # Yield completed documents
-                        for change in changes:
-                            self.edit_changes.append(change)
-                            yield DocumentCompletedEvent(
-                                event_id=str(uuid.uuid4()),
-                                session_id=session_id,
-                                payload=change
-                            )
-                            
-                    except Exception as e:
-                        yield ErrorEvent(
-                            event_id=str(uuid.uuid4()),
-                            session_id=session_id,
-                            payload={
-                                "message": f"Error processing suggestion {i + 1}: {str(e)}",
-                                "error_type": type(e).__name__
-                            }
-                        )
+                    for i, group in enumerate(groups)
+                ]
+                async for event in merge_event_streams(document_streams):
+                    yield event
             
         except Exception as e:
             yield ErrorEvent(
@@ -399,6 +481,62 @@ class MainEditor:
                 }
             )
 
+    async def _process_document_group_streaming(
+        self, group, index: int, total: int, session_id: str
+    ) -> AsyncGenerator[EditProgressEvent, None]:
+        """Run the editor agent for one document's suggestions, streaming its events"""
+        suggestion = group[0]
+        # Get document title from document ID
+        document_title = "Unknown"
+        try:
+            from app.core.repositories.document_repository import DocumentRepository
+            doc_repo = DocumentRepository()
+            doc = await doc_repo.get_document_by_id(suggestion.document_id)
+            document_title = doc.get("title", f"Document {suggestion.document_id[:8]}")
+        except Exception:
+            document_title = f"Document {suggestion.document_id[:8]}"
+        
+        yield DocumentProcessingEvent(
+            event_id=str(uuid.uuid4()),
+            session_id=session_id,
+            payload={
+                "suggestion_index": index + 1,
+                "total_suggestions": total,
+                "document_title": document_title,
+                "document_path": suggestion.path,
+            }
+        )
+        
+        try:
+            # Process all suggestions for this document in one run
+            task_input = json.dumps(
+                {"suggestions": [s.model_dump() for s in group]}
+            )
+            result = await self._run_edit_content_agent(
+                task_input, group_priority(group)
+            )
+            documents_edits = result.final_output_as(Edits)
+            changes = merge_document_edits(documents_edits.changes)
+            
+            # Yield completed documents
+            for change in changes:
+                self.edit_changes.append(change)
+                yield DocumentCompletedEvent(
+                    event_id=str(uuid.uuid4()),
+                    session_id=session_id,
+                    payload=change
+                )
+                
+        except Exception as e:
+            yield ErrorEvent(
+                event_id=str(uuid.uuid4()),
+                session_id=session_id,
+                payload={
+                    "message": f"Error processing suggestion {index + 1}: {str(e)}",
+                    "error_type": type(e).__name__
+                }
+            )
+
     async def _handle_create_intent_streaming(self, intent, session_id: str) -> AsyncGenerator[EditProgressEvent, None]:
         """Streaming version of create intent handler"""
         try:
@@ -408,11 +546,18 @@ class MainEditor:
                 payload={"message": "Creating new documentation content..."}
             )
             
-            create_content_agent_response = await Runner.run(
+            run = StreamedAgentRun(
                 create_content_agent,
-                f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. Create new documentation based on the task",
+                await self._agent_input(intent, "Create new documentation based on the task"),
+                CREATE_STREAMED_FIELDS,
             )
-            created_documents = create_content_agent_response.final_output_as(CreateContentResponse)
+            async for path, text in run.deltas():
+                yield ContentDeltaEvent(
+                    event_id=str(uuid.uuid4()),
+                    session_id=session_id,
+                    payload={"path": path, "delta": text}
+                )
+            created_documents = run.final_output_as(CreateContentResponse)
             
             # Yield created documents
             for doc in created_documents.documents:
@@ -444,7 +589,7 @@ class MainEditor:
             
             delete_content_agent_response = await Runner.run(
                 delete_content_agent,
-                f"User query: {self.query} Task: {intent.task} Reason: {intent.reason}. Identify documents to delete based on the task",
+                await self._agent_input(intent, "Identify documents to delete based on the task"),
             )
             delete_response = delete_content_agent_response.final_output_as(DeleteContentResponse)
             
@@ -485,11 +630,21 @@ class InlineEditor:
         """
         self.selected_text = selected_text
         self.query = query
+        self.response: Optional[InLineEditAgentResponse] = None
 
     async def run(self) -> InLineEditAgentResponse:
         """
         Run the inline editor to apply changes to the given text
         """
+        async for _ in self.stream(session_id=str(uuid.uuid4())):
+            pass
+        return self.response
+
+    async def stream(self, session_id: str) -> AsyncGenerator[EditProgressEvent, None]:
+        """
+        Run the inline editor, yielding the edited text as the model writes it.
+        The complete response is left in ``self.response``.
+        """
         prompt=f"""Apply the given instructions to the selected text:
 ## Instructions:
 {self.query}
@@ -497,12 +652,18 @@ class InlineEditor:
 {self.selected_text}
         """
         try:
-            inline_agent_response= await Runner.run(inline_edit_agent, prompt)
-            response=inline_agent_response.final_output_as(
+            run = StreamedAgentRun(inline_edit_agent, prompt, INLINE_STREAMED_FIELDS)
+            async for path, text in run.deltas():
+                yield ContentDeltaEvent(
+                    event_id=str(uuid.uuid4()),
+                    session_id=session_id,
+                    payload={"path": path, "delta": text}
+                )
+            response=run.final_output_as(
                 InLineEditAgentResponse
             )
             print(f"Inline edit response: {response.model_dump_json(indent=2)}")
-            return InLineEditAgentResponse(edited_text=response.edited_text)
+            self.response = InLineEditAgentResponse(edited_text=response.edited_text)
         except InputGuardrailTripwireTriggered:
             raise InLineEditGuardrailException(
                 message="System only supports queries requesting for edits. Please ensure your query is suitable for inline editing."
@@ -510,17 +671,107 @@ class InlineEditor:
 
                                 
 
-def update_markdown(document_to_edit: DocumentEditWithOriginal) -> str:
+async def merge_event_streams(streams) -> AsyncGenerator[EditProgressEvent, None]:
     """
-    Update the content of a document based on the provided edit changes.
-    This function is a placeholder for the actual implementation that would apply the edits.
+    Consume several event streams concurrently and yield their events in the
+    order they are produced. An exception raised by any stream is re-raised
+    here; the remaining streams are cancelled when the consumer stops.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump(stream):
+        try:
+            async for event in stream:
+                queue.put_nowait(event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            queue.put_nowait(e)
+        finally:
+            queue.put_nowait(finished)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def group_suggestions_by_document(suggestions) -> list[list[EditSuggestion]]:
+    """
+    Group edit suggestions by ``(document_id, version)``, keeping first-seen order.
+    """
+    groups: dict[tuple, list[EditSuggestion]] = {}
+    for suggestion in suggestions:
+        groups.setdefault((suggestion.document_id, suggestion.version), []).append(
+            suggestion
+        )
+    return list(groups.values())
+
+
+def group_priority(suggestions) -> Optional[str]:
+    """
+    Highest priority among a group of suggestions.
+    """
+    priorities = [getattr(s, "priority", None) for s in suggestions]
+    for priority in ("high", "medium", "low"):
+        if priority in priorities:
+            return priority
+    return None
+
+
+def merge_document_edits(edits: list[DocumentEdit]) -> list[DocumentEdit]:
+    """
+    Merge edits for the same ``(document_id, version)`` into a single new
+    DocumentEdit and drop changes that repeat an identical
+    ``old_string``/``new_string`` pair. The given edits are left unchanged.
+    """
+    firsts: dict[tuple, DocumentEdit] = {}
+    changes: dict[tuple, list] = {}
+    seen: dict[tuple, set] = {}
+    for edit in edits:
+        key = (edit.document_id, edit.version)
+        if key not in firsts:
+            firsts[key] = edit
+            changes[key] = []
+            seen[key] = set()
+        for change in edit.changes:
+            pair = (change.old_string, change.new_string)
+            if pair not in seen[key]:
+                seen[key].add(pair)
+                changes[key].append(change)
+    return [first.model_copy(update={"changes": changes[key]}) for key, first in firsts.items()]
+
+
+def apply_document_edit(document_to_edit: DocumentEditWithOriginal) -> PatchResult:
+    """
+    Apply a document's changes to its original content and report, per change,
+    whether it was applied or why it conflicted.
     """
     original_md = (
         document_to_edit.original_content.markdown_content
         if document_to_edit.original_content
         else ""
     )
-    for change in document_to_edit.changes:
-        if change.old_string and change.new_string:
-            original_md = original_md.replace(change.old_string, change.new_string, 1)
-    return original_md
+    return apply_changes(original_md, document_to_edit.changes)
+
+
+def update_markdown(document_to_edit: DocumentEditWithOriginal) -> str:
+    """
+    Update the content of a document based on the provided edit changes.
+    Changes that cannot be applied safely are left out; use
+    ``apply_document_edit`` to see which ones.
+    """
+    return apply_document_edit(document_to_edit).content
@@ -0,0 +1,110 @@
+from difflib import SequenceMatcher
+from typing import List, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class MergeConflict(BaseModel):
+    """A base region that both sides changed in different ways"""
+
+    base_start: int
+    """First line of the region in the base text (0-based)."""
+    base_end: int
+    base: str
+    ours: str
+    theirs: str
+
+
+class MergeResult(BaseModel):
+    """Merged content plus the regions that could not be merged automatically"""
+
+    content: str
+    conflicts: List[MergeConflict] = Field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+    def conflict_summary(self) -> str:
+        """Human readable description of the conflicting regions"""
+        return "; ".join(
+            f"lines {c.base_start + 1}-{max(c.base_end, c.base_start + 1)}"
+            for c in self.conflicts
+        )
+
+
+def _sync_regions(
+    base: Sequence[str], ours: Sequence[str], theirs: Sequence[str]
+) -> List[Tuple[int, int, int, int, int, int]]:
+    """
+    Regions where base, ours and theirs all agree, as
+    ``(base_start, base_end, ours_start, ours_end, theirs_start, theirs_end)``.
+    The last region is an empty sentinel at the end of every text.
+    """
+    ours_blocks = SequenceMatcher(None, base, ours, autojunk=False).get_matching_blocks()
+    theirs_blocks = SequenceMatcher(None, base, theirs, autojunk=False).get_matching_blocks()
+
+    regions = []
+    i = j = 0
+    while i < len(ours_blocks) and j < len(theirs_blocks):
+        o_base, o_start, o_len = ours_blocks[i]
+        t_base, t_start, t_len = theirs_blocks[j]
+        start = max(o_base, t_base)
+        end = min(o_base + o_len, t_base + t_len)
+        if start < end:
+            ours_at = o_start + start - o_base
+            theirs_at = t_start + start - t_base
+            regions.append(
+                (start, end, ours_at, ours_at + end - start, theirs_at, theirs_at + end - start)
+            )
+        if o_base + o_len < t_base + t_len:
+            i += 1
+        else:
+            j += 1
+
+    regions.append((len(base), len(base), len(ours), len(ours), len(theirs), len(theirs)))
+    return regions
+
+
+def three_way_merge(base: str, ours: str, theirs: str) -> MergeResult:
+    """
+    Line-based diff3 merge of two texts derived from ``base``.
+
+    Regions changed on one side only take that side; regions changed the same
+    way on both sides are taken once. Only regions both sides changed
+    differently are reported as conflicts, and those keep the ``theirs`` text
+    so the content stays a valid document.
+    """
+    base_lines = base.splitlines(keepends=True)
+    ours_lines = ours.splitlines(keepends=True)
+    theirs_lines = theirs.splitlines(keepends=True)
+
+    pieces: List[str] = []
+    conflicts: List[MergeConflict] = []
+    base_at = ours_at = theirs_at = 0
+    for b_start, b_end, o_start, o_end, t_start, t_end in _sync_regions(
+        base_lines, ours_lines, theirs_lines
+    ):
+        base_chunk = base_lines[base_at:b_start]
+        ours_chunk = ours_lines[ours_at:o_start]
+        theirs_chunk = theirs_lines[theirs_at:t_start]
+        if ours_chunk == theirs_chunk or ours_chunk == base_chunk:
+            pieces.extend(theirs_chunk)
+        elif theirs_chunk == base_chunk:
+            pieces.extend(ours_chunk)
+        else:
+            conflicts.append(
+                MergeConflict(
+                    base_start=base_at,
+                    base_end=b_start,
+                    base="".join(base_chunk),
+                    ours="".join(ours_chunk),
+                    theirs="".join(theirs_chunk),
+                )
+            )
+            pieces.extend(theirs_chunk)
+
+        pieces.extend(base_lines[b_start:b_end])
+        base_at, ours_at, theirs_at = b_end, o_end, t_end
+
+    return MergeResult(content="".join(pieces), conflicts=conflicts)
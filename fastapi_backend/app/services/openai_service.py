@@ -1,3 +1,4 @@
+import asyncio
 from typing import List, Optional
 import openai
 from openai.types import Embedding
@@ -33,6 +34,82 @@ async def create_embedding(text: str) -> List[float] | None:
     return embedding.embedding
 
 
+# Characters per token assumed when sizing embedding requests. Kept low
+# because markdown and code tokenize more densely than prose.
+_CHARS_PER_TOKEN = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Upper estimate of the tokens in ``text``"""
+    return len(text) // _CHARS_PER_TOKEN + 1
+
+
+def _embedding_batches(texts: List[str], indexes: List[int]) -> List[List[int]]:
+    """Split ``indexes`` into requests within ENRICHMENT_BATCH_SIZE texts and EMBEDDING_BATCH_MAX_TOKENS"""
+    batches: List[List[int]] = []
+    batch: List[int] = []
+    tokens = 0
+    for i in indexes:
+        cost = estimate_tokens(texts[i])
+        if batch and (
+            len(batch) >= max(1, settings.ENRICHMENT_BATCH_SIZE)
+            or tokens + cost > settings.EMBEDDING_BATCH_MAX_TOKENS
+        ):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(i)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _embed_batch(
+    texts: List[str], indexes: List[int], results: List[Optional[List[float]]]
+) -> None:
+    try:
+        response = await openai_client.embeddings.create(
+            model=settings.OPENAI_EMBEDDING_MODEL,
+            input=[texts[i] for i in indexes],
+            dimensions=settings.VECTOR_DIMENSION,
+        )
+    except openai.BadRequestError:
+        if len(indexes) == 1:
+            results[indexes[0]] = None
+            return
+        # A rejected input (say, a page over the model's token limit) fails
+        # the whole request; halve it so the other texts still get embedded
+        middle = len(indexes) // 2
+        await asyncio.gather(
+            _embed_batch(texts, indexes[:middle], results),
+            _embed_batch(texts, indexes[middle:], results),
+        )
+        return
+    except Exception:
+        for i in indexes:
+            results[i] = None
+        return
+
+    for item in response.data:
+        results[indexes[item.index]] = item.embedding
+
+
+async def create_embeddings(texts: List[str]) -> List[Optional[List[float]]]:
+    """
+    Create embeddings for several texts, in as few requests as the batch
+    limits allow. Empty texts get a zero vector; texts whose request fails
+    are None.
+    """
+    results: List[Optional[List[float]]] = [
+        [0.0] * settings.VECTOR_DIMENSION for _ in texts
+    ]
+    pending = [i for i, text in enumerate(texts) if text and text.strip()]
+    await asyncio.gather(
+        *(_embed_batch(texts, batch, results) for batch in _embedding_batches(texts, pending))
+    )
+    return results
+
+
 async def extract_keywords(text: str, language: str = "en") -> List[str]:
     """
     Extract keywords from the text using OpenAI's model.
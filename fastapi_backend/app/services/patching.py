@@ -0,0 +1,239 @@
+from typing import Dict, List, Literal, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.services.anchor_matching import AnchorMatch, NormalizedText, find_normalized
+from app.services.shared.models import ContentChange
+
+ChangeStatus = Literal[
+    "applied",
+    "duplicate",
+    "not_found",
+    "ambiguous",
+    "overlap",
+    "empty_anchor",
+    "low_confidence",
+]
+
+# Statuses that mean the change made it into the output
+APPLIED_STATUSES = {"applied", "duplicate"}
+
+
+class ChangeResult(BaseModel):
+    """Outcome of a single ContentChange"""
+
+    index: int
+    """Position of the change in the submitted list."""
+    status: ChangeStatus
+    start: Optional[int] = None
+    """Offset of the anchor in the original text, when it was located."""
+    end: Optional[int] = None
+    match: Literal["exact", "normalized"] = "exact"
+    """How the anchor was located."""
+    confidence: float = 1.0
+    """Similarity between the anchor and the text it resolved to."""
+    message: Optional[str] = None
+
+
+class PatchResult(BaseModel):
+    """Patched content plus a per-change applied/conflict report"""
+
+    content: str
+    changes: List[ChangeResult] = Field(default_factory=list)
+
+    @property
+    def applied(self) -> List[ChangeResult]:
+        return [c for c in self.changes if c.status in APPLIED_STATUSES]
+
+    @property
+    def conflicts(self) -> List[ChangeResult]:
+        return [c for c in self.changes if c.status not in APPLIED_STATUSES]
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+    def conflict_summary(self) -> str:
+        """Human readable description of the changes that were not applied"""
+        return "; ".join(
+            f"change {c.index + 1}: {c.message or c.status}" for c in self.conflicts
+        )
+
+
+def locate_anchors(
+    original: str,
+    changes: Sequence[ContentChange],
+    min_confidence: Optional[float] = None,
+) -> Tuple[List[Tuple[int, int, int]], List[ChangeResult], Dict[int, float]]:
+    """
+    Find every anchor in the untouched original text.
+
+    Each anchor is searched for once and checked for a second occurrence, so
+    uniqueness is decided against the original rather than a partially edited
+    copy. Anchors without an exact match fall back to normalized matching,
+    which ignores whitespace, list-marker, smart-quote and ``<br>`` drift.
+    Returns the located ``(start, end, index)`` spans, results for the changes
+    that could not be located, and the confidence of each normalized match.
+    """
+    if min_confidence is None:
+        min_confidence = settings.ANCHOR_MIN_CONFIDENCE
+    spans: List[Tuple[int, int, int]] = []
+    failures: List[ChangeResult] = []
+    normalized: Dict[int, float] = {}
+    index_text: Optional[NormalizedText] = None
+    for index, change in enumerate(changes):
+        anchor = change.old_string
+        if not anchor:
+            failures.append(
+                ChangeResult(index=index, status="empty_anchor", message="old_string is empty")
+            )
+            continue
+        start = original.find(anchor)
+        if start == -1:
+            # Built once per document, and only when an anchor misses
+            if index_text is None:
+                index_text = NormalizedText(original)
+            found = find_normalized(index_text, anchor)
+            if found.status == "found" and found.confidence >= min_confidence:
+                spans.append((found.start, found.end, index))
+                normalized[index] = found.confidence
+            else:
+                failures.append(_normalized_failure(found, index, min_confidence))
+        elif original.find(anchor, start + 1) != -1:
+            failures.append(
+                ChangeResult(
+                    index=index,
+                    status="ambiguous",
+                    start=start,
+                    end=start + len(anchor),
+                    message="old_string occurs more than once",
+                )
+            )
+        else:
+            spans.append((start, start + len(anchor), index))
+    return spans, failures, normalized
+
+
+def _normalized_failure(
+    found: AnchorMatch, index: int, min_confidence: float
+) -> ChangeResult:
+    """Report an anchor that normalized matching could not safely resolve"""
+    if found.status == "ambiguous":
+        return ChangeResult(
+            index=index,
+            status="ambiguous",
+            match="normalized",
+            message="old_string occurs more than once after normalization",
+        )
+    if found.status == "found":
+        return ChangeResult(
+            index=index,
+            status="low_confidence",
+            start=found.start,
+            end=found.end,
+            match="normalized",
+            confidence=found.confidence,
+            message=(
+                f"closest match has confidence {found.confidence:.2f}, "
+                f"below {min_confidence:.2f}"
+            ),
+        )
+    return ChangeResult(index=index, status="not_found", message="old_string not found")
+
+
+def resolve_overlaps(
+    spans: List[Tuple[int, int, int]], changes: Sequence[ContentChange]
+) -> Tuple[List[Tuple[int, int, int]], List[ChangeResult]]:
+    """
+    Sort located spans and reject overlapping ones.
+
+    Changes whose anchors overlap cannot all be applied, so every member of an
+    overlapping cluster is reported as a conflict. The exception is a cluster
+    of identical changes (same span, same replacement), which is applied once.
+    """
+    accepted: List[Tuple[int, int, int]] = []
+    results: List[ChangeResult] = []
+
+    ordered = sorted(spans)
+    i = 0
+    while i < len(ordered):
+        cluster = [ordered[i]]
+        cluster_end = ordered[i][1]
+        i += 1
+        while i < len(ordered) and ordered[i][0] < cluster_end:
+            cluster.append(ordered[i])
+            cluster_end = max(cluster_end, ordered[i][1])
+            i += 1
+
+        first = cluster[0]
+        identical = all(
+            (start, end) == first[:2]
+            and changes[index].new_string == changes[first[2]].new_string
+            for start, end, index in cluster
+        )
+        if identical:
+            accepted.append(first)
+            results.append(ChangeResult(index=first[2], status="applied", start=first[0], end=first[1]))
+            for start, end, index in cluster[1:]:
+                results.append(
+                    ChangeResult(
+                        index=index,
+                        status="duplicate",
+                        start=start,
+                        end=end,
+                        message=f"same as change {first[2] + 1}",
+                    )
+                )
+        else:
+            others = ", ".join(str(index + 1) for _, _, index in cluster)
+            for start, end, index in cluster:
+                results.append(
+                    ChangeResult(
+                        index=index,
+                        status="overlap",
+                        start=start,
+                        end=end,
+                        message=f"anchor overlaps changes {others}",
+                    )
+                )
+    return accepted, results
+
+
+def rebuild(
+    original: str, spans: List[Tuple[int, int, int]], changes: Sequence[ContentChange]
+) -> str:
+    """Assemble the output from the original and sorted, non-overlapping spans"""
+    pieces: List[str] = []
+    position = 0
+    for start, end, index in spans:
+        pieces.append(original[position:start])
+        pieces.append(changes[index].new_string)
+        position = end
+    pieces.append(original[position:])
+    return "".join(pieces)
+
+
+def apply_changes(
+    original: str,
+    changes: Sequence[ContentChange],
+    min_confidence: Optional[float] = None,
+) -> PatchResult:
+    """
+    Apply ``changes`` to ``original`` in a single rebuild.
+
+    All anchors are located against the original text, must be unique and must
+    not overlap; changes that fail those checks are left out and reported
+    instead of being silently dropped. Anchors that only match once
+    whitespace and markdown drift are normalized away are applied when their
+    confidence reaches ``min_confidence`` (``ANCHOR_MIN_CONFIDENCE`` by default).
+    """
+    spans, failures, normalized = locate_anchors(original, changes, min_confidence)
+    accepted, results = resolve_overlaps(spans, changes)
+    for result in results:
+        if result.index in normalized:
+            result.match = "normalized"
+            result.confidence = normalized[result.index]
+    content = rebuild(original, accepted, changes)
+    report = sorted(failures + results, key=lambda result: result.index)
+    return PatchResult(content=content, changes=report)
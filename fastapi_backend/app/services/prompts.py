@@ -58,6 +58,7 @@ Provide structured `EditSuggestion` objects containing:
 - `path`: The exact document path as returned by `get_document_by_version`
 - `is_api_ref`: The exact boolean value as returned by `get_document_by_version`
 - `changes`: Detailed, specific instructions for each type of edit
+- `priority`: "high" for incorrect or breaking content, "medium" for missing or outdated content, "low" for cosmetic improvements
 
 **Change Instruction Format**:
 Use clear, detailed, specific instructions for each type of edit:
@@ -145,6 +146,7 @@ Return a list of `ContentChange` objects with:
 
 - Maintain order of appearance for edits.
 - Ensure no conflicting edits.
+- When several suggestions target the same document, fetch it once and return a single `DocumentEdit` for it whose changes cover every suggestion without overlapping `old_string`s.
 
 """
 
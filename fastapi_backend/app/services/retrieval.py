@@ -0,0 +1,115 @@
+import asyncio
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.config import settings
+from app.services.content_processor import detect_language
+from app.services.openai_service import create_embedding
+from app.supabase import supabase
+
+
+class CandidateDocument(BaseModel):
+    """A document ranked against the user's query by embedding similarity"""
+
+    id: str
+    version: Optional[str] = None
+    title: Optional[str] = None
+    path: Optional[str] = None
+    summary: Optional[str] = None
+    similarity: float = 0.0
+    is_api_ref: bool = False
+
+
+class RetrievalResult(BaseModel):
+    """Query embedding plus ranked candidates for each corpus"""
+
+    query_embedding: Optional[List[float]] = None
+    language: str = "en"
+    api_references: List[CandidateDocument] = Field(default_factory=list)
+    documentation: List[CandidateDocument] = Field(default_factory=list)
+
+    def candidates(self, is_api_ref: Optional[bool] = None) -> List[CandidateDocument]:
+        """Candidates for one corpus, or both merged by similarity when None"""
+        if is_api_ref is True:
+            return self.api_references
+        if is_api_ref is False:
+            return self.documentation
+        return sorted(
+            self.api_references + self.documentation,
+            key=lambda doc: doc.similarity,
+            reverse=True,
+        )
+
+    def to_prompt(self, is_api_ref: Optional[bool] = None) -> str:
+        """Render candidates as a hint block for agent input"""
+        candidates = self.candidates(is_api_ref)
+        if not candidates:
+            return ""
+        lines = [
+            f"- id: {doc.id} | version: {doc.version} | path: {doc.path} | "
+            f"title: {doc.title} | is_api_ref: {doc.is_api_ref} | "
+            f"similarity: {doc.similarity:.3f}"
+            for doc in candidates
+        ]
+        return (
+            "Candidate documents ranked by similarity to the query "
+            "(start your search here, but verify with your tools):\n"
+            + "\n".join(lines)
+        )
+
+
+async def _search_corpus(
+    query_embedding: List[float], language: str, is_api_ref: bool, top_k: int
+) -> List[CandidateDocument]:
+    """Run the similarity search RPC for one corpus off the event loop"""
+    response = await asyncio.to_thread(
+        supabase.rpc(
+            "execute_similarity_search",
+            {
+                "query_embedding": query_embedding,
+                "lang": language,
+                "api_ref": is_api_ref,
+                "top_k": top_k,
+            },
+        ).execute
+    )
+    candidates = [
+        CandidateDocument(
+            id=doc["id"],
+            version=doc.get("version"),
+            title=doc.get("title"),
+            path=doc.get("path"),
+            summary=doc.get("summary"),
+            similarity=doc.get("similarity") or 0.0,
+            is_api_ref=doc.get("is_api_ref", is_api_ref),
+        )
+        for doc in response.data or []
+    ]
+    candidates.sort(key=lambda doc: doc.similarity, reverse=True)
+    return candidates
+
+
+async def retrieve_candidates(
+    query: str, top_k: Optional[int] = None
+) -> RetrievalResult:
+    """
+    Embed the query and rank candidate documents in both the API reference and
+    the regular documentation corpus concurrently.
+    """
+    language = detect_language(query)
+    query_embedding = await create_embedding(query)
+    if query_embedding is None:
+        return RetrievalResult(language=language)
+
+    top_k = top_k or settings.RETRIEVAL_TOP_K
+    api_references, documentation = await asyncio.gather(
+        _search_corpus(query_embedding, language, True, top_k),
+        _search_corpus(query_embedding, language, False, top_k),
+    )
+    return RetrievalResult(
+        query_embedding=query_embedding,
+        language=language,
+        api_references=api_references,
+        documentation=documentation,
+    )
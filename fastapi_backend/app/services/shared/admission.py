@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.core.exceptions import EditQueueFullError
+from app.core.logging import PerformanceLogger
+from app.services.shared.scheduler import DEFAULT_PRIORITY, PRIORITY_RANKS
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest run in the running average of run durations
+_DURATION_SMOOTHING = 0.2
+
+
+@dataclass
+class AdmissionTicket:
+    """A job's place in the admission queue"""
+
+    rank: int
+    seq: int
+    priority: str
+    enqueued_at: float
+    admitted_at: Optional[float] = None
+    released: bool = False
+    moved: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+
+class EditAdmissionController:
+    """
+    Bounds how many edit jobs run at once across every entry point.
+
+    At most ``max_running`` jobs run; up to ``max_queued`` more wait, served
+    by priority and then in arrival order. A job arriving at a full queue is
+    refused with EditQueueFullError rather than slowing every running job
+    down. Waiting jobs can follow their queue position and an estimated wait
+    based on recent run durations.
+    """
+
+    def __init__(self, max_running: int, max_queued: int, initial_estimate: float = 30.0):
+        if max_running < 1:
+            raise ValueError("max_running must be at least 1")
+        if max_queued < 0:
+            raise ValueError("max_queued must not be negative")
+        self.max_running = max_running
+        self.max_queued = max_queued
+        self.average_run = initial_estimate
+        self._waiters: List[AdmissionTicket] = []
+        self._running = 0
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.rejected = 0
+        self.perf_logger = PerformanceLogger("admission")
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of admission load"""
+        return {
+            "running": self._running,
+            "queued": len(self._waiters),
+            "max_running": self.max_running,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "average_run_seconds": self.average_run,
+        }
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the job at ``position`` (1-based) should start"""
+        return math.ceil(position / self.max_running) * self.average_run
+
+    def enqueue(self, priority: Optional[str] = None) -> AdmissionTicket:
+        """Queue a job, admitting it at once if there is room; raises EditQueueFullError"""
+        priority = priority if priority in PRIORITY_RANKS else DEFAULT_PRIORITY
+        if self._running >= self.max_running and len(self._waiters) >= self.max_queued:
+            self.rejected += 1
+            raise EditQueueFullError(len(self._waiters), retry_after=self.estimated_wait(1))
+        ticket = AdmissionTicket(
+            rank=PRIORITY_RANKS[priority],
+            seq=next(self._seq),
+            priority=priority,
+            enqueued_at=time.monotonic(),
+        )
+        self._waiters.append(ticket)
+        self._waiters.sort(key=lambda waiter: (waiter.rank, waiter.seq))
+        self._dispatch()
+        return ticket
+
+    async def wait(self, ticket: AdmissionTicket) -> AsyncIterator[Tuple[int, float]]:
+        """
+        Yield ``(position, estimated_wait)`` whenever the ticket's place in
+        the queue changes, finishing once it is admitted.
+        """
+        last_position = None
+        while not ticket.admitted:
+            if ticket.released:
+                raise asyncio.CancelledError()
+            position = self._waiters.index(ticket) + 1
+            if position != last_position:
+                last_position = position
+                yield position, self.estimated_wait(position)
+                # The queue may have moved while the consumer had control
+                continue
+            ticket.moved.clear()
+            await ticket.moved.wait()
+
+    def release(self, ticket: AdmissionTicket) -> None:
+        """Give up the ticket's place in the queue or its running slot"""
+        if ticket.released:
+            return
+        ticket.released = True
+        if ticket in self._waiters:
+            self._waiters.remove(ticket)
+        elif ticket.admitted:
+            self._running -= 1
+            duration = time.monotonic() - ticket.admitted_at
+            self.average_run += _DURATION_SMOOTHING * (duration - self.average_run)
+            self.perf_logger.log_operation(
+                "admission.run", duration, priority=ticket.priority, running=self._running
+            )
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[str] = None) -> AsyncIterator[None]:
+        """Hold a running slot for the duration of the ``async with`` block"""
+        ticket = self.enqueue(priority)
+        try:
+            async for _ in self.wait(ticket):
+                pass
+            yield
+        finally:
+            self.release(ticket)
+
+    def _dispatch(self) -> None:
+        """Admit waiters while there is room, then tell the rest they moved"""
+        while self._running < self.max_running and self._waiters:
+            ticket = self._waiters.pop(0)
+            ticket.admitted_at = time.monotonic()
+            self._running += 1
+            self.admitted += 1
+            self.perf_logger.log_operation(
+                "admission.queue_wait",
+                ticket.admitted_at - ticket.enqueued_at,
+                priority=ticket.priority,
+                running=self._running,
+                queued=len(self._waiters),
+            )
+            ticket.moved.set()
+        for ticket in self._waiters:
+            ticket.moved.set()
+
+
+# Shared admission control for edit jobs from every entry point
+edit_admission = EditAdmissionController(
+    max_running=settings.EDIT_JOB_MAX_RUNNING,
+    max_queued=settings.EDIT_JOB_MAX_QUEUED,
+)
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Set
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyFailedError(Exception):
+    """A node was skipped because one of its prerequisites failed"""
+
+    def __init__(self, key: str, prerequisite: str):
+        self.key = key
+        self.prerequisite = prerequisite
+        super().__init__(f"Skipped {key}: prerequisite {prerequisite} failed")
+
+
+class DependencyCycleError(Exception):
+    """A node can never run because its prerequisites form a cycle"""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Skipped {key}: its prerequisites form a cycle")
+
+
+@dataclass
+class DagNode:
+    """
+    A unit of work. ``run`` receives the results of its prerequisites keyed by
+    node key; a node that raises fails every node that depends on it.
+    """
+
+    key: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]
+    deps: Set[str] = field(default_factory=set)
+
+
+def _cyclic_keys(nodes: Dict[str, DagNode]) -> Set[str]:
+    """Keys that can never become ready: members of a cycle or downstream of one"""
+    indegree = {key: len(node.deps) for key, node in nodes.items()}
+    dependents: Dict[str, List[str]] = {key: [] for key in nodes}
+    for key, node in nodes.items():
+        for dep in node.deps:
+            dependents[dep].append(key)
+
+    ready = [key for key, count in indegree.items() if count == 0]
+    while ready:
+        key = ready.pop()
+        for dependent in dependents[key]:
+            indegree[dependent] -= 1
+            if indegree[dependent] == 0:
+                ready.append(dependent)
+    return {key for key, count in indegree.items() if count > 0}
+
+
+async def run_dag(nodes: Iterable[DagNode], max_concurrency: int) -> Dict[str, Any]:
+    """
+    Run ``nodes`` as soon as their own prerequisites finish, with at most
+    ``max_concurrency`` running at once.
+
+    Returns a result per key: the node's return value, or the exception it
+    raised. Nodes downstream of a failure get DependencyFailedError and nodes
+    caught in a cycle get DependencyCycleError; neither is run.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    graph = {node.key: node for node in nodes}
+    for node in graph.values():
+        unknown = node.deps - graph.keys()
+        if unknown:
+            raise ValueError(f"{node.key} depends on unknown nodes: {sorted(unknown)}")
+
+    results: Dict[str, Any] = {}
+    for key in _cyclic_keys(graph):
+        results[key] = DependencyCycleError(key)
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    pending = {key: set(node.deps) for key, node in graph.items() if key not in results}
+    dependents: Dict[str, List[str]] = {key: [] for key in graph}
+    for key in pending:
+        for dep in graph[key].deps:
+            dependents[dep].append(key)
+
+    async def execute(node: DagNode) -> None:
+        async with semaphore:
+            try:
+                results[node.key] = await node.run({dep: results[dep] for dep in node.deps})
+            except Exception as e:
+                logger.info(f"DAG node {node.key} failed: {e}")
+                results[node.key] = e
+
+    def skip_downstream(key: str) -> None:
+        for dependent in dependents[key]:
+            if dependent in pending:
+                del pending[dependent]
+                results[dependent] = DependencyFailedError(dependent, key)
+                skip_downstream(dependent)
+
+    running: Dict[asyncio.Task, str] = {}
+
+    def launch_ready() -> None:
+        for key in [key for key, deps in pending.items() if not deps]:
+            del pending[key]
+            running[asyncio.create_task(execute(graph[key]))] = key
+
+    try:
+        launch_ready()
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                key = running.pop(task)
+                if isinstance(results[key], Exception):
+                    skip_downstream(key)
+                for dependent in dependents[key]:
+                    if dependent in pending:
+                        pending[dependent].discard(key)
+            launch_ready()
+    finally:
+        for task in running:
+            task.cancel()
+
+    return results
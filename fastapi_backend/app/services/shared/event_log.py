@@ -0,0 +1,43 @@
+import asyncio
+from collections import deque
+from typing import Deque, List, Tuple
+
+
+class SessionEventLog:
+    """
+    Bounded log of the messages sent to one session, numbered from
+    ``start + 1``. A client that reconnects passes the last number it saw
+    and gets the retained messages after it.
+
+    ``lock`` is held while a message is numbered and published, and while a
+    replay is published, so replayed and live messages reach the bus in
+    sequence order.
+    """
+
+    def __init__(self, max_size: int, start: int = 0):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self._entries: Deque[Tuple[int, str]] = deque(maxlen=max_size)
+        self.last_seq = start
+        self.size_bytes = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def next_seq(self) -> int:
+        return self.last_seq + 1
+
+    def append(self, message: str) -> int:
+        """Record ``message`` under the next sequence number and return it"""
+        self.last_seq += 1
+        if len(self._entries) == self._entries.maxlen:
+            self.size_bytes -= len(self._entries[0][1])
+        self._entries.append((self.last_seq, message))
+        self.size_bytes += len(message)
+        return self.last_seq
+
+    def since(self, seq: int) -> List[Tuple[int, str]]:
+        """Retained ``(seq, message)`` entries after ``seq``, oldest first"""
+        return [entry for entry in self._entries if entry[0] > seq]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, FrozenSet, Optional, Tuple
+
+# Event types where only the latest queued one matters
+COALESCED_EVENT_TYPES: FrozenSet[str] = frozenset({"progress"})
+
+SLOW_CONSUMER_POLICIES = ("drop_progress", "disconnect")
+
+
+class SlowConsumerError(Exception):
+    """The client is not keeping up and the queue has no room left"""
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        super().__init__(f"Send queue full ({depth} messages)")
+
+
+@dataclass
+class _Entry:
+    message: str
+    event_type: Optional[str]
+    header: Any
+    enqueued_at: float
+
+
+@dataclass
+class OutboxStats:
+    sent: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+    max_depth: int = 0
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def record_send(self, latency: float) -> None:
+        self.sent += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "max_depth": self.max_depth,
+            "avg_send_latency": self.latency_total / self.sent if self.sent else 0.0,
+            "max_send_latency": self.latency_max,
+        }
+
+
+class SessionOutbox:
+    """
+    Bounded queue of messages waiting to be written to one client.
+
+    A queued event of a type in ``coalesce_types`` is replaced by the next
+    one of the same type, which moves to the back of the queue. When the
+    queue is full the ``policy`` decides: ``drop_progress`` drops the oldest
+    coalescable message (or the incoming one, if that is coalescable) and
+    only gives up when everything queued matters, ``disconnect`` gives up
+    straight away. Giving up raises SlowConsumerError.
+    """
+
+    def __init__(
+        self,
+        max_size: int,
+        policy: str = "drop_progress",
+        coalesce_types: FrozenSet[str] = COALESCED_EVENT_TYPES,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        if policy not in SLOW_CONSUMER_POLICIES:
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.max_size = max_size
+        self.policy = policy
+        self.coalesce_types = coalesce_types
+        self._entries: Deque[_Entry] = deque()
+        self._ready = asyncio.Event()
+        self.stats = OutboxStats()
+
+    @property
+    def depth(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size_bytes(self) -> int:
+        """Characters of message text waiting to be sent"""
+        return sum(len(entry.message) for entry in self._entries)
+
+    def _remove_first(self, event_type: Optional[str] = None) -> bool:
+        """Remove the oldest coalescable entry (of ``event_type`` if given)"""
+        for entry in self._entries:
+            if entry.event_type in self.coalesce_types and event_type in (None, entry.event_type):
+                self._entries.remove(entry)
+                return True
+        return False
+
+    def put(self, message: str, event_type: Optional[str] = None, header: Any = None) -> None:
+        """
+        Queue ``message``, with a ``header`` handed back by ``get``, without
+        waiting; raises SlowConsumerError when it cannot
+        """
+        coalescable = event_type in self.coalesce_types
+        if coalescable and self._remove_first(event_type):
+            self.stats.coalesced += 1
+
+        if len(self._entries) >= self.max_size:
+            if self.policy == "disconnect":
+                raise SlowConsumerError(len(self._entries))
+            if self._remove_first():
+                self.stats.dropped += 1
+            elif coalescable:
+                self.stats.dropped += 1
+                return
+            else:
+                raise SlowConsumerError(len(self._entries))
+
+        self._entries.append(_Entry(message, event_type, header, time.monotonic()))
+        self.stats.max_depth = max(self.stats.max_depth, len(self._entries))
+        self._ready.set()
+
+    async def get(self) -> Tuple[str, Any, float]:
+        """Next message, its header and when it was queued (``time.monotonic()``)"""
+        while not self._entries:
+            self._ready.clear()
+            await self._ready.wait()
+        entry = self._entries.popleft()
+        return entry.message, entry.header, entry.enqueued_at
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"depth": self.depth, "policy": self.policy, **self.stats.as_dict()}
@@ -0,0 +1,188 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from app.config import settings
+from app.core.logging import PerformanceLogger
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+# Lower rank is served first
+PRIORITY_RANKS: Dict[str, int] = {"high": 0, "medium": 1, "low": 2}
+DEFAULT_PRIORITY = "medium"
+
+
+@dataclass
+class _Waiter:
+    """A queued request for a run slot"""
+
+    rank: int
+    session_id: str
+    seq: int
+    priority: str
+    enqueued_at: float
+    future: asyncio.Future = field(repr=False)
+
+
+@dataclass
+class _WaitStats:
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def record(self, wait: float) -> None:
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_wait": self.total / self.count if self.count else 0.0,
+            "max_wait": self.max,
+        }
+
+
+class AgentRunScheduler:
+    """
+    Bounded scheduler for agent runs shared by every editor session.
+
+    At most ``max_concurrency`` runs execute at once, and no single session may
+    hold more than ``max_per_session`` of them. Waiting runs are served by
+    priority (high, medium, low); within a priority the session with the fewest
+    runs in flight goes first, and ties are broken in arrival order so one busy
+    session cannot starve the others.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_session: int):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if max_per_session < 1:
+            raise ValueError("max_per_session must be at least 1")
+        self.max_concurrency = max_concurrency
+        self.max_per_session = max_per_session
+        self._waiters: List[_Waiter] = []
+        self._active: Dict[str, int] = {}
+        self._active_total = 0
+        self._seq = itertools.count()
+        self._wait_stats: Dict[str, _WaitStats] = defaultdict(_WaitStats)
+        self.perf_logger = PerformanceLogger("scheduler")
+
+    @property
+    def active(self) -> int:
+        """Number of runs currently holding a slot"""
+        return self._active_total
+
+    @property
+    def queued(self) -> int:
+        """Number of runs waiting for a slot"""
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of scheduler load and queue-wait metrics per priority"""
+        return {
+            "active": self._active_total,
+            "queued": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_per_session": self.max_per_session,
+            "sessions": dict(self._active),
+            "wait": {p: s.as_dict() for p, s in self._wait_stats.items()},
+        }
+
+    @asynccontextmanager
+    async def slot(
+        self, session_id: str, priority: Optional[str] = None
+    ) -> AsyncIterator[None]:
+        """Hold a run slot for the duration of the ``async with`` block"""
+        await self._acquire(session_id, priority or DEFAULT_PRIORITY)
+        try:
+            yield
+        finally:
+            self._release(session_id)
+
+    async def run(
+        self,
+        session_id: str,
+        priority: Optional[str],
+        func: Callable[[], Awaitable[T]],
+    ) -> T:
+        """Run ``func()`` once a slot is available for ``session_id``"""
+        async with self.slot(session_id, priority):
+            return await func()
+
+    async def _acquire(self, session_id: str, priority: str) -> None:
+        if priority not in PRIORITY_RANKS:
+            priority = DEFAULT_PRIORITY
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            rank=PRIORITY_RANKS[priority],
+            session_id=session_id,
+            seq=next(self._seq),
+            priority=priority,
+            enqueued_at=time.monotonic(),
+            future=loop.create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            elif waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just before cancellation; hand it back
+                self._release(session_id)
+            raise
+
+        wait = time.monotonic() - waiter.enqueued_at
+        self._wait_stats[priority].record(wait)
+        self.perf_logger.log_operation(
+            "scheduler.queue_wait",
+            wait,
+            session_id=session_id,
+            priority=priority,
+            active=self._active_total,
+            queued=len(self._waiters),
+        )
+
+    def _release(self, session_id: str) -> None:
+        self._active[session_id] -= 1
+        if self._active[session_id] <= 0:
+            del self._active[session_id]
+        self._active_total -= 1
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Grant slots to the best eligible waiters while capacity remains"""
+        while self._active_total < self.max_concurrency and self._waiters:
+            eligible = [
+                w
+                for w in self._waiters
+                if self._active.get(w.session_id, 0) < self.max_per_session
+            ]
+            if not eligible:
+                return
+            waiter = min(
+                eligible, key=lambda w: (w.rank, self._active.get(w.session_id, 0), w.seq)
+            )
+            self._waiters.remove(waiter)
+            if waiter.future.done():
+                continue
+            self._active[waiter.session_id] = self._active.get(waiter.session_id, 0) + 1
+            self._active_total += 1
+            waiter.future.set_result(None)
+
+
+# Shared scheduler for edit_content_agent runs across all sessions
+edit_agent_scheduler = AgentRunScheduler(
+    max_concurrency=settings.EDIT_AGENT_MAX_CONCURRENCY,
+    max_per_session=settings.EDIT_AGENT_MAX_CONCURRENCY_PER_SESSION,
+)
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One shared run: everything it has produced so far and who is listening"""
+
+    def __init__(self):
+        self.history: List[Any] = []
+        self.subscribers = 0
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class SingleFlight:
+    """
+    Share one run of an async event stream between identical concurrent
+    requests.
+
+    The first caller for a key starts the stream; callers arriving while it
+    is in flight get everything it has produced so far and then its live
+    events, ending (or raising) as it does. The run is cancelled once every
+    subscriber has gone. Finished runs are forgotten, so a later call
+    starts afresh.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "in_flight": len(self._flights),
+            "subscribers": sum(flight.subscribers for flight in self._flights.values()),
+            "started": self.started,
+            "joined": self.joined,
+        }
+
+    async def join(self, key: Hashable, start: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """Events of the run for ``key``, starting it with ``start()`` if none is in flight"""
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.create_task(self._run(key, flight, start()))
+            self.started += 1
+        else:
+            self.joined += 1
+            logger.info(f"Joining in-flight run for {key!r}")
+
+        flight.subscribers += 1
+        position = 0
+        try:
+            while True:
+                if position < len(flight.history):
+                    position += 1
+                    yield flight.history[position - 1]
+                    continue
+                if flight.done:
+                    break
+                await flight.changed.wait()
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                flight.task.cancel()
+
+    async def _run(self, key: Hashable, flight: _Flight, stream: AsyncIterator[Any]) -> None:
+        try:
+            async for event in stream:
+                flight.history.append(event)
+                flight.notify()
+        except asyncio.CancelledError:
+            flight.error = asyncio.CancelledError()
+        except Exception as e:
+            flight.error = e
+        finally:
+            flight.done = True
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            flight.notify()
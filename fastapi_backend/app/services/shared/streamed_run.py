@@ -0,0 +1,175 @@
+import time
+from typing import AsyncIterator, FrozenSet, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from agents import Agent, Runner
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Location of a string in a JSON document: object keys and array indexes
+JSONPath = List[object]
+
+_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class PartialJSONTextReader:
+    """
+    Reads a JSON document as it arrives in fragments and returns the decoded
+    text of string values stored under one of ``fields``, as soon as each
+    character is known. Structured agent output is JSON, so this turns the
+    model's raw deltas into the text of, say, the markdown being written.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields: FrozenSet[str] = frozenset(fields)
+        # One entry per open container: [kind, current key or index]
+        self._stack: List[list] = []
+        self._expect_key = False
+        self._in_string = False
+        self._is_key = False
+        self._streaming = False
+        self._key: List[str] = []
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+
+    def _path(self) -> JSONPath:
+        return [entry[1] for entry in self._stack]
+
+    def feed(self, fragment: str) -> List[Tuple[JSONPath, str]]:
+        """Text decoded from ``fragment``, as ``(path, text)`` pieces"""
+        pieces: List[Tuple[JSONPath, str]] = []
+        text: List[str] = []
+
+        def emit(char: str) -> None:
+            if self._is_key:
+                self._key.append(char)
+            elif self._streaming:
+                text.append(char)
+
+        for char in fragment:
+            if not self._in_string:
+                if char == '"':
+                    self._in_string = True
+                    self._is_key = self._expect_key and bool(self._stack) and self._stack[-1][0] == "{"
+                    self._streaming = (
+                        not self._is_key
+                        and bool(self._stack)
+                        and self._stack[-1][0] == "{"
+                        and self._stack[-1][1] in self.fields
+                    )
+                    self._key = []
+                elif char == "{":
+                    self._stack.append(["{", None])
+                    self._expect_key = True
+                elif char == "[":
+                    self._stack.append(["[", 0])
+                elif char in "}]":
+                    if self._stack:
+                        self._stack.pop()
+                elif char == ",":
+                    if self._stack and self._stack[-1][0] == "[":
+                        self._stack[-1][1] += 1
+                    self._expect_key = bool(self._stack) and self._stack[-1][0] == "{"
+                elif char == ":":
+                    self._expect_key = False
+                continue
+
+            if self._escape is not None:
+                self._escape += char
+                if self._escape[0] != "u":
+                    emit(_ESCAPES.get(char, char))
+                    self._escape = None
+                elif len(self._escape) == 5:
+                    code = int(self._escape[1:], 16)
+                    self._escape = None
+                    if 0xD800 <= code < 0xDC00:
+                        self._high_surrogate = code
+                    elif 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                        emit(chr(0x10000 + ((self._high_surrogate - 0xD800) << 10) + code - 0xDC00))
+                        self._high_surrogate = None
+                    else:
+                        emit(chr(code))
+            elif char == "\\":
+                self._escape = ""
+            elif char == '"':
+                self._in_string = False
+                if self._is_key:
+                    self._stack[-1][1] = "".join(self._key)
+                    self._is_key = False
+                if text:
+                    pieces.append((self._path(), "".join(text)))
+                    text = []
+                self._streaming = False
+            else:
+                emit(char)
+
+        if text:
+            pieces.append((self._path(), "".join(text)))
+        return pieces
+
+
+class StreamedAgentRun:
+    """
+    An agent run started with ``Runner.run_streamed``. ``deltas()`` yields
+    the text of ``fields`` in the agent's structured output while the model
+    writes it, batched to at most one flush every ``flush_interval`` seconds
+    (the first goes out at once). The model starts writing while the
+    agent's input guardrails are still running, so nothing is yielded until
+    every one of them has a result and none tripped; text held when the run
+    ends without that is dropped, since the final output carries it. After
+    it is exhausted the final output is available as with ``Runner.run``.
+    Errors of the run, guardrail tripwires included, are raised from
+    ``deltas()``.
+    """
+
+    def __init__(
+        self,
+        agent: Agent,
+        input: str,
+        fields: Iterable[str],
+        flush_interval: float = settings.AGENT_DELTA_FLUSH_SECONDS,
+    ):
+        self.result = Runner.run_streamed(agent, input)
+        self.reader = PartialJSONTextReader(fields)
+        self.flush_interval = flush_interval
+        self.guardrails = len(getattr(agent, "input_guardrails", None) or [])
+
+    def _guardrails_passed(self) -> bool:
+        # Tripped results are recorded too, before the tripwire is raised,
+        # and some SDK versions only fill the list once every guardrail is done
+        results = self.result.input_guardrail_results
+        return len(results) >= self.guardrails and not any(
+            result.output.tripwire_triggered for result in results
+        )
+
+    async def deltas(self) -> AsyncIterator[Tuple[JSONPath, str]]:
+        held: List[Tuple[JSONPath, str]] = []
+        last_flush = float("-inf")
+        try:
+            async for event in self.result.stream_events():
+                if event.type != "raw_response_event" or getattr(event.data, "type", None) != "response.output_text.delta":
+                    continue
+                for path, text in self.reader.feed(event.data.delta):
+                    if held and held[-1][0] == path:
+                        held[-1] = (path, held[-1][1] + text)
+                    else:
+                        held.append((path, text))
+                if (
+                    held
+                    and self._guardrails_passed()
+                    and time.monotonic() - last_flush >= self.flush_interval
+                ):
+                    for piece in held:
+                        yield piece
+                    held = []
+                    last_flush = time.monotonic()
+            if self._guardrails_passed():
+                for piece in held:
+                    yield piece
+        finally:
+            if not self.result.is_complete:
+                self.result.cancel()
+
+    def final_output_as(self, cls: Type[T]) -> T:
+        return self.result.final_output_as(cls)
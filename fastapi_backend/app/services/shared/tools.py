@@ -3,6 +3,7 @@ from pydantic import BaseModel
 from agents import function_tool
 from app.supabase import supabase
 from app.services.openai_service import create_embedding
+from app.core.repositories.content_repository import ContentRepository
 from app.config import settings
 
 
@@ -88,7 +89,8 @@ class DatabaseTool:
                     f"Version {version} not found for document {document_id}"
                 )
 
-            content = content_result.data[0]
+            # Older versions may be stored as deltas
+            content = (await ContentRepository.materialize(content_result.data[:1]))[0]
 
             return Document(
                 id=document_id,
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 from typing_extensions import Literal
 from app.services.openai_service import create_embedding
 from app.services.shared.models import ApiRef
+from app.core.services.document_service import head_versions
 from app.supabase import supabase
 import asyncio
 from agents import RunContextWrapper, function_tool, Agent
@@ -170,11 +171,49 @@ async def get_all_document_summaries(
                 is_api_ref=doc.get("is_api_ref", False),
             )
         )
+    documents.extend(_secondary_language_documents(raw_docs))
     if not documents:
         return SimilarDocumentsResponse(documents=[])
     return SimilarDocumentsResponse(documents=documents)
 
 
+def _secondary_language_documents(raw_docs: List[dict]) -> List[Document]:
+    """Current versions of multilingual documents in their other languages"""
+    secondary = {
+        version: doc
+        for doc in raw_docs
+        for version in (doc.get("language_versions") or {}).values()
+        if version != doc.get("current_version_id")
+    }
+    if not secondary:
+        return []
+    contents = (
+        supabase.table("document_contents")
+        .select("version, summary, language, keywords_array, urls_array")
+        .in_("version", list(secondary))
+        .execute()
+    ).data
+    documents = []
+    for content in contents:
+        doc = secondary[content["version"]]
+        documents.append(
+            Document(
+                id=doc["id"],
+                title=doc.get("title"),
+                version=content.get("version", ""),
+                markdown_content=None,
+                summary=content.get("summary", ""),
+                similarity=None,
+                path=doc.get("path", ""),
+                language=content.get("language", "en"),
+                keywords_array=content.get("keywords_array", []),
+                urls_array=content.get("urls_array", []),
+                is_api_ref=doc.get("is_api_ref", False),
+            )
+        )
+    return documents
+
+
 @function_tool
 async def get_document_by_version(config: FetchDocumentConfiguration) -> Document:
     """
@@ -201,33 +240,27 @@ async def get_document_by_version(config: FetchDocumentConfiguration) -> Documen
     """
     document_id = config.document_id
     version = config.version
-    response = (
+    result = (
         supabase.table("documents")
-        .select(
-            """
-                *,
-                document_contents:current_version_id (
-                    version,
-                    summary,
-                    language,
-                    keywords_array,
-                    urls_array,
-                    markdown_content
-                )
-            """
-        )
+        .select("*")
         .eq("id", document_id)
-        .eq("current_version_id", version)
         .eq("is_deleted", False)
-        .single()
+        .execute()
     )
-    result = response.execute()
-    if not result.data:
+    doc = result.data[0] if result.data else None
+    # Only a current version (of any language) can be edited
+    if not doc or version not in head_versions(doc):
         raise Exception(
             f"Document with ID {document_id} and version {version} not found."
         )
-    doc = result.data
-    content = doc.get("document_contents", {})
+    contents = (
+        supabase.table("document_contents")
+        .select("version, summary, language, keywords_array, urls_array, markdown_content")
+        .eq("document_id", document_id)
+        .eq("version", version)
+        .execute()
+    ).data
+    content = contents[0] if contents else None
     if not content:
         raise Exception(
             f"Document content for ID {document_id} and version {version} not found."
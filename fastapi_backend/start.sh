@@ -1,12 +1,17 @@
 #!/bin/bash
 
+# permessage-deflate on the edit socket, from the environment or .env
+# (true by default; false saves CPU on fast links)
+WS_PER_MESSAGE_DEFLATE="${WS_PER_MESSAGE_DEFLATE:-$(sed -n 's/^WS_PER_MESSAGE_DEFLATE=//p' .env 2>/dev/null)}"
+WS_PER_MESSAGE_DEFLATE="${WS_PER_MESSAGE_DEFLATE:-true}"
+
 if [ -f /.dockerenv ]; then
     echo "Running in Docker"
-    fastapi dev app/main.py --host 0.0.0.0 --port 8000 --reload &
+    uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --ws websockets --ws-per-message-deflate "$WS_PER_MESSAGE_DEFLATE" &
     python watcher.py
 else
     echo "Running locally with uv"
-    uv run fastapi dev app/main.py --host 0.0.0.0 --port 8000 --reload &
+    uv run uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload --ws websockets --ws-per-message-deflate "$WS_PER_MESSAGE_DEFLATE" &
     uv run python watcher.py
 fi
 
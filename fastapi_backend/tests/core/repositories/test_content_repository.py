@@ -1,7 +1,8 @@
 import pytest
-from unittest.mock import patch, MagicMock
-from app.core.repositories.content_repository import ContentRepository
+from unittest.mock import AsyncMock, patch, MagicMock
+from app.core.repositories.content_repository import CONTENT_COLUMNS, ContentRepository, version_cache
 from app.core.exceptions import DocumentNotFoundError, DocumentCreationError, DocumentUpdateError
+from app.core.repositories.revision import corpus_revision
 
 
 class TestContentRepository:
@@ -34,12 +35,14 @@ class TestContentRepository:
             "markdown_content": "# Test Content"
         }
         
+        revision = corpus_revision.value
         result = await ContentRepository.create_content(content_data)
         
         assert result["id"] == "content-id"
         assert result["document_id"] == "doc-id"
         assert result["version"] == "1.0"
         mock_table.insert.assert_called_once_with(content_data)
+        assert corpus_revision.value == revision + 1
     
     @pytest.mark.asyncio
     @patch('app.core.repositories.content_repository.supabase')
@@ -64,6 +67,18 @@ class TestContentRepository:
         with pytest.raises(DocumentCreationError, match="Database connection error"):
             await ContentRepository.create_content({"document_id": "test", "version": "1.0"})
     
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.content_repository.supabase')
+    async def test_delete_content(self, mock_supabase):
+        """Test deleting one version by id"""
+        mock_table = MagicMock()
+        mock_supabase.table.return_value = mock_table
+        
+        await ContentRepository.delete_content("v2")
+        
+        mock_supabase.table.assert_called_once_with("document_contents")
+        mock_table.delete.return_value.eq.assert_called_once_with("version", "v2")
+    
     @pytest.mark.asyncio
     @patch('app.core.repositories.content_repository.supabase')
     async def test_get_document_versions_success(self, mock_supabase):
@@ -91,7 +106,7 @@ class TestContentRepository:
         assert len(result) == 2
         assert result[0]["version"] == "2.0"  # Should be ordered by created_at desc
         assert result[1]["version"] == "1.0"
-        mock_table.select.assert_called_once_with("*")
+        mock_table.select.assert_called_once_with(CONTENT_COLUMNS)
         mock_select.eq.assert_called_once_with("document_id", "doc-id")
         mock_eq.order.assert_called_once_with("created_at", desc=True)
     
@@ -186,3 +201,113 @@ class TestContentRepository:
         
         with pytest.raises(DocumentUpdateError, match="Database error"):
             await ContentRepository.get_latest_version("doc-id", "1.0")
+
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.content_repository.supabase')
+    async def test_apply_versions_single_rpc(self, mock_supabase):
+        """Test batched versions are committed through one RPC"""
+        items = [{"document_id": "a"}, {"document_id": "b"}]
+        mock_supabase.rpc.return_value.execute.return_value = MagicMock(data=[
+            {"document_id": "a", "version": "v2", "status": "applied"},
+            {"document_id": "b", "version": None, "status": "conflict"},
+        ])
+
+        result = await ContentRepository.apply_versions(items)
+
+        mock_supabase.rpc.assert_called_once_with("apply_document_versions", {"items": items})
+        assert [r["status"] for r in result] == ["applied", "conflict"]
+
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.content_repository.supabase')
+    async def test_apply_versions_unexpected_result(self, mock_supabase):
+        """Test a result that does not cover every item is rejected"""
+        mock_supabase.rpc.return_value.execute.return_value = MagicMock(data=[])
+
+        with pytest.raises(DocumentCreationError):
+            await ContentRepository.apply_versions([{"document_id": "a"}])
+
+
+def _chain(length):
+    """Rows of a keyframe followed by ``length`` delta-encoded versions"""
+    from app.services.delta import make_delta
+
+    contents = [f"# Doc\n\nline {i}\n" + "shared line\n" * 20 for i in range(length + 1)]
+    rows = [{"version": "v0", "markdown_content": contents[0], "delta": None, "delta_depth": 0}]
+    for i in range(1, length + 1):
+        rows.append({
+            "version": f"v{i}",
+            "markdown_content": None,
+            "base_version": f"v{i - 1}",
+            "keyframe_version": "v0",
+            "delta": make_delta(contents[i - 1], contents[i]),
+            "delta_depth": i,
+        })
+    return rows, contents
+
+
+class TestDeltaStorage:
+    """Test delta-encoded version storage"""
+
+    def setup_method(self):
+        version_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_materialize_rebuilds_chain_in_one_fetch(self):
+        """A delta version is rebuilt from its keyframe chain, fetched once, and cached"""
+        rows, contents = _chain(5)
+
+        with patch.object(ContentRepository, "_fetch_chain", AsyncMock(return_value=rows)) as fetch:
+            [row] = await ContentRepository.materialize([dict(rows[5])])
+            [again] = await ContentRepository.materialize([dict(rows[4])])
+
+        assert row["markdown_content"] == contents[5]
+        assert "delta" not in row and "base_version" not in row
+        assert again["markdown_content"] == contents[4]
+        fetch.assert_called_once_with("v0")
+
+    @pytest.mark.asyncio
+    async def test_materialize_history_needs_no_fetch(self):
+        """A full history scan rebuilds every version from the rows in hand"""
+        rows, contents = _chain(3)
+
+        with patch.object(ContentRepository, "_fetch_chain", AsyncMock()) as fetch:
+            result = await ContentRepository.materialize([dict(row) for row in reversed(rows)])
+
+        assert [row["markdown_content"] for row in result] == contents[::-1]
+        fetch.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.content_repository.supabase')
+    async def test_compact_version_writes_delta(self, mock_supabase):
+        """A replaced version is rewritten as a delta from its base"""
+        rows, contents = _chain(2)
+        old = {"version": "v3", "markdown_content": contents[2] + "more\n", "base_version": "v2",
+               "keyframe_version": None, "delta": None, "delta_depth": 0}
+        rows[2]["markdown_content"] = contents[2]
+        rows[2]["delta"] = None
+
+        with patch.object(ContentRepository, "get_chain_row", AsyncMock(side_effect=[old, rows[2]])):
+            assert await ContentRepository.compact_version("v3")
+
+        update = mock_supabase.table.return_value.update.call_args.args[0]
+        assert update["markdown_content"] is None
+        assert update["embedding"] is None
+        assert update["delta_depth"] == 3
+        assert update["keyframe_version"] == "v0"
+        assert version_cache.get("v3") == old["markdown_content"]
+
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.content_repository.supabase')
+    @patch('app.core.repositories.content_repository.settings')
+    async def test_compact_version_keeps_keyframe(self, mock_settings, mock_supabase):
+        """Every VERSION_KEYFRAME_INTERVAL versions the replaced version stays full"""
+        mock_settings.VERSION_KEYFRAME_INTERVAL = 3
+        rows, contents = _chain(2)
+        old = {"version": "v3", "markdown_content": contents[2], "base_version": "v2",
+               "keyframe_version": None, "delta": None, "delta_depth": 0}
+
+        with patch.object(ContentRepository, "get_chain_row", AsyncMock(side_effect=[old, rows[2]])):
+            assert not await ContentRepository.compact_version("v3")
+
+        update = mock_supabase.table.return_value.update.call_args.args[0]
+        assert update == {"embedding": None}
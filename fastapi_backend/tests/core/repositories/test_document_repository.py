@@ -1,7 +1,12 @@
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from app.core.repositories.document_repository import DocumentRepository
-from app.core.exceptions import DocumentNotFoundError, DocumentCreationError, DocumentUpdateError
+from app.core.exceptions import (
+    DocumentNotFoundError,
+    DocumentCreationError,
+    DocumentUpdateError,
+    DocumentVersionConflictError,
+)
 
 
 class TestDocumentRepository:
@@ -382,6 +387,59 @@ class TestDocumentRepository:
         with pytest.raises(DocumentNotFoundError):
             await DocumentRepository.update_current_version("nonexistent-id", "version-123")
     
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.document_repository.supabase')
+    async def test_get_documents_by_ids(self, mock_supabase):
+        """Test several documents are fetched with one IN query"""
+        mock_result = MagicMock()
+        mock_result.data = [{"id": "a"}, {"id": "b"}]
+        mock_supabase.table.return_value.select.return_value.in_.return_value.execute.return_value = mock_result
+        
+        result = await DocumentRepository.get_documents_by_ids(["b", "a", "b"])
+        
+        assert result == mock_result.data
+        mock_supabase.table.return_value.select.return_value.in_.assert_called_once_with("id", ["a", "b"])
+        assert await DocumentRepository.get_documents_by_ids([]) == []
+    
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.document_repository.supabase')
+    async def test_update_current_version_compare_and_swap(self, mock_supabase):
+        """Test the expected version is part of the update filter"""
+        mock_result = MagicMock()
+        mock_result.data = [{"id": "test-id", "current_version_id": "version-2"}]
+        
+        mock_query = MagicMock()
+        mock_query.eq.return_value = mock_query
+        mock_query.execute.return_value = mock_result
+        mock_table = MagicMock()
+        mock_table.update.return_value = mock_query
+        mock_supabase.table.return_value = mock_table
+        
+        await DocumentRepository.update_current_version(
+            "test-id", "version-2", expected_version_id="version-1"
+        )
+        
+        mock_query.eq.assert_any_call("current_version_id", "version-1")
+    
+    @pytest.mark.asyncio
+    @patch('app.core.repositories.document_repository.supabase')
+    async def test_update_current_version_conflict(self, mock_supabase):
+        """Test a lost compare-and-swap raises a version conflict"""
+        mock_result = MagicMock()
+        mock_result.data = []
+        
+        mock_query = MagicMock()
+        mock_query.eq.return_value = mock_query
+        mock_query.execute.return_value = mock_result
+        mock_table = MagicMock()
+        mock_table.update.return_value = mock_query
+        mock_supabase.table.return_value = mock_table
+        
+        with pytest.raises(DocumentVersionConflictError):
+            await DocumentRepository.update_current_version(
+                "test-id", "version-2", expected_version_id="version-1"
+            )
+    
     @pytest.mark.asyncio
     @patch('app.core.repositories.document_repository.supabase')
     async def test_delete_document_success(self, mock_supabase):
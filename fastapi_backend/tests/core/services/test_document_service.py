@@ -1,8 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.core.services.document_service import DocumentService
+from app.core.services.document_service import DocumentService, diff_cache
 from app.models.documents import DocumentCreate, DocumentContentCreate
-from app.core.exceptions import ValidationError, DocumentNotFoundError
+from app.core.exceptions import ValidationError, DocumentNotFoundError, DocumentVersionConflictError
 
 
 class TestDocumentService:
@@ -311,3 +311,280 @@ class TestDocumentService:
         mock_doc_repo.get_all_documents.assert_called_once_with(False, True, None)
         # build_tree is called multiple times (once for each language and document type)
         assert mock_build_tree.call_count > 0
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_document_version_stale_base(self, mock_content_repo_class, mock_doc_repo_class):
+        """Test a stale expected version fails before a version is inserted"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-123", "current_version_id": "v2"}
+        )
+        
+        service = DocumentService()
+        with pytest.raises(DocumentVersionConflictError):
+            await service.create_document_version(
+                "doc-123",
+                DocumentContentCreate(markdown_content="# New", language="en"),
+                expected_version_id="v1",
+            )
+        
+        mock_content_repo.create_content.assert_not_called()
+        mock_doc_repo.update_current_version.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.process_document_content')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_document_version_lost_race_deletes_version(self, mock_content_repo_class, mock_doc_repo_class, mock_process_content):
+        """Test a version whose pointer swap loses the race is deleted again"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-123", "current_version_id": "v1"}
+        )
+        mock_doc_repo.update_current_version = AsyncMock(
+            side_effect=DocumentVersionConflictError("doc-123", "v1")
+        )
+        mock_process_content.return_value = {}
+        mock_content_repo.create_content = AsyncMock(return_value={"version": "v2"})
+        
+        service = DocumentService()
+        with pytest.raises(DocumentVersionConflictError):
+            await service.create_document_version(
+                "doc-123",
+                DocumentContentCreate(markdown_content="# New", language="en"),
+                expected_version_id="v1",
+            )
+        
+        mock_content_repo.delete_content.assert_called_once_with("v2")
+        mock_content_repo.compact_version.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.process_documents_content')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_multilingual_document(self, mock_content_repo_class, mock_doc_repo_class, mock_process_contents):
+        """Test one document is created with a linked version per language"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.create_document = AsyncMock(return_value={"id": "doc-123", "name": "guide"})
+        mock_process_contents.return_value = [
+            {"language": "en", "summary": "en"},
+            {"language": "ja", "summary": "ja"},
+        ]
+        mock_content_repo.create_contents = AsyncMock(return_value=[
+            {"version": "v-en", "language": "en"},
+            {"version": "v-ja", "language": "ja"},
+        ])
+        
+        service = DocumentService()
+        result = await service.create_multilingual_document(
+            DocumentCreate(name="guide", path="guide/"),
+            [
+                DocumentContentCreate(markdown_content="# Guide", language="en"),
+                DocumentContentCreate(markdown_content="# ガイド", language="ja"),
+            ],
+        )
+        
+        mock_doc_repo.create_document.assert_called_once()
+        mock_process_contents.assert_called_once_with([("# Guide", "en"), ("# ガイド", "ja")])
+        rows = mock_content_repo.create_contents.call_args.args[0]
+        assert [row["document_id"] for row in rows] == ["doc-123", "doc-123"]
+        mock_doc_repo.update_document.assert_called_once_with(
+            "doc-123",
+            {"current_version_id": "v-en", "language_versions": {"en": "v-en", "ja": "v-ja"}},
+        )
+        assert result["current_version_id"] == "v-en"
+        assert result["language_versions"] == {"en": "v-en", "ja": "v-ja"}
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.process_document_content')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_version_of_secondary_language(self, mock_content_repo_class, mock_doc_repo_class, mock_process_content):
+        """Test a new version of one language only moves that language's head"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(return_value={
+            "id": "doc-123",
+            "current_version_id": "v-en",
+            "language_versions": {"en": "v-en", "ja": "v-ja"},
+        })
+        mock_process_content.return_value = {"language": "ja"}
+        mock_content_repo.create_content = AsyncMock(return_value={"version": "v-ja-2", "language": "ja"})
+        
+        service = DocumentService()
+        await service.create_document_version(
+            "doc-123",
+            DocumentContentCreate(markdown_content="# 新しい", language="ja"),
+            expected_version_id="v-ja",
+        )
+        
+        mock_doc_repo.set_language_version.assert_called_once_with(
+            "doc-123", "ja", "v-ja-2", expected_version_id="v-ja"
+        )
+        mock_doc_repo.update_current_version.assert_not_called()
+        # The new version is based on the language head, which is then compacted
+        assert mock_content_repo.create_content.call_args.args[0]["base_version"] == "v-ja"
+        mock_content_repo.compact_version.assert_called_once_with("v-ja")
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.process_document_content')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_version_of_new_language_keeps_heads(self, mock_content_repo_class, mock_doc_repo_class, mock_process_content):
+        """Test a language's first version compacts nothing, though it is based on the primary head"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(return_value={
+            "id": "doc-123",
+            "current_version_id": "v-en",
+            "language_versions": {"en": "v-en", "ja": "v-ja"},
+        })
+        mock_process_content.return_value = {"language": "fr"}
+        mock_content_repo.create_content = AsyncMock(return_value={"version": "v-fr", "language": "fr"})
+        
+        service = DocumentService()
+        await service.create_document_version(
+            "doc-123", DocumentContentCreate(markdown_content="# Nouveau", language="fr")
+        )
+        
+        mock_doc_repo.set_language_version.assert_called_once_with(
+            "doc-123", "fr", "v-fr", expected_version_id=None
+        )
+        mock_content_repo.compact_version.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.process_document_content')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_create_version_without_language(self, mock_content_repo_class, mock_doc_repo_class, mock_process_content):
+        """Test a version without a language moves and compacts only the primary head"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(return_value={
+            "id": "doc-123",
+            "current_version_id": "v-en",
+            "language_versions": {"en": "v-en", "ja": "v-ja"},
+        })
+        mock_process_content.return_value = {}
+        mock_content_repo.create_content = AsyncMock(return_value={"version": "v-en-2", "language": None})
+        
+        service = DocumentService()
+        await service.create_document_version(
+            "doc-123", DocumentContentCreate(markdown_content="# New", language=None)
+        )
+        
+        mock_doc_repo.set_language_version.assert_called_once_with(
+            "doc-123", "en", "v-en-2", expected_version_id=None
+        )
+        mock_content_repo.compact_version.assert_called_once_with("v-en")
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.build_tree')
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_get_all_documents_multilingual(self, mock_content_repo_class, mock_doc_repo_class, mock_build_tree):
+        """Test a multilingual document yields one node per language tree"""
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_all_documents = AsyncMock(return_value=[{
+            "id": "doc-1",
+            "path": "guide/",
+            "is_api_ref": False,
+            "current_version_id": "v-en",
+            "language_versions": {"en": "v-en", "ja": "v-ja"},
+            "document_contents": {"markdown_content": "# Guide", "language": "en", "keywords_array": []},
+        }])
+        mock_content_repo.get_versions_by_ids = AsyncMock(return_value=[
+            {"version": "v-ja", "markdown_content": "# ガイド", "language": "ja", "keywords_array": ["ガイド"]},
+        ])
+        mock_build_tree.side_effect = lambda docs: docs
+        
+        with patch('app.core.services.document_service.settings') as mock_settings:
+            mock_settings.languages_list = ["en", "ja"]
+            service = DocumentService()
+            result = await service.get_all_documents()
+        
+        mock_content_repo.get_versions_by_ids.assert_called_once_with(["v-ja"])
+        assert [d["markdown_content"] for d in result["en"]["documentation"]] == ["# Guide"]
+        assert [d["markdown_content"] for d in result["ja"]["documentation"]] == ["# ガイド"]
+        assert result["ja"]["documentation"][0]["id"] == "doc-1"
+
+
+class TestDocumentDiff:
+    """Test server-side version diffs"""
+
+    def setup_method(self):
+        diff_cache.clear()
+
+    def _service(self, mock_doc_repo_class, mock_content_repo_class):
+        mock_doc_repo = AsyncMock()
+        mock_content_repo = AsyncMock()
+        mock_doc_repo_class.return_value = mock_doc_repo
+        mock_content_repo_class.return_value = mock_content_repo
+        mock_doc_repo.get_document_by_id = AsyncMock(return_value={"id": "doc-1", "current_version_id": "v2"})
+        page = "".join(f"line {i}\n" for i in range(100))
+        contents = {"v1": page, "v2": page.replace("line 10\n", "line ten\n").replace("line 80\n", "")}
+
+        async def get_document_version(doc_id, version_id):
+            return {"version": version_id, "markdown_content": contents[version_id]}
+
+        mock_content_repo.get_document_version = AsyncMock(side_effect=get_document_version)
+        return DocumentService(), mock_content_repo
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_diff_is_cached_per_version_pair(self, mock_content_repo_class, mock_doc_repo_class):
+        """A version pair is diffed once; `latest` resolves to the current version"""
+        service, content_repo = self._service(mock_doc_repo_class, mock_content_repo_class)
+
+        first = await service.get_document_diff("doc-1", "v1", "latest")
+        second = await service.get_document_diff("doc-1", "v1", "v2")
+
+        assert first == second
+        assert first.to_version == "v2"
+        assert (first.added, first.removed, first.total_hunks) == (1, 2, 2)
+        assert content_repo.get_document_version.call_count == 2
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_diff_pages_hunks(self, mock_content_repo_class, mock_doc_repo_class):
+        """Hunks are served a page at a time with the next page's offset"""
+        service, _ = self._service(mock_doc_repo_class, mock_content_repo_class)
+
+        page = await service.get_document_diff("doc-1", "v1", "v2", hunk_limit=1)
+        last = await service.get_document_diff("doc-1", "v1", "v2", hunk_offset=page.next_offset, hunk_limit=1)
+
+        assert len(page.hunks) == 1 and page.next_offset == 1
+        assert last.hunks[0].old_start > page.hunks[0].old_start
+        assert last.next_offset is None
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.document_service.DocumentRepository')
+    @patch('app.core.services.document_service.ContentRepository')
+    async def test_diff_rejects_negative_offset(self, mock_content_repo_class, mock_doc_repo_class):
+        """A negative hunk offset is a validation error"""
+        service, _ = self._service(mock_doc_repo_class, mock_content_repo_class)
+
+        with pytest.raises(ValidationError):
+            await service.get_document_diff("doc-1", "v1", "v2", hunk_offset=-1)
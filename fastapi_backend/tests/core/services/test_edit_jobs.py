@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from app.core.exceptions import JobNotFoundError
+from app.core.services.edit_jobs import EditJobStore, _current_owner, _owner_alive
+from app.models.edit_documentation import EditDocumentationRequest, EditDocumentationResponse
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EditJobStore(str(tmp_path / "jobs.db"), ttl=60)
+    yield store
+    store.close()
+
+
+class TestEditJobStore:
+    """Test the EditJobStore class"""
+
+    @pytest.mark.asyncio
+    async def test_job_lifecycle(self, store):
+        """A job moves from queued to running to succeeded with its result"""
+        request = EditDocumentationRequest(query="fix typos")
+
+        job = await store.create("j1", request)
+        assert job.status == "queued"
+        assert job.request == request
+
+        await store.mark_running("j1")
+        assert (await store.get("j1")).status == "running"
+
+        await store.succeed("j1", EditDocumentationResponse(), [{"message": "partial"}])
+        job = await store.get("j1")
+        assert job.status == "succeeded"
+        assert job.result == EditDocumentationResponse()
+        assert job.errors == [{"message": "partial"}]
+
+    @pytest.mark.asyncio
+    async def test_failed_job(self, store):
+        """A failed job keeps its error"""
+        await store.create("j1", EditDocumentationRequest(query="q"))
+
+        await store.fail("j1", "queue full")
+
+        job = await store.get("j1")
+        assert job.status == "failed"
+        assert job.error == "queue full"
+        assert job.result is None
+
+    @pytest.mark.asyncio
+    async def test_unknown_job(self, store):
+        """Getting a job that was never created raises JobNotFoundError"""
+        with pytest.raises(JobNotFoundError):
+            await store.get("missing")
+
+    @pytest.mark.asyncio
+    async def test_expired_job(self, store, monkeypatch):
+        """Jobs not updated within the TTL are gone"""
+        await store.create("j1", EditDocumentationRequest(query="q"))
+        now = time.time()
+        monkeypatch.setattr("app.core.services.edit_jobs.time.time", lambda: now + 61)
+
+        with pytest.raises(JobNotFoundError):
+            await store.get("j1")
+        store.purge_expired()
+        assert store._execute("SELECT COUNT(*) FROM edit_jobs")[0][0] == 0
+
+    @pytest.mark.asyncio
+    async def test_survives_restart(self, tmp_path, monkeypatch):
+        """Finished jobs survive reopening the store; unfinished ones of an exited worker are marked interrupted"""
+        path = str(tmp_path / "jobs.db")
+        monkeypatch.setattr("app.core.services.edit_jobs._current_owner", lambda: "previous-boot:1:1")
+        before = EditJobStore(path, ttl=60)
+        await before.create("done", EditDocumentationRequest(query="q"))
+        await before.succeed("done", EditDocumentationResponse(), [])
+        await before.create("running", EditDocumentationRequest(query="q"))
+        await before.mark_running("running")
+        before.close()
+        monkeypatch.undo()
+
+        after = EditJobStore(path, ttl=60)
+        try:
+            assert (await after.get("done")).status == "succeeded"
+            interrupted = await after.get("running")
+            assert interrupted.status == "failed"
+            assert "restart" in interrupted.error
+        finally:
+            after.close()
+
+    @pytest.mark.asyncio
+    async def test_live_worker_keeps_its_jobs(self, tmp_path):
+        """Opening the store in another worker leaves the jobs of running workers alone"""
+        path = str(tmp_path / "jobs.db")
+        worker = EditJobStore(path, ttl=60)
+        other = EditJobStore(path, ttl=60)
+        try:
+            await worker.create("queued", EditDocumentationRequest(query="q"))
+            await worker.create("running", EditDocumentationRequest(query="q"))
+            await worker.mark_running("running")
+
+            assert (await other.get("queued")).status == "queued"
+            assert (await other.get("running")).status == "running"
+        finally:
+            worker.close()
+            other.close()
+
+    def test_owner_alive(self):
+        """Only owners of this boot whose process is still the same one are alive"""
+        owner = _current_owner()
+        boot, pid, start = owner.split(":")
+
+        assert _owner_alive(owner)
+        assert not _owner_alive(f"another-boot:{pid}:{start}")
+        assert not _owner_alive(None)
+        if start:
+            assert not _owner_alive(f"{boot}:{pid}:{int(start) + 1}")
@@ -0,0 +1,780 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.exceptions import DocumentVersionConflictError, EditQueueFullError, IdempotencyKeyMismatchError
+from app.core.repositories.revision import corpus_revision
+from app.core.services.edit_service import EditService, edit_run_key, find_create_parents
+from app.core.services.idempotency import InProcessIdempotencyStore
+from app.models.edit_documentation import (
+    ChangeRequest,
+    DocumentEditWithOriginal,
+    EditDocumentationRequest,
+    EditDocumentationResponse,
+    OriginalContent,
+)
+from app.services.agents.create_content_agent import GeneratedDocument
+from app.services.agents.delete_content_agent import DocumentToDelete
+from app.models.websocket_events import ProgressEvent
+from app.services.shared.admission import EditAdmissionController
+from app.services.shared.models import ContentChange
+
+
+def _edit(markdown, changes, version="v1", document_id="doc-1"):
+    return DocumentEditWithOriginal(
+        document_id=document_id,
+        version=version,
+        changes=[ContentChange(old_string=o, new_string=n) for o, n in changes],
+        original_content=OriginalContent(markdown_content=markdown, language="en"),
+    )
+
+
+class TestEditService:
+    """Test the EditService class"""
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_process_single_edit_applies_changes(self, mock_repo_class, mock_doc_service_class):
+        """A clean patch is written as a new version"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-1", "is_deleted": False, "current_version_id": "v1"}
+        )
+        mock_create_version = AsyncMock(return_value={"version": "v2"})
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        success, error = await service.process_single_edit(
+            _edit("# Title\n\nOld text\n", [("Old text", "New text")])
+        )
+
+        assert success, error
+        content = mock_create_version.call_args.kwargs["content"]
+        assert content.markdown_content == "# Title\n\nNew text\n"
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_process_single_edit_reports_conflicts(self, mock_repo_class, mock_doc_service_class):
+        """Changes that cannot be applied fail the item instead of being dropped"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-1", "is_deleted": False, "current_version_id": "v1"}
+        )
+        mock_create_version = AsyncMock()
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        success, error = await service.process_single_edit(
+            _edit("Old text\n", [("Old text", "New text"), ("Missing text", "x")])
+        )
+
+        assert not success
+        assert "1 of 2 changes could not be applied" in error
+        mock_create_version.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.ContentRepository')
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_process_single_edit_merges_disjoint_concurrent_edit(
+        self, mock_repo_class, mock_doc_service_class, mock_content_repo_class
+    ):
+        """An edit based on a stale version is merged onto the current one"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-1", "is_deleted": False, "current_version_id": "v2"}
+        )
+        mock_content_repo_class.return_value.get_document_version = AsyncMock(
+            return_value={"version": "v2", "markdown_content": "# Title\n\nFirst\n\nSecond (theirs)\n"}
+        )
+        mock_create_version = AsyncMock(return_value={"version": "v3"})
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        success, error = await service.process_single_edit(
+            _edit("# Title\n\nFirst\n\nSecond\n", [("First", "First (ours)")], version="v1")
+        )
+
+        assert success, error
+        kwargs = mock_create_version.call_args.kwargs
+        assert kwargs["content"].markdown_content == "# Title\n\nFirst (ours)\n\nSecond (theirs)\n"
+        assert kwargs["expected_version_id"] == "v2"
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.ContentRepository')
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_process_single_edit_reports_true_conflicts(
+        self, mock_repo_class, mock_doc_service_class, mock_content_repo_class
+    ):
+        """Overlapping concurrent edits fail the item without writing"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(
+            return_value={"id": "doc-1", "is_deleted": False, "current_version_id": "v2"}
+        )
+        mock_content_repo_class.return_value.get_document_version = AsyncMock(
+            return_value={"version": "v2", "markdown_content": "Line (theirs)\n"}
+        )
+        mock_create_version = AsyncMock()
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        success, error = await service.process_single_edit(
+            _edit("Line\n", [("Line", "Line (ours)")], version="v1")
+        )
+
+        assert not success
+        assert "changed since version v1" in error
+        mock_create_version.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.ContentRepository')
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_process_single_edit_retries_lost_race(
+        self, mock_repo_class, mock_doc_service_class, mock_content_repo_class
+    ):
+        """A lost compare-and-swap re-merges against the new head"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(side_effect=[
+            {"id": "doc-1", "is_deleted": False, "current_version_id": "v1"},
+            {"id": "doc-1", "is_deleted": False, "current_version_id": "v2"},
+        ])
+        mock_content_repo_class.return_value.get_document_version = AsyncMock(
+            return_value={"version": "v2", "markdown_content": "a\nb\nc (theirs)\n"}
+        )
+        mock_create_version = AsyncMock(side_effect=[
+            DocumentVersionConflictError("doc-1", "v1"),
+            {"version": "v3"},
+        ])
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        success, error = await service.process_single_edit(
+            _edit("a\nb\nc\n", [("a\n", "a (ours)\n")], version="v1")
+        )
+
+        assert success, error
+        first, second = mock_create_version.call_args_list
+        assert first.kwargs["expected_version_id"] == "v1"
+        assert second.kwargs["expected_version_id"] == "v2"
+        assert second.kwargs["content"].markdown_content == "a (ours)\nb\nc (theirs)\n"
+
+
+def _enrich(items):
+    return [
+        {"language": language, "keywords_array": [], "urls_array": [], "summary": "s", "embedding": [0.0]}
+        for _, language in items
+    ]
+
+
+class TestEditServiceBatch:
+    """Test the batched apply path used by update_documentation"""
+
+    def _service(self, documents, heads=None, outcomes=None):
+        with patch('app.core.services.edit_service.DocumentService'), \
+             patch('app.core.services.edit_service.DocumentRepository') as mock_repo_class, \
+             patch('app.core.services.edit_service.ContentRepository') as mock_content_class:
+            service = EditService()
+        service.doc_repo = mock_repo_class.return_value
+        service.doc_repo.get_documents_by_ids = AsyncMock(return_value=documents)
+        service.content_repo = mock_content_class.return_value
+        service.content_repo.get_versions_by_ids = AsyncMock(return_value=heads or [])
+
+        async def apply_versions(items):
+            if outcomes is not None:
+                return outcomes
+            return [{"document_id": item["document_id"], "version": "new", "status": "applied"} for item in items]
+
+        service.content_repo.apply_versions = AsyncMock(side_effect=apply_versions)
+        service.document_service.compact_versions = AsyncMock()
+        return service
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.process_documents_content', side_effect=_enrich)
+    async def test_fifty_items_use_a_fixed_number_of_round_trips(self, mock_enrich):
+        """A 50-item change request prefetches once and commits in one RPC"""
+        documents = [
+            {"id": f"doc-{i}", "is_deleted": False, "current_version_id": "v1"} for i in range(50)
+        ]
+        service = self._service(documents)
+        edits = [
+            _edit(f"Body {i}\n", [(f"Body {i}", f"Body {i} edited")], document_id=f"doc-{i}")
+            for i in range(50)
+        ]
+
+        response = await service.update_documentation(ChangeRequest(edit=edits))
+
+        assert response.successful == 50
+        assert response.failed == 0
+        service.doc_repo.get_documents_by_ids.assert_called_once()
+        service.content_repo.get_versions_by_ids.assert_not_called()
+        mock_enrich.assert_called_once()
+        service.content_repo.apply_versions.assert_called_once()
+        items = service.content_repo.apply_versions.call_args.args[0]
+        assert items[7]["markdown_content"] == "Body 7 edited\n"
+        assert items[7]["expected_version_id"] == "v1"
+        assert items[7]["base_version"] == "v1"
+        replaced = service.document_service.compact_versions.call_args.args[0]
+        assert len(replaced) == 50
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.process_documents_content', side_effect=_enrich)
+    async def test_per_item_results(self, mock_enrich):
+        """Missing, deleted, unpatchable and stale items get their own results"""
+        documents = [
+            {"id": "ok", "is_deleted": False, "current_version_id": "v1"},
+            {"id": "gone", "is_deleted": True, "current_version_id": "v1"},
+            {"id": "bad", "is_deleted": False, "current_version_id": "v1"},
+            {"id": "stale", "is_deleted": False, "current_version_id": "v2"},
+        ]
+        heads = [{"version": "v2", "markdown_content": "a\n\nb (theirs)\n"}]
+        service = self._service(documents, heads=heads)
+        edits = [
+            _edit("x\n", [("x", "y")], document_id="ok"),
+            _edit("x\n", [("x", "y")], document_id="missing"),
+            _edit("x\n", [("x", "y")], document_id="gone"),
+            _edit("x\n", [("nope", "y")], document_id="bad"),
+            _edit("a\n\nb\n", [("a\n", "a (ours)\n")], document_id="stale"),
+        ]
+
+        results = await service.process_edits_batch(edits)
+
+        assert results[0] == (True, None)
+        assert results[1] == (False, "Document missing not found")
+        assert "deleted" in results[2][1]
+        assert "could not be applied" in results[3][1]
+        assert results[4] == (True, None)
+        items = service.content_repo.apply_versions.call_args.args[0]
+        assert [item["document_id"] for item in items] == ["ok", "stale"]
+        assert items[1]["markdown_content"] == "a (ours)\n\nb (theirs)\n"
+        assert items[1]["expected_version_id"] == "v2"
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.process_documents_content', side_effect=_enrich)
+    async def test_new_language_compacts_no_head(self, mock_enrich):
+        """A language's first version leaves the other languages' heads uncompacted"""
+        documents = [{
+            "id": "doc-1",
+            "is_deleted": False,
+            "current_version_id": "v-en",
+            "language_versions": {"en": "v-en", "ja": "v-ja"},
+        }]
+        service = self._service(documents)
+        edit = _edit("x\n", [("x", "y")], version="v-en")
+        edit.original_content.language = "fr"
+
+        results = await service.process_edits_batch([edit])
+
+        assert results == [(True, None)]
+        service.document_service.compact_versions.assert_not_called()
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.process_documents_content', side_effect=_enrich)
+    async def test_lost_race_falls_back_to_single_edit(self, mock_enrich):
+        """Items that lose the compare-and-swap inside the RPC are retried alone"""
+        documents = [{"id": "doc-1", "is_deleted": False, "current_version_id": "v1"}]
+        service = self._service(
+            documents, outcomes=[{"document_id": "doc-1", "version": None, "status": "conflict"}]
+        )
+        service.process_single_edit = AsyncMock(return_value=(True, None))
+        edit = _edit("x\n", [("x", "y")])
+
+        results = await service.process_edits_batch([edit])
+
+        assert results == [(True, None)]
+        service.process_single_edit.assert_called_once_with(edit)
+
+
+def _create(name, path, parent_id=None, en="# Doc"):
+    return GeneratedDocument(name=name, title=name, path=path, parent_id=parent_id, markdown_content_en=en)
+
+
+class TestChangeGraph:
+    """Test dependency-aware execution of change requests"""
+
+    def test_find_create_parents(self):
+        """Parents are matched by name/path reference or by path nesting"""
+        creates = [
+            _create("guides", "guides/"),
+            _create("advanced", "guides/advanced/"),
+            _create("tips", "guides/advanced/tips/"),
+            _create("faq", "faq/", parent_id="guides"),
+            _create("existing-child", "other/", parent_id="some-existing-uuid"),
+        ]
+
+        assert find_create_parents(creates) == {1: 0, 2: 1, 3: 0}
+
+    def _service(self):
+        with patch('app.core.services.edit_service.DocumentService'), \
+             patch('app.core.services.edit_service.DocumentRepository'), \
+             patch('app.core.services.edit_service.ContentRepository'):
+            return EditService()
+
+    @pytest.mark.asyncio
+    async def test_child_create_links_to_new_parent(self):
+        """A child create runs after its parent and links to the parent's new ID"""
+        service = self._service()
+        calls = []
+
+        async def create_document(document, contents):
+            calls.append((document.name, document.parent_id))
+            return {"id": f"id-{document.name}"}
+
+        service.document_service.create_multilingual_document = AsyncMock(side_effect=create_document)
+
+        response = await service.update_documentation(ChangeRequest(create=[
+            _create("child", "guides/child/"),
+            _create("guides", "guides/"),
+        ]))
+
+        assert response.successful == 2
+        assert calls == [("guides", None), ("child", "id-guides")]
+
+    @pytest.mark.asyncio
+    async def test_failed_parent_fails_child(self):
+        """A child create is not attempted when its parent failed"""
+        service = self._service()
+        service.document_service.create_multilingual_document = AsyncMock(side_effect=Exception("db down"))
+
+        response = await service.update_documentation(ChangeRequest(create=[
+            _create("guides", "guides/"),
+            _create("child", "guides/child/"),
+        ]))
+
+        assert response.failed == 2
+        service.document_service.create_multilingual_document.assert_called_once()
+        assert "prerequisite create:0 failed" in response.errors[1].error_message
+
+    @pytest.mark.asyncio
+    async def test_items_targeting_deleted_documents_are_rejected(self):
+        """Edits and creates under a document deleted by the same request are rejected"""
+        service = self._service()
+        service.process_edits_batch = AsyncMock(return_value=[(True, None)])
+        service.process_single_delete = AsyncMock(return_value=(True, None))
+        service.document_service.create_multilingual_document = AsyncMock(return_value={"id": "new"})
+
+        response = await service.update_documentation(ChangeRequest(
+            edit=[
+                _edit("x\n", [("x", "y")], document_id="doomed"),
+                _edit("x\n", [("x", "y")], document_id="kept"),
+            ],
+            create=[_create("under-doomed", "doomed/child/", parent_id="doomed")],
+            delete=[DocumentToDelete(document_id="doomed", title="Doomed", path="doomed/", version="v1")],
+        ))
+
+        assert response.successful == 2
+        assert response.failed == 2
+        batch = service.process_edits_batch.call_args.args[0]
+        assert [edit.document_id for edit in batch] == ["kept"]
+        service.document_service.create_multilingual_document.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_slow_edits_do_not_delay_creates(self):
+        """Creates and deletes finish while the edit batch is still running"""
+        service = self._service()
+        release = asyncio.Event()
+        finished = []
+
+        async def slow_batch(edits):
+            await release.wait()
+            finished.append("edit")
+            return [(True, None)] * len(edits)
+
+        async def create_document(document, contents):
+            finished.append("create")
+            return {"id": "new"}
+
+        async def delete(doc):
+            finished.append("delete")
+            return True, None
+
+        service.process_edits_batch = AsyncMock(side_effect=slow_batch)
+        service.document_service.create_multilingual_document = AsyncMock(side_effect=create_document)
+        service.process_single_delete = AsyncMock(side_effect=delete)
+
+        run = asyncio.create_task(service.update_documentation(ChangeRequest(
+            edit=[_edit("x\n", [("x", "y")])],
+            create=[_create("new", "new/")],
+            delete=[DocumentToDelete(document_id="old", title="Old", path="old/", version="v1")],
+        )))
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert sorted(finished) == ["create", "delete"]
+
+        release.set()
+        response = await run
+        assert response.successful == 3
+        assert finished[-1] == "edit"
+
+
+    @pytest.mark.asyncio
+    async def test_create_makes_one_multilingual_document(self):
+        """Both languages of a generated document go into one document"""
+        service = self._service()
+        service.document_service.create_multilingual_document = AsyncMock(return_value={"id": "new"})
+        doc = GeneratedDocument(
+            name="guide", title="Guide", path="guide/", markdown_content_en="# Guide", markdown_content_ja="# ガイド"
+        )
+
+        success, error = await service.process_single_create(doc)
+
+        assert success, error
+        service.document_service.create_multilingual_document.assert_called_once()
+        contents = service.document_service.create_multilingual_document.call_args.kwargs["contents"]
+        assert [(c.language, c.markdown_content) for c in contents] == [("en", "# Guide"), ("ja", "# ガイド")]
+
+    @pytest.mark.asyncio
+    @patch('app.core.services.edit_service.ContentRepository')
+    @patch('app.core.services.edit_service.DocumentService')
+    @patch('app.core.services.edit_service.DocumentRepository')
+    async def test_edit_uses_language_head(self, mock_repo_class, mock_doc_service_class, mock_content_repo_class):
+        """An edit of a secondary language compares against that language's head"""
+        mock_repo_class.return_value.get_document_by_id = AsyncMock(return_value={
+            "id": "doc-1",
+            "is_deleted": False,
+            "current_version_id": "en-1",
+            "language_versions": {"en": "en-1", "ja": "ja-1"},
+        })
+        mock_create_version = AsyncMock(return_value={"version": "ja-2"})
+        mock_doc_service_class.return_value.create_document_version = mock_create_version
+
+        service = EditService()
+        edit = _edit("古い\n", [("古い", "新しい")], version="ja-1")
+        edit.original_content.language = "ja"
+        success, error = await service.process_single_edit(edit)
+
+        assert success, error
+        mock_content_repo_class.return_value.get_document_version.assert_not_called()
+        assert mock_create_version.call_args.kwargs["expected_version_id"] == "ja-1"
+
+
+class TestIdempotentUpdate:
+    """Test Idempotency-Key handling in update_documentation"""
+
+    def _service(self):
+        with patch('app.core.services.edit_service.DocumentService'), \
+             patch('app.core.services.edit_service.DocumentRepository'), \
+             patch('app.core.services.edit_service.ContentRepository'):
+            return EditService()
+
+    @pytest.mark.asyncio
+    async def test_replay_does_not_reprocess(self):
+        """The same request under the same key is answered from the recorded results"""
+        service = self._service()
+        service.process_edits_batch = AsyncMock(return_value=[(True, None)])
+        service.process_single_delete = AsyncMock(return_value=(True, None))
+        request = ChangeRequest(
+            edit=[_edit("x\n", [("x", "y")])],
+            delete=[DocumentToDelete(document_id="old", title="Old", path="old/", version="v1")],
+        )
+
+        with patch('app.core.services.edit_service.idempotency_store', InProcessIdempotencyStore(ttl=60)):
+            first = await service.update_documentation(request, idempotency_key="key-1")
+            second = await service.update_documentation(request, idempotency_key="key-1")
+
+        assert second == first
+        assert second.successful == 2
+        service.process_edits_batch.assert_called_once()
+        service.process_single_delete.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_retry_only_reruns_failed_items(self):
+        """Resubmitting under the same key skips items that already succeeded"""
+        service = self._service()
+        service.process_edits_batch = AsyncMock(side_effect=[
+            [(True, None), (False, "conflict")],
+            [(True, None), (True, None)],
+        ])
+        edits = [
+            _edit("a\n", [("a", "b")], document_id="doc-1"),
+            _edit("c\n", [("c", "d")], document_id="doc-2"),
+        ]
+
+        with patch('app.core.services.edit_service.idempotency_store', InProcessIdempotencyStore(ttl=60)):
+            first = await service.update_documentation(ChangeRequest(edit=edits), idempotency_key="key-1")
+            retry = await service.update_documentation(ChangeRequest(edit=edits), idempotency_key="key-1")
+            failed_only = await service.update_documentation(
+                ChangeRequest(edit=first.failed_items.edit), idempotency_key="key-1"
+            )
+
+        assert first.failed_items.edit == [edits[1]]
+        assert retry.successful == 2
+        rerun = service.process_edits_batch.call_args_list[1].args[0]
+        assert [edit.document_id for edit in rerun] == ["doc-2"]
+        assert failed_only.successful == 1
+        assert service.process_edits_batch.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_key_reused_with_other_body_is_refused(self):
+        """A request under a used key that carries new items is rejected before anything runs"""
+        service = self._service()
+        service.process_edits_batch = AsyncMock(return_value=[(True, None)])
+        edit = _edit("a\n", [("a", "b")], document_id="doc-1")
+
+        with patch('app.core.services.edit_service.idempotency_store', InProcessIdempotencyStore(ttl=60)):
+            await service.update_documentation(ChangeRequest(edit=[edit]), idempotency_key="key-1")
+            with pytest.raises(IdempotencyKeyMismatchError):
+                await service.update_documentation(
+                    ChangeRequest(edit=[edit, _edit("e\n", [("e", "f")], document_id="doc-3")]),
+                    idempotency_key="key-1",
+                )
+
+        service.process_edits_batch.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_different_keys_do_not_share_results(self):
+        """Results recorded under one key are not reused by another"""
+        service = self._service()
+        service.process_edits_batch = AsyncMock(return_value=[(True, None)])
+        request = ChangeRequest(edit=[_edit("x\n", [("x", "y")])])
+
+        with patch('app.core.services.edit_service.idempotency_store', InProcessIdempotencyStore(ttl=60)):
+            await service.update_documentation(request, idempotency_key="key-1")
+            await service.update_documentation(request, idempotency_key="key-2")
+            await service.update_documentation(request)
+
+        assert service.process_edits_batch.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_recorded_parent_links_child_on_retry(self):
+        """A child created on retry links to the parent created by the first attempt"""
+        service = self._service()
+        calls = []
+
+        async def create_document(document, contents):
+            calls.append((document.name, document.parent_id))
+            if calls == [("guides", None), ("child", "id-guides")]:
+                raise Exception("db down")
+            return {"id": f"id-{document.name}"}
+
+        service.document_service.create_multilingual_document = AsyncMock(side_effect=create_document)
+        request = ChangeRequest(create=[_create("guides", "guides/"), _create("child", "guides/child/")])
+
+        with patch('app.core.services.edit_service.idempotency_store', InProcessIdempotencyStore(ttl=60)):
+            first = await service.update_documentation(request, idempotency_key="key-1")
+            retry = await service.update_documentation(request, idempotency_key="key-1")
+
+        assert first.failed == 1
+        assert retry.successful == 2
+        assert calls[2:] == [("child", "id-guides")]
+
+
+class TestEditAdmission:
+    """Test admission control of edit jobs"""
+
+    @pytest.mark.asyncio
+    async def test_stream_reports_queue_position(self):
+        """A queued streaming job reports its position before the editor's events"""
+        controller = EditAdmissionController(max_running=1, max_queued=1)
+        running = controller.enqueue()
+
+        async def run_with_streaming(session_id):
+            yield "editor event"
+
+        editor = MagicMock()
+        editor.run_with_streaming = run_with_streaming
+        with patch("app.core.services.edit_service.edit_admission", controller), \
+                patch("app.core.services.edit_service.MainEditor", return_value=editor):
+            stream = EditService().edit_documentation_stream(EditDocumentationRequest(query="q"), "s1")
+            queued = await stream.__anext__()
+            controller.release(running)
+            events = [event async for event in stream]
+
+        assert queued.type == "progress"
+        assert queued.payload["queue_position"] == 1
+        assert events == ["editor event"]
+        assert controller.running == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_refused_when_queue_full(self):
+        """A streaming job arriving at a full queue raises EditQueueFullError"""
+        controller = EditAdmissionController(max_running=1, max_queued=0)
+        controller.enqueue()
+
+        with patch("app.core.services.edit_service.edit_admission", controller):
+            stream = EditService().edit_documentation_stream(EditDocumentationRequest(query="q"), "s1")
+            with pytest.raises(EditQueueFullError):
+                await stream.__anext__()
+
+
+class TestEditJobs:
+    """Test background edit jobs"""
+
+    @pytest.mark.asyncio
+    async def test_job_collects_stream_results(self, tmp_path):
+        """A job stores the documents and errors its event stream produced"""
+        from app.core.services.edit_jobs import EditJobStore
+        from app.models.websocket_events import DocumentDeletedEvent, ErrorEvent
+
+        store = EditJobStore(str(tmp_path / "jobs.db"), ttl=60)
+        deleted = DocumentToDelete(document_id="d1", title="Old", path="old", version="v1")
+
+        async def stream(edit_request, session_id):
+            yield DocumentDeletedEvent(event_id="e1", session_id=session_id, payload=deleted)
+            yield ErrorEvent(event_id="e2", session_id=session_id, payload={"message": "edit failed"})
+
+        service = EditService()
+        service.edit_documentation_stream = stream
+        with patch("app.core.services.edit_service.edit_job_store", store):
+            job = await service.submit_edit_job(EditDocumentationRequest(query="q"))
+            assert job.status == "queued"
+            await service.run_edit_job(job.job_id, job.request)
+            job = await service.get_edit_job(job.job_id)
+        store.close()
+
+        assert job.status == "succeeded"
+        assert job.result.delete == [deleted]
+        assert job.errors == [{"message": "edit failed"}]
+
+    @pytest.mark.asyncio
+    async def test_job_without_results_fails(self, tmp_path):
+        """A job whose every part errored fails, as the synchronous endpoint does"""
+        from app.core.services.edit_jobs import EditJobStore
+        from app.models.websocket_events import ErrorEvent
+
+        store = EditJobStore(str(tmp_path / "jobs.db"), ttl=60)
+
+        async def stream(edit_request, session_id):
+            yield ErrorEvent(event_id="e1", session_id=session_id, payload={"message": "edit failed"})
+
+        service = EditService()
+        service.edit_documentation_stream = stream
+        with patch("app.core.services.edit_service.edit_job_store", store):
+            await store.create("j1", EditDocumentationRequest(query="q"))
+            await service.run_edit_job("j1", EditDocumentationRequest(query="q"))
+            job = await store.get("j1")
+        store.close()
+
+        assert job.status == "failed"
+        assert "edit failed" in job.error
+        assert job.errors == [{"message": "edit failed"}]
+
+    @pytest.mark.asyncio
+    async def test_job_queued_until_admitted(self, tmp_path):
+        """A job waiting for admission reports queued, then running once its run starts"""
+        from app.core.services.edit_jobs import EditJobStore
+        from app.models.websocket_events import ProgressEvent
+
+        store = EditJobStore(str(tmp_path / "jobs.db"), ttl=60)
+        statuses = []
+
+        async def stream(edit_request, session_id):
+            yield ProgressEvent(event_id="e1", session_id=session_id, payload={"stage": "queued", "queue_position": 1})
+            statuses.append((await store.get("j1")).status)
+            yield ProgressEvent(event_id="e2", session_id=session_id, payload={"message": "Detecting intent..."})
+            statuses.append((await store.get("j1")).status)
+
+        service = EditService()
+        service.edit_documentation_stream = stream
+        with patch("app.core.services.edit_service.edit_job_store", store):
+            await store.create("j1", EditDocumentationRequest(query="q"))
+            await service.run_edit_job("j1", EditDocumentationRequest(query="q"))
+        store.close()
+
+        assert statuses == ["queued", "running"]
+
+    @pytest.mark.asyncio
+    async def test_job_failure_is_recorded(self, tmp_path):
+        """A stream that raises fails the job with the error"""
+        from app.core.services.edit_jobs import EditJobStore
+
+        store = EditJobStore(str(tmp_path / "jobs.db"), ttl=60)
+
+        async def stream(edit_request, session_id):
+            raise EditQueueFullError(4, retry_after=30)
+            yield
+
+        service = EditService()
+        service.edit_documentation_stream = stream
+        with patch("app.core.services.edit_service.edit_job_store", store):
+            await store.create("j1", EditDocumentationRequest(query="q"))
+            await service.run_edit_job("j1", EditDocumentationRequest(query="q"))
+            job = await store.get("j1")
+        store.close()
+
+        assert job.status == "failed"
+        assert "queue is full" in job.error
+
+
+class TestEditDeduplication:
+    """Test single-flight sharing of identical edit runs"""
+
+    def test_run_key_normalizes_query(self):
+        """Queries differing only in case and whitespace share a key for the same document"""
+        key = edit_run_key(EditDocumentationRequest(query="Fix  the\ttypos", document_id="d1"))
+
+        assert key == edit_run_key(EditDocumentationRequest(query="fix the typos ", document_id="d1"))
+        assert key != edit_run_key(EditDocumentationRequest(query="fix the typos", document_id="d2"))
+
+    def test_run_key_changes_with_corpus(self):
+        """A write to the corpus gives later requests a new key"""
+        request = EditDocumentationRequest(query="fix typos")
+        before = edit_run_key(request)
+
+        corpus_revision.bump()
+
+        assert edit_run_key(request) != before
+
+    @pytest.mark.asyncio
+    async def test_identical_streams_share_one_editor(self):
+        """Concurrent identical requests run one editor and each see their own session id"""
+        release = asyncio.Event()
+        editors = []
+
+        def make_editor(**kwargs):
+            async def run_with_streaming(session_id):
+                await release.wait()
+                yield ProgressEvent(event_id="p", session_id=session_id, payload={"step": 1})
+
+            editor = MagicMock()
+            editor.run_with_streaming = run_with_streaming
+            editors.append(editor)
+            return editor
+
+        async def collect(session_id):
+            stream = EditService().edit_documentation_stream(EditDocumentationRequest(query="q"), session_id)
+            return [event async for event in stream]
+
+        with patch("app.core.services.edit_service.MainEditor", side_effect=make_editor):
+            first = asyncio.create_task(collect("s1"))
+            second = asyncio.create_task(collect("s2"))
+            await asyncio.sleep(0.01)
+            release.set()
+            first_events, second_events = await asyncio.gather(first, second)
+
+        assert len(editors) == 1
+        assert [event.session_id for event in first_events] == ["s1"]
+        assert [event.session_id for event in second_events] == ["s2"]
+
+    @pytest.mark.asyncio
+    async def test_identical_edits_share_one_run(self):
+        """Concurrent identical edit_documentation calls run one editor and get its response"""
+        release = asyncio.Event()
+        response = EditDocumentationResponse()
+
+        async def run():
+            await release.wait()
+            return response
+
+        editor = MagicMock()
+        editor.run = AsyncMock(side_effect=run)
+        request = EditDocumentationRequest(query="q")
+
+        with patch("app.core.services.edit_service.MainEditor", return_value=editor) as editor_class:
+            first = asyncio.create_task(EditService().edit_documentation(request))
+            second = asyncio.create_task(EditService().edit_documentation(request))
+            await asyncio.sleep(0.01)
+            release.set()
+            results = await asyncio.gather(first, second)
+
+        assert editor_class.call_count == 1
+        assert results == [response, response]
+
+    @pytest.mark.asyncio
+    async def test_failed_part_fails_the_edit(self):
+        """An error in any part of the run fails edit_documentation instead of returning partial results"""
+        editor = MagicMock()
+        editor.run = AsyncMock(side_effect=RuntimeError("create agent failed"))
+
+        with patch("app.core.services.edit_service.MainEditor", return_value=editor):
+            with pytest.raises(RuntimeError, match="create agent failed"):
+                await EditService().edit_documentation(EditDocumentationRequest(query="q"))
@@ -0,0 +1,157 @@
+import asyncio
+import time
+
+import pytest
+from unittest.mock import patch
+
+from app.core.exceptions import IdempotencyKeyMismatchError
+from app.core.services.idempotency import (
+    InProcessIdempotencyStore,
+    RedisIdempotencyStore,
+    create_idempotency_store,
+    fingerprint,
+)
+from app.services.agents.delete_content_agent import DocumentToDelete
+
+
+def _delete(document_id="doc-1"):
+    return DocumentToDelete(document_id=document_id, title="Doc", path="doc/", version="v1")
+
+
+class FakeRedisServer:
+    """Local stand-in for the Redis keys and locks shared by every worker"""
+
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+        self.locks = {}
+
+    def client(self):
+        return FakeRedisKeyClient(self)
+
+
+class FakeRedisKeyClient:
+    def __init__(self, server):
+        self.server = server
+
+    async def get(self, name):
+        value = self.server.values.get(name)
+        return value.encode() if value is not None else None
+
+    async def set(self, name, value, ex=None, nx=False):
+        if nx and name in self.server.values:
+            return None
+        self.server.values[name] = value
+        self.server.expiry[name] = ex
+        return True
+
+    def lock(self, name, timeout=None):
+        return self.server.locks.setdefault(name, asyncio.Lock())
+
+
+class TestInProcessIdempotencyStore:
+    """Test the InProcessIdempotencyStore class"""
+
+    @pytest.mark.asyncio
+    async def test_records_are_scoped_by_key_kind_and_body(self):
+        """An item result is only found under the key and kind it was recorded with"""
+        store = InProcessIdempotencyStore(ttl=60)
+        await store.record_item("key-1", "delete", _delete(), (True, None))
+
+        assert await store.get_item("key-1", "delete", _delete()) == (True, None)
+        assert await store.get_item("key-2", "delete", _delete()) is None
+        assert await store.get_item("key-1", "edit", _delete()) is None
+        assert await store.get_item("key-1", "delete", _delete("doc-2")) is None
+
+    @pytest.mark.asyncio
+    async def test_records_expire(self):
+        """Records are dropped once the TTL has passed"""
+        store = InProcessIdempotencyStore(ttl=60)
+        await store.record_item("key-1", "delete", _delete(), (True, None))
+
+        with patch("app.core.logging.time.time", return_value=time.time() + 61):
+            assert await store.get_item("key-1", "delete", _delete()) is None
+            await store.record_item("key-1", "delete", _delete("doc-2"), (True, None))
+        assert store._cache._cache.keys() == {f"key-1:delete:{fingerprint(_delete('doc-2'))}"}
+
+    @pytest.mark.asyncio
+    async def test_claim_body_allows_repeats_and_subsets(self):
+        """A key takes the first request's items again, or some of them, but nothing else"""
+        store = InProcessIdempotencyStore(ttl=60)
+        await store.claim_body("key-1", {"delete": [_delete("doc-1"), _delete("doc-2")]})
+
+        await store.claim_body("key-1", {"delete": [_delete("doc-1"), _delete("doc-2")]})
+        await store.claim_body("key-1", {"delete": [_delete("doc-2")]})
+        with pytest.raises(IdempotencyKeyMismatchError):
+            await store.claim_body("key-1", {"delete": [_delete("doc-3")]})
+        with pytest.raises(IdempotencyKeyMismatchError):
+            await store.claim_body("key-1", {"edit": [_delete("doc-1")]})
+        await store.claim_body("key-2", {"delete": [_delete("doc-3")]})
+
+    @pytest.mark.asyncio
+    async def test_lock_serializes_same_key(self):
+        """Requests sharing a key run one at a time and the lock is released after"""
+        store = InProcessIdempotencyStore(ttl=60)
+        order = []
+
+        async def hold(name):
+            async with store.lock("key-1"):
+                order.append(f"{name}-start")
+                await asyncio.sleep(0)
+                order.append(f"{name}-end")
+
+        await asyncio.gather(hold("a"), hold("b"))
+
+        assert order == ["a-start", "a-end", "b-start", "b-end"]
+        assert store._locks == {}
+
+
+class TestRedisIdempotencyStore:
+    """Test the RedisIdempotencyStore class"""
+
+    def _workers(self):
+        server = FakeRedisServer()
+        return server, RedisIdempotencyStore(server.client(), ttl=60), RedisIdempotencyStore(server.client(), ttl=60)
+
+    @pytest.mark.asyncio
+    async def test_records_shared_between_workers(self):
+        """A result recorded by one worker is found by another, with the TTL set"""
+        server, first, second = self._workers()
+        await first.record_item("key-1", "delete", _delete(), (True, None))
+        await first.record_item("key-1", "create", _delete("doc-2"), "new-doc")
+
+        assert await second.get_item("key-1", "delete", _delete()) == (True, None)
+        assert await second.get_item("key-1", "create", _delete("doc-2")) == "new-doc"
+        assert await second.get_item("key-2", "delete", _delete()) is None
+        assert set(server.expiry.values()) == {60}
+
+    @pytest.mark.asyncio
+    async def test_claim_body_checked_across_workers(self):
+        """A key claimed on one worker refuses other items on another"""
+        _, first, second = self._workers()
+        await first.claim_body("key-1", {"delete": [_delete("doc-1"), _delete("doc-2")]})
+
+        await second.claim_body("key-1", {"delete": [_delete("doc-2")]})
+        with pytest.raises(IdempotencyKeyMismatchError):
+            await second.claim_body("key-1", {"delete": [_delete("doc-3")]})
+
+    @pytest.mark.asyncio
+    async def test_lock_shared_between_workers(self):
+        """Requests sharing a key on different workers run one at a time"""
+        _, first, second = self._workers()
+        order = []
+
+        async def hold(store, name):
+            async with store.lock("key-1"):
+                order.append(f"{name}-start")
+                await asyncio.sleep(0)
+                order.append(f"{name}-end")
+
+        await asyncio.gather(hold(first, "a"), hold(second, "b"))
+
+        assert order == ["a-start", "a-end", "b-start", "b-end"]
+
+
+def test_create_store_defaults_to_process_memory():
+    """Without a Redis URL the store lives in process memory"""
+    assert isinstance(create_idempotency_store("memory://"), InProcessIdempotencyStore)
@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+from app.core.event_bus import InProcessEventBus, RedisEventBus, create_event_bus
+
+
+class FakeRedis:
+    """Local stand-in for a Redis server's pub/sub, shared by every client made from it"""
+
+    def __init__(self):
+        self.channels = {}
+
+    def client(self):
+        return FakeRedisClient(self)
+
+
+class FakeRedisClient:
+    def __init__(self, server):
+        self.server = server
+
+    async def publish(self, channel, message):
+        queues = self.server.channels.get(channel, set())
+        for queue in queues:
+            queue.put_nowait({"type": "message", "channel": channel.encode(), "data": message.encode()})
+        return len(queues)
+
+    def pubsub(self):
+        return FakePubSub(self.server)
+
+    async def aclose(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, server):
+        self.server = server
+        self.queue = asyncio.Queue()
+        self.channels = set()
+
+    async def subscribe(self, channel):
+        self.channels.add(channel)
+        self.server.channels.setdefault(channel, set()).add(self.queue)
+        self.queue.put_nowait({"type": "subscribe", "channel": channel.encode(), "data": 1})
+
+    async def unsubscribe(self, channel):
+        self.channels.discard(channel)
+        self.server.channels.get(channel, set()).discard(self.queue)
+
+    async def listen(self):
+        while self.channels:
+            yield await self.queue.get()
+
+    async def aclose(self):
+        for channel in list(self.channels):
+            await self.unsubscribe(channel)
+
+
+async def _next(subscription):
+    return await asyncio.wait_for(anext(aiter(subscription)), timeout=1)
+
+
+class TestInProcessEventBus:
+    @pytest.mark.asyncio
+    async def test_publish_reaches_subscribers(self):
+        """Every subscriber of a channel gets the message and is counted"""
+        bus = InProcessEventBus()
+        first = await bus.subscribe("session")
+        second = await bus.subscribe("session")
+
+        assert await bus.publish("session", "hello") == 2
+        assert await bus.publish("other", "ignored") == 0
+        assert await _next(first) == "hello"
+        assert await _next(second) == "hello"
+        await first.close()
+        await second.close()
+
+    @pytest.mark.asyncio
+    async def test_closed_subscription_stops_receiving(self):
+        """Closing a subscription ends its iteration and removes it"""
+        bus = InProcessEventBus()
+        subscription = await bus.subscribe("session")
+
+        await subscription.close()
+
+        assert await bus.publish("session", "hello") == 0
+        assert [message async for message in subscription] == []
+
+
+class TestRedisEventBus:
+    @pytest.mark.asyncio
+    async def test_messages_cross_workers(self):
+        """A message published by one worker reaches a subscriber on another"""
+        server = FakeRedis()
+        producer = RedisEventBus(server.client())
+        consumer = RedisEventBus(server.client())
+        subscription = await consumer.subscribe("ws:s1:events")
+
+        assert await producer.publish("ws:s1:events", '{"event": 1}') == 1
+        assert await _next(subscription) == '{"event": 1}'
+
+        await subscription.close()
+        assert await producer.publish("ws:s1:events", "late") == 0
+
+
+class TestCreateEventBus:
+    def test_memory_url(self):
+        """memory:// gives the in-process bus"""
+        assert isinstance(create_event_bus("memory://"), InProcessEventBus)
+
+    def test_unknown_url(self):
+        """Unsupported URLs are rejected"""
+        with pytest.raises(ValueError):
+            create_event_bus("kafka://broker")
@@ -7,6 +7,8 @@ from app.core.exceptions import (
     DocumentUpdateError,
     ContentProcessingError,
     ValidationError,
+    DocumentVersionConflictError,
+    IdempotencyKeyMismatchError,
     handle_service_exception
 )
 
@@ -88,6 +90,15 @@ class TestHandleServiceException:
         assert http_exception.status_code == 410
         assert http_exception.detail == "Document deleted-doc-456 is deleted and cannot be accessed"
     
+    def test_handle_version_conflict_error(self):
+        """Test handling DocumentVersionConflictError"""
+        error = DocumentVersionConflictError("doc-1", "v1")
+        http_exception = handle_service_exception(error)
+        
+        assert isinstance(http_exception, HTTPException)
+        assert http_exception.status_code == 409
+        assert http_exception.detail == "Document doc-1 is no longer at version v1"
+    
     def test_handle_validation_error(self):
         """Test handling ValidationError"""
         error = ValidationError("title", "Title cannot be empty")
@@ -97,6 +108,15 @@ class TestHandleServiceException:
         assert http_exception.status_code == 400
         assert http_exception.detail == "Validation error for title: Title cannot be empty"
     
+    def test_handle_idempotency_key_mismatch_error(self):
+        """Test handling IdempotencyKeyMismatchError"""
+        error = IdempotencyKeyMismatchError("key-1")
+        http_exception = handle_service_exception(error)
+        
+        assert isinstance(http_exception, HTTPException)
+        assert http_exception.status_code == 422
+        assert http_exception.detail == "Idempotency-Key key-1 was already used with a different request body"
+    
     def test_handle_document_creation_error(self):
         """Test handling DocumentCreationError"""
         error = DocumentCreationError("Database unavailable")
@@ -0,0 +1,121 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from httpx import ASGITransport, AsyncClient
+from unittest.mock import patch
+
+from app.api.compression import CompressionMiddleware, negotiate_encoding
+
+BODY = "# Heading\n\nSome markdown that compresses well.\n" * 100
+
+
+def _app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/doc")
+    async def doc():
+        return {"markdown_content": BODY}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def lines():
+            yield BODY
+            yield BODY
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    @app.get("/encoded")
+    async def encoded():
+        return PlainTextResponse(BODY, headers={"Content-Encoding": "identity"})
+
+    return app
+
+
+class TestNegotiateEncoding:
+    def test_prefers_gzip_when_only_stdlib_is_available(self):
+        """gzip is chosen when the optional encoders are not installed"""
+        with patch.dict("app.api.compression.COMPRESSORS", {"gzip": gzip.compress}, clear=True):
+            assert negotiate_encoding("gzip, deflate, br, zstd") == "gzip"
+
+    def test_server_preference_breaks_ties(self):
+        """Equal quality goes to the first available encoding"""
+        compressors = {"zstd": bytes, "br": bytes, "gzip": gzip.compress}
+        with patch.dict("app.api.compression.COMPRESSORS", compressors, clear=True):
+            assert negotiate_encoding("gzip, br, zstd") == "zstd"
+            assert negotiate_encoding("gzip;q=1.0, zstd;q=0.5") == "gzip"
+            assert negotiate_encoding("zstd;q=0, *") == "br"
+
+    def test_nothing_acceptable(self):
+        """No encoding is chosen when the client accepts none"""
+        assert negotiate_encoding("") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("gzip;q=0") is None
+
+
+class TestCompressionMiddleware:
+    @pytest.mark.asyncio
+    async def test_compresses_large_json(self):
+        """Large bodies are compressed with the negotiated encoding"""
+        app = _app()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/doc", headers={"Accept-Encoding": "gzip"})
+            second = await client.get("/doc", headers={"Accept-Encoding": "gzip"})
+
+        assert first.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in first.headers["vary"]
+        assert first.json() == second.json() == {"markdown_content": BODY}
+        assert int(first.headers["content-length"]) < len(BODY) / 5
+
+    @pytest.mark.asyncio
+    async def test_compression_cache_hits(self):
+        """The compressor runs once for a body served twice"""
+        calls = []
+
+        def compress(body):
+            calls.append(len(body))
+            return gzip.compress(body)
+
+        app = _app()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            with patch.dict("app.api.compression.COMPRESSORS", {"gzip": compress}, clear=True):
+                await client.get("/doc", headers={"Accept-Encoding": "gzip"})
+                await client.get("/doc", headers={"Accept-Encoding": "gzip"})
+
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_skips_small_streamed_and_encoded_responses(self):
+        """Small, streaming and already-encoded responses pass through unchanged"""
+        app = _app()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+            stream = await client.get("/stream", headers={"Accept-Encoding": "gzip"})
+            encoded = await client.get("/encoded", headers={"Accept-Encoding": "gzip"})
+            plain = await client.get("/doc", headers={"Accept-Encoding": "identity"})
+
+        assert "content-encoding" not in small.headers
+        assert "content-encoding" not in stream.headers
+        assert stream.text == BODY * 2
+        assert encoded.headers["content-encoding"] == "identity"
+        assert "content-encoding" not in plain.headers
+
+    @pytest.mark.asyncio
+    async def test_vary_on_uncompressed_candidates(self):
+        """Compressible responses sent as is still vary on Accept-Encoding"""
+        app = _app()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            small = await client.get("/small", headers={"Accept-Encoding": "gzip"})
+            plain = await client.get("/doc", headers={"Accept-Encoding": "identity"})
+            bare = await client.get("/doc", headers={"Accept-Encoding": ""})
+
+        for response in (small, plain, bare):
+            assert "content-encoding" not in response.headers
+            assert "Accept-Encoding" in response.headers["vary"]
+        assert bare.json() == {"markdown_content": BODY}
@@ -0,0 +1,33 @@
+from starlette.requests import Request
+
+from app.api.dependencies import client_address
+
+
+def _request(forwarded_for=None, peer="10.0.0.9"):
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for is not None else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 1234)})
+
+
+class TestClientAddress:
+    """Test the address per-client limits are keyed on"""
+
+    def test_peer_address_without_trusted_proxies(self, monkeypatch):
+        """X-Forwarded-For is ignored unless proxies are trusted"""
+        monkeypatch.setattr("app.api.dependencies.settings.TRUSTED_PROXY_HOPS", 0)
+
+        assert client_address(_request("1.2.3.4")) == "10.0.0.9"
+
+    def test_address_added_by_trusted_proxies(self, monkeypatch):
+        """The entry the outermost trusted proxy added is used, not client-supplied ones"""
+        monkeypatch.setattr("app.api.dependencies.settings.TRUSTED_PROXY_HOPS", 1)
+        assert client_address(_request("6.6.6.6, 1.2.3.4")) == "1.2.3.4"
+
+        monkeypatch.setattr("app.api.dependencies.settings.TRUSTED_PROXY_HOPS", 2)
+        assert client_address(_request("6.6.6.6, 1.2.3.4, 10.0.0.5")) == "1.2.3.4"
+
+    def test_peer_address_when_header_is_short(self, monkeypatch):
+        """Without enough forwarded entries the peer address is used"""
+        monkeypatch.setattr("app.api.dependencies.settings.TRUSTED_PROXY_HOPS", 2)
+
+        assert client_address(_request("1.2.3.4")) == "10.0.0.9"
+        assert client_address(_request()) == "10.0.0.9"
@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.websockets import WebSocketState
+
+from app.api.sse import SSEConnection, format_sse
+from app.models.websocket_events import (
+    ErrorEvent,
+    FinishedEvent,
+    encode_message,
+    event_header,
+    frame_message,
+    split_frame,
+)
+
+
+def _error(message, fatal=False):
+    payload = {"message": message, "fatal": True} if fatal else {"message": message}
+    event = ErrorEvent(event_id="e", session_id="s1", payload=payload)
+    return encode_message(event, seq=3), event_header(event, seq=3)
+
+
+def _finished():
+    event = FinishedEvent(event_id="f", session_id="s1", payload={})
+    return encode_message(event), event_header(event)
+
+
+async def _collect(connection):
+    return [frame async for frame in connection.frames()]
+
+
+class TestMessageFrames:
+    """Test the header line carried in front of messages on the event bus"""
+
+    def test_frame_round_trip(self):
+        """split_frame gives back the header and the message untouched"""
+        for message, header in (_error("boom"), _error("crashed", fatal=True), _finished()):
+            assert split_frame(frame_message(header, message)) == (header, message)
+
+    def test_header_marks_final_events(self):
+        """Finished events and fatal errors are final, other errors are not"""
+        assert _finished()[1].final
+        assert _error("crashed", fatal=True)[1].final
+        assert _error("boom")[1] == (3, "error", False, "json")
+
+
+class TestFormatSSE:
+    """Test SSE framing of encoded messages"""
+
+    def test_frame_carries_seq_type_and_message(self):
+        """The event id is the seq, the event name its type and the data the encoded message"""
+        message, header = _error("boom")
+
+        frame = format_sse(message, header)
+
+        lines = frame.rstrip("\n").split("\n")
+        assert lines[0] == "id: 3"
+        assert lines[1] == "event: error"
+        assert json.loads(lines[2][len("data: "):]) == json.loads(message)
+        assert frame.endswith("\n\n")
+
+    def test_frame_without_seq(self):
+        """Messages outside an event log have no id line"""
+        assert format_sse(*_finished()).startswith("event: finished\n")
+
+
+class TestSSEConnection:
+    """Test the SSEConnection stand-in for a WebSocket"""
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_after_final_event(self):
+        """The stream ends after a finished event but not after a non-fatal error"""
+        connection = SSEConnection()
+        frames = asyncio.create_task(_collect(connection))
+
+        await connection.send_message(*_error("partial"))
+        await connection.send_message(*_finished())
+
+        assert len(await frames) == 2
+        assert connection.client_state == WebSocketState.DISCONNECTED
+
+    @pytest.mark.asyncio
+    async def test_stream_ends_after_fatal_error(self):
+        """A fatal error ends the stream"""
+        connection = SSEConnection()
+        frames = asyncio.create_task(_collect(connection))
+
+        await connection.send_message(*_error("crashed", fatal=True))
+
+        assert len(await frames) == 1
+
+    @pytest.mark.asyncio
+    async def test_keepalive_when_idle(self):
+        """Comment lines are sent while no event arrives"""
+        connection = SSEConnection(keepalive=0.01)
+        stream = connection.frames()
+
+        assert await stream.__anext__() == ": keepalive\n\n"
+        await connection.close()
+        await stream.aclose()
+
+    @pytest.mark.asyncio
+    async def test_close_ends_stream(self):
+        """Closing the connection ends the stream"""
+        connection = SSEConnection()
+        frames = asyncio.create_task(_collect(connection))
+
+        await connection.close()
+
+        assert await frames == []
@@ -0,0 +1,157 @@
+import json
+import time
+import zlib
+from contextlib import contextmanager
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.api.subprotocols import (
+    JSON_SUBPROTOCOL,
+    MSGPACK_SUBPROTOCOL,
+    encode_msgpack,
+    message_bytes,
+    message_text,
+    negotiate_subprotocol,
+    pack_message,
+)
+from app.models.websocket_events import DocumentCompletedEvent, encode_message, event_header
+from app.services.shared.models import ContentChange, DocumentEdit
+
+
+def _completed_event(paragraphs=40):
+    markdown = "".join(f"## Section {i}\n\nSome *markdown* with `code` and a [link](/docs/{i}).\n\n" for i in range(paragraphs))
+    edit = DocumentEdit(
+        document_id="doc-1",
+        version="v1",
+        changes=[ContentChange(old_string=markdown, new_string=markdown.replace("Some", "More"))],
+    )
+    return DocumentCompletedEvent(event_id="e1", session_id="s1", payload=edit)
+
+
+@contextmanager
+def _edit_socket(monkeypatch, subprotocols):
+    """Edit socket with one edit request sent, streaming a completed document"""
+    from fastapi.testclient import TestClient
+    from app.api.dependencies import get_edit_service
+    from app.main import app
+
+    monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+
+    async def stream(edit_request, session_id):
+        yield _completed_event(paragraphs=2)
+
+    edit_service = MagicMock()
+    edit_service.edit_documentation_stream = stream
+    app.dependency_overrides[get_edit_service] = lambda: edit_service
+    try:
+        with TestClient(app) as client, client.websocket_connect(
+            "/ws/edit-documentation", subprotocols=subprotocols
+        ) as websocket:
+            websocket.send_text(json.dumps({"session_id": "s1", "edit_request": {"query": "fix typos"}}))
+            yield websocket
+    finally:
+        app.dependency_overrides.clear()
+
+
+class TestNegotiation:
+    """Test subprotocol negotiation"""
+
+    def test_prefers_msgpack_when_installed(self):
+        """MessagePack is chosen when offered and available"""
+        with patch("app.api.subprotocols.msgpack", object()):
+            assert negotiate_subprotocol([JSON_SUBPROTOCOL, MSGPACK_SUBPROTOCOL]) == MSGPACK_SUBPROTOCOL
+
+    def test_falls_back_without_msgpack(self):
+        """Without msgpack installed a client offering both gets JSON"""
+        with patch("app.api.subprotocols.msgpack", None):
+            assert negotiate_subprotocol([MSGPACK_SUBPROTOCOL, JSON_SUBPROTOCOL]) == JSON_SUBPROTOCOL
+            assert negotiate_subprotocol([MSGPACK_SUBPROTOCOL]) is None
+
+    def test_no_subprotocol(self):
+        """A client offering nothing known gets the default JSON frames"""
+        assert negotiate_subprotocol([]) is None
+        assert negotiate_subprotocol(["graphql-ws"]) is None
+
+
+class TestMessagePackEncoding:
+    """Test the MessagePack event encoding"""
+
+    def test_same_schema_as_json(self):
+        """A MessagePack message decodes to the same document as its JSON form"""
+        msgpack = pytest.importorskip("msgpack")
+        message = encode_message(_completed_event(), seq=7)
+
+        assert msgpack.unpackb(encode_msgpack(message), raw=False) == json.loads(message)
+
+    def test_packed_from_model(self):
+        """Events packed from the model match their JSON form and convert either way"""
+        msgpack = pytest.importorskip("msgpack")
+        event = _completed_event()
+        message = encode_message(event, seq=7)
+        packed = pack_message(event, seq=7)
+        header = event_header(event, seq=7, encoding="msgpack")
+
+        assert msgpack.unpackb(message_bytes(packed, header), raw=False) == json.loads(message)
+        assert json.loads(message_text(packed, header)) == json.loads(message)
+        assert message_text(message, event_header(event, seq=7)) == message
+
+    def test_packed_without_json(self):
+        """Packing an event never goes through JSON text"""
+        pytest.importorskip("msgpack")
+        with patch("app.api.subprotocols.json.loads") as loads:
+            pack_message(_completed_event(), seq=1)
+
+        loads.assert_not_called()
+
+    def test_socket_sends_binary_frames(self, monkeypatch):
+        """A client negotiating MessagePack receives events as binary frames"""
+        msgpack = pytest.importorskip("msgpack")
+        with _edit_socket(monkeypatch, [MSGPACK_SUBPROTOCOL]) as websocket:
+            assert websocket.accepted_subprotocol == MSGPACK_SUBPROTOCOL
+            first = msgpack.unpackb(websocket.receive_bytes(), raw=False)
+
+        assert first["event"]["type"] == "document_completed"
+        assert first["seq"] == 1
+
+    def test_socket_json_subprotocol(self, monkeypatch):
+        """A client asking for the JSON subprotocol gets it and text frames"""
+        with _edit_socket(monkeypatch, [JSON_SUBPROTOCOL]) as websocket:
+            assert websocket.accepted_subprotocol == JSON_SUBPROTOCOL
+            first = websocket.receive_json()
+
+        assert first["event"]["type"] == "document_completed"
+
+
+@pytest.mark.slow
+class TestEncodingBenchmark:
+    """Encode time and wire size of JSON vs MessagePack events (run with -m slow -s)"""
+
+    def test_encode_time_and_size(self):
+        """MessagePack is no larger than JSON on the wire, with and without permessage-deflate"""
+        msgpack = pytest.importorskip("msgpack")
+        event = _completed_event()
+        message = encode_message(event, seq=1)
+        rounds = 200
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            encode_message(event, seq=1)
+        json_ms = (time.perf_counter() - start) * 1000 / rounds
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            pack_message(event, seq=1)
+        msgpack_ms = (time.perf_counter() - start) * 1000 / rounds
+
+        packed = pack_message(event, seq=1).encode("latin-1")
+        json_bytes, msgpack_bytes = len(message.encode()), len(packed)
+        json_deflated = len(zlib.compress(message.encode(), 6))
+        msgpack_deflated = len(zlib.compress(packed, 6))
+        print(
+            f"\njson: {json_bytes} bytes ({json_deflated} deflated), encode {json_ms:.3f} ms; "
+            f"msgpack: {msgpack_bytes} bytes ({msgpack_deflated} deflated), "
+            f"encode {msgpack_ms:.3f} ms"
+        )
+        assert msgpack.unpackb(packed, raw=False) == json.loads(message)
+        assert msgpack_bytes <= json_bytes
@@ -21,6 +21,8 @@ def mock_document_service(test_client):
     mock_service.get_document_version = AsyncMock()
     mock_service.get_child_documents = AsyncMock()
     mock_service.get_document_parents = AsyncMock()
+    mock_service.get_document_diff = AsyncMock()
+    mock_service.diff_versions = AsyncMock()
     
     # Override the dependency
     from app.main import app
@@ -204,6 +206,45 @@ class TestDocuments:
         # Verify service was called
         mock_document_service.list_document_versions.assert_called_once_with(doc_id)
     
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_get_document_diff(self, test_client, mock_document_service):
+        """Test a paged diff between two versions."""
+        from app.models.documents import DocumentDiffResponse
+
+        doc_id = str(uuid.uuid4())
+        mock_document_service.get_document_diff.return_value = DocumentDiffResponse(
+            document_id=doc_id, from_version="v1", to_version="v2",
+            added=1, removed=1, total_hunks=3, hunk_offset=1, next_offset=2,
+        )
+
+        response = await test_client.get(
+            f"/api/documents/{doc_id}/diff", params={"from": "v1", "to": "v2", "hunk_offset": 1, "hunk_limit": 1}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["next_offset"] == 2
+        mock_document_service.get_document_diff.assert_called_once_with(doc_id, "v1", "v2", None, 1, 1)
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_stream_document_diff(self, test_client, mock_document_service):
+        """Test a streamed diff is a summary line followed by one line per hunk."""
+        import json
+        from app.services.diffing import diff_texts
+
+        doc_id = str(uuid.uuid4())
+        old = "".join(f"line {i}\n" for i in range(40))
+        diff = diff_texts(old, old.replace("line 2\n", "").replace("line 30\n", "line thirty\n"))
+        mock_document_service.diff_versions.return_value = ("v1", "v2", diff)
+
+        response = await test_client.get(f"/api/documents/{doc_id}/diff", params={"from": "v1", "stream": True})
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert lines[0]["total_hunks"] == 2
+        assert [hunk["old_start"] for hunk in lines[1:]] == [hunk.old_start for hunk in diff.hunks]
+        mock_document_service.diff_versions.assert_called_once_with(doc_id, "v1", "latest", None)
+
     @pytest.mark.asyncio(loop_scope="function")
     async def test_get_latest_version(self, test_client, mock_document_service):
         """Test retrieving the latest version of a document."""
@@ -235,7 +276,7 @@ class TestDocuments:
         assert version["version"] == version_id
         
         # Verify service was called
-        mock_document_service.get_document_version.assert_called_once_with(doc_id, "latest")
+        mock_document_service.get_document_version.assert_called_once_with(doc_id, "latest", None)
     
     @pytest.mark.asyncio(loop_scope="function")
     async def test_get_previous_version(self, test_client, mock_document_service):
@@ -269,7 +310,7 @@ class TestDocuments:
         assert "markdown_content" in version
         
         # Verify service was called
-        mock_document_service.get_document_version.assert_called_once_with(doc_id, version_id)
+        mock_document_service.get_document_version.assert_called_once_with(doc_id, version_id, None)
     
     @pytest.mark.asyncio(loop_scope="function")
     async def test_update_document(self, test_client, mock_document_service):
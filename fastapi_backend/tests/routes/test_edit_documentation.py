@@ -1,3 +1,4 @@
+import json
 import pytest
 from fastapi import status
 from unittest.mock import MagicMock, AsyncMock
@@ -11,6 +12,8 @@ def mock_edit_service(test_client):
     # Mock edit service methods with proper async setup
     mock_service.edit_documentation = AsyncMock()
     mock_service.update_documentation = AsyncMock()
+    mock_service.submit_edit_job = AsyncMock()
+    mock_service.get_edit_job = AsyncMock()
     
     # Override the dependency
     from app.main import app
@@ -258,4 +261,211 @@ class TestEditDocumentation:
         assert len(result["errors"]) == 1
 
         # Verify service was called
-        mock_edit_service.update_documentation.assert_called_once()
\ No newline at end of file
+        mock_edit_service.update_documentation.assert_called_once()
+
+def _sse_events(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.split("\n") if not line.startswith(":"))
+        events.append(fields)
+    return events
+
+
+class TestEditDocumentationStream:
+    """Test the server-sent events edit stream"""
+
+    def _client(self, monkeypatch, stream):
+        from fastapi.testclient import TestClient
+        from app.api.dependencies import get_edit_service
+        from app.main import app
+
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        edit_service = MagicMock()
+        edit_service.edit_documentation_stream = stream
+        app.dependency_overrides[get_edit_service] = lambda: edit_service
+        return TestClient(app)
+
+    def test_streams_job_events_then_finished(self, monkeypatch):
+        """The stream carries the job's events with their seq as id and ends after finished"""
+        from app.models.websocket_events import ProgressEvent
+
+        async def stream(edit_request, session_id):
+            yield ProgressEvent(event_id="p", session_id=session_id, payload={"step": 1})
+
+        from app.main import app
+        try:
+            with self._client(monkeypatch, stream) as client:
+                response = client.post(
+                    "/api/edit/stream", json={"query": "fix typos"}, headers={"X-Session-ID": "s1"}
+                )
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-session-id"] == "s1"
+        events = _sse_events(response.text)
+        assert [(event["id"], event["event"]) for event in events] == [("1", "progress"), ("2", "finished")]
+        assert json.loads(events[0]["data"])["event"]["payload"] == {"step": 1}
+
+    def test_resume_unknown_session(self, monkeypatch):
+        """Resuming a session without a job is a 404"""
+        from app.main import app
+
+        async def stream(edit_request, session_id):
+            yield
+
+        try:
+            with self._client(monkeypatch, stream) as client:
+                response = client.get("/api/edit/stream/nobody", headers={"Last-Event-ID": "4"})
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+class TestInlineEditStream:
+    """Test the server-sent events inline edit stream"""
+
+    def _post(self, result):
+        from fastapi.testclient import TestClient
+        from unittest.mock import patch
+        from app.main import app
+
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result), \
+                TestClient(app) as client:
+            return client.post(
+                "/api/edit/inline_edit/stream",
+                json={"query": "shorten", "selected_text": "A long sentence."},
+                headers={"X-Session-ID": "s1"},
+            )
+
+    def _result(self, deltas, error=None, tripped=False):
+        from types import SimpleNamespace
+        from app.models.edit_documentation import InLineEditAgentResponse
+
+        class Result:
+            is_complete = False
+            input_guardrail_results = [SimpleNamespace(output=SimpleNamespace(tripwire_triggered=tripped))]
+
+            async def stream_events(self):
+                for delta in deltas:
+                    yield SimpleNamespace(
+                        type="raw_response_event",
+                        data=SimpleNamespace(type="response.output_text.delta", delta=delta),
+                    )
+                if error:
+                    raise error
+                self.is_complete = True
+
+            def cancel(self):
+                pass
+
+            def final_output_as(self, cls):
+                return InLineEditAgentResponse(edited_text="Short.")
+
+        return Result()
+
+    def test_streams_deltas_then_completed(self):
+        """The edited text arrives as content deltas, then the full response"""
+        response = self._post(self._result(['{"edited_text": "Sho', 'rt."}']))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _sse_events(response.text)
+        assert events[0]["event"] == "content_delta"
+        deltas = "".join(json.loads(event["data"])["event"]["payload"]["delta"] for event in events[:-1])
+        assert deltas == "Short."
+        final = json.loads(events[-1]["data"])["event"]
+        assert final["type"] == "inline_edit_completed"
+        assert final["session_id"] == "s1"
+        assert final["payload"]["edited_text"] == "Short."
+        assert final["payload"]["original_text"] == "A long sentence."
+
+    def test_guardrail_completes_unchanged(self):
+        """A query that is not an edit completes with the original text, as the plain endpoint does"""
+        from agents import InputGuardrailTripwireTriggered
+
+        error = InputGuardrailTripwireTriggered(MagicMock())
+        response = self._post(
+            self._result(['{"edited_text": "Ignoring the instructions'], error=error, tripped=True)
+        )
+
+        events = _sse_events(response.text)
+        assert [event["event"] for event in events] == ["inline_edit_completed"]
+        final = json.loads(events[-1]["data"])["event"]
+        assert final["payload"]["edited_text"] == "A long sentence."
+
+    def test_failure_is_fatal_error(self):
+        """Other failures end the stream with a fatal error event"""
+        response = self._post(self._result(['{"edited_text": "x'], error=RuntimeError("model down")))
+
+        events = _sse_events(response.text)
+        assert [event["event"] for event in events] == ["content_delta", "error"]
+        payload = json.loads(events[-1]["data"])["event"]["payload"]
+        assert payload["fatal"] is True
+        assert payload["message"] == "model down"
+
+
+class TestEditAdmissionErrors:
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_full_queue_is_503(self, test_client, mock_edit_service):
+        """A refused edit is a 503 with Retry-After"""
+        from app.core.exceptions import EditQueueFullError
+
+        mock_edit_service.edit_documentation.side_effect = EditQueueFullError(32, retry_after=45)
+
+        response = await test_client.post("/api/edit/", json={"query": "q"})
+
+        assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+        assert response.headers["retry-after"] == "45"
+
+
+class TestEditJobs:
+    def _job(self, status="queued", **fields):
+        from app.models.edit_documentation import EditDocumentationRequest, EditJob
+
+        return EditJob(
+            job_id="j1",
+            status=status,
+            request=EditDocumentationRequest(query="fix typos"),
+            created_at="2026-01-01T00:00:00Z",
+            updated_at="2026-01-01T00:00:00Z",
+            **fields,
+        )
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_submit_returns_job_at_once(self, test_client, mock_edit_service):
+        """Submitting an edit returns 202 with the job and where to poll it"""
+        mock_edit_service.submit_edit_job.return_value = self._job()
+
+        response = await test_client.post("/api/edit/jobs", json={"query": "fix typos"})
+
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.json()["job_id"] == "j1"
+        assert response.json()["status"] == "queued"
+        assert response.headers["location"] == "/api/edit/jobs/j1"
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_get_finished_job(self, test_client, mock_edit_service):
+        """A finished job is returned with its result"""
+        from app.models.edit_documentation import EditDocumentationResponse
+
+        mock_edit_service.get_edit_job.return_value = self._job("succeeded", result=EditDocumentationResponse())
+
+        response = await test_client.get("/api/edit/jobs/j1")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["result"] == {"edit": [], "create": [], "delete": []}
+        mock_edit_service.get_edit_job.assert_called_once_with("j1")
+
+    @pytest.mark.asyncio(loop_scope="function")
+    async def test_unknown_job(self, test_client, mock_edit_service):
+        """An unknown or expired job is a 404"""
+        from app.core.exceptions import JobNotFoundError
+
+        mock_edit_service.get_edit_job.side_effect = JobNotFoundError("j1")
+
+        response = await test_client.get("/api/edit/jobs/j1")
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -0,0 +1,455 @@
+import asyncio
+import json
+
+import pytest
+from fastapi.websockets import WebSocketState
+
+from app.api.subprotocols import message_bytes
+from app.core.event_bus import RedisEventBus
+from app.core.exceptions import TooManyJobsError
+from app.models.websocket_events import ContentDeltaEvent, ErrorEvent, ProgressEvent
+from app.routes.websocket import ConnectionManager
+from tests.core.test_event_bus import FakeRedis
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.client_state = WebSocketState.CONNECTED
+        self.sent = []
+        self.close_code = None
+
+    async def send_text(self, text):
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.close_code = code
+        self.client_state = WebSocketState.DISCONNECTED
+
+
+class BlockedWebSocket(FakeWebSocket):
+    """A client that stops reading until released"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = asyncio.Event()
+
+    async def send_text(self, text):
+        await self.release.wait()
+        await super().send_text(text)
+
+
+class BrokenWebSocket(FakeWebSocket):
+    """A client whose connection fails on the first send"""
+
+    async def send_text(self, text):
+        raise ConnectionResetError("connection reset by peer")
+
+
+class PackedWebSocket(FakeWebSocket):
+    """A client that negotiated MessagePack, recording the encoding each event was published in"""
+
+    encoding = "msgpack"
+
+    def __init__(self):
+        super().__init__()
+        self.published_as = []
+
+    async def send_message(self, message, header):
+        import msgpack
+
+        self.published_as.append(header.encoding)
+        self.sent.append(msgpack.unpackb(message_bytes(message, header), raw=False))
+
+
+def _event(session_id, message):
+    return ErrorEvent(event_id=message, session_id=session_id, payload={"message": message})
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestConnectionManager:
+    """Test session routing between workers sharing an event bus"""
+
+    def _workers(self):
+        server = FakeRedis()
+        return ConnectionManager(RedisEventBus(server.client())), ConnectionManager(RedisEventBus(server.client()))
+
+    @pytest.mark.asyncio
+    async def test_event_reaches_socket_on_other_worker(self):
+        """An event sent by one worker is delivered to the socket held by another"""
+        socket_worker, job_worker = self._workers()
+        websocket = FakeWebSocket()
+        await socket_worker.register("s1", websocket)
+
+        delivered = await job_worker.send_event("s1", _event("s1", "progress"))
+        await _settle()
+
+        assert delivered
+        assert websocket.sent[0]["event"]["payload"]["message"] == "progress"
+        await socket_worker.disconnect("s1")
+
+    @pytest.mark.asyncio
+    async def test_send_without_socket_is_not_delivered(self):
+        """Sending to a session no worker holds reports non-delivery"""
+        socket_worker, job_worker = self._workers()
+
+        assert not await job_worker.send_event("nobody", _event("nobody", "lost"))
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_job_on_other_worker_after_grace(self, monkeypatch):
+        """Disconnecting the last socket cancels the job elsewhere once the grace period ends"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0.01)
+        socket_worker, job_worker = self._workers()
+        websocket = FakeWebSocket()
+        await socket_worker.register("s1", websocket)
+        started = asyncio.Event()
+
+        async def job():
+            started.set()
+            await asyncio.sleep(10)
+
+        task = await job_worker.start_job("s1", job())
+        await started.wait()
+        await socket_worker.disconnect("s1", websocket)
+        await _settle()
+        assert not task.done()
+
+        await asyncio.sleep(0.05)
+        assert task.cancelled()
+        assert "s1" not in job_worker.session_tasks
+
+    @pytest.mark.asyncio
+    async def test_resume_replays_missed_events(self, monkeypatch):
+        """A client resuming on another worker gets the events it missed, then live ones"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0.05)
+        server = FakeRedis()
+        first_worker, job_worker, second_worker = (
+            ConnectionManager(RedisEventBus(server.client())) for _ in range(3)
+        )
+        first = FakeWebSocket()
+        await first_worker.register("s1", first)
+        release = asyncio.Event()
+        task = await job_worker.start_job("s1", release.wait())
+
+        await job_worker.send_event("s1", _event("s1", "one"))
+        await _settle()
+        await first_worker.disconnect("s1", first)
+        await _settle()
+        assert not await job_worker.send_event("s1", _event("s1", "two"))
+
+        second = FakeWebSocket()
+        assert await second_worker.resume("s1", second, after_seq=first.sent[-1]["seq"])
+        await _settle()
+        await job_worker.send_event("s1", _event("s1", "three"))
+        await _settle()
+        await asyncio.sleep(0.1)
+
+        assert [message["event"]["payload"]["message"] for message in first.sent] == ["one"]
+        assert [message["event"]["payload"]["message"] for message in second.sent] == ["two", "three"]
+        assert [message["seq"] for message in second.sent] == [2, 3]
+        assert not task.done()
+        release.set()
+        await second_worker.disconnect("s1", second)
+        await asyncio.sleep(0.1)
+
+    @pytest.mark.asyncio
+    async def test_events_published_in_the_socket_encoding(self, monkeypatch):
+        """A MessagePack session's events are packed, and a JSON client resuming it gets JSON"""
+        pytest.importorskip("msgpack")
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0.05)
+        server = FakeRedis()
+        first_worker, second_worker = (ConnectionManager(RedisEventBus(server.client())) for _ in range(2))
+        first = PackedWebSocket()
+        await first_worker.register("s1", first)
+        release = asyncio.Event()
+        task = await first_worker.start_job("s1", release.wait())
+
+        await first_worker.send_event("s1", _event("s1", "one"))
+        await _settle()
+        await first_worker.disconnect("s1", first)
+        await _settle()
+        await first_worker.send_event("s1", _event("s1", "two"))
+
+        second = FakeWebSocket()
+        assert await second_worker.resume("s1", second, after_seq=1)
+        await _settle()
+        await first_worker.send_event("s1", _event("s1", "three"))
+        await _settle()
+
+        assert first.published_as == ["msgpack"]
+        assert [message["event"]["payload"]["message"] for message in first.sent] == ["one"]
+        assert [message["event"]["payload"]["message"] for message in second.sent] == ["two", "three"]
+        assert first_worker.job_encodings["s1"] == "json"
+        release.set()
+        await task
+        await second_worker.disconnect("s1", second)
+        await asyncio.sleep(0.1)
+
+    @pytest.mark.asyncio
+    async def test_content_deltas_are_not_logged(self, monkeypatch):
+        """Text deltas reach the socket but never push logged events out of the resume log"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_EVENT_LOG_SIZE", 2)
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0.05)
+        socket_worker, job_worker = self._workers()
+        first = FakeWebSocket()
+        await socket_worker.register("s1", first)
+        release = asyncio.Event()
+        task = await job_worker.start_job("s1", release.wait())
+
+        await job_worker.send_event("s1", _event("s1", "one"))
+        for index in range(5):
+            delta = ContentDeltaEvent(
+                event_id=f"d{index}", session_id="s1", payload={"path": ["markdown_content"], "delta": "x"}
+            )
+            await job_worker.send_event("s1", delta)
+        await _settle()
+        await socket_worker.disconnect("s1", first)
+
+        second = FakeWebSocket()
+        assert await socket_worker.resume("s1", second, after_seq=0)
+        await _settle()
+
+        assert [message["event"]["type"] for message in first.sent] == ["error"] + ["content_delta"] * 5
+        assert all(message["seq"] is None for message in first.sent[1:])
+        assert [message["event"]["payload"]["message"] for message in second.sent] == ["one"]
+        release.set()
+        await task
+        await socket_worker.disconnect("s1", second)
+        await asyncio.sleep(0.1)
+
+    @pytest.mark.asyncio
+    async def test_resume_without_job(self):
+        """Resuming a session no worker has a job for reports it and forwards new events"""
+        socket_worker, job_worker = self._workers()
+        websocket = FakeWebSocket()
+
+        assert not await socket_worker.resume("s1", websocket, after_seq=3)
+        await job_worker.send_event("s1", _event("s1", "later"))
+        await _settle()
+
+        assert websocket.sent[0]["event"]["payload"]["message"] == "later"
+        await socket_worker.disconnect("s1")
+
+    @pytest.mark.asyncio
+    async def test_stale_disconnect_keeps_new_socket(self):
+        """Disconnecting a replaced socket leaves the session's current socket registered"""
+        manager, _ = self._workers()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await manager.register("s1", old)
+        await manager.register("s1", new)
+
+        await manager.disconnect("s1", old)
+
+        assert manager.active_connections["s1"] is new
+        await manager.disconnect("s1", new)
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_new_job_replaces_running_one(self, monkeypatch):
+        """Starting a job for a session cancels the one it already has"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        manager, _ = self._workers()
+
+        first = await manager.start_job("s1", asyncio.sleep(10))
+        second = await manager.start_job("s1", asyncio.sleep(10))
+        await _settle()
+
+        assert first.cancelled()
+        assert not second.done()
+        assert manager.session_tasks["s1"] is second
+        second.cancel()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_gets_latest_progress(self):
+        """Progress queued behind a blocked send is coalesced to the latest one"""
+        manager, _ = self._workers()
+        websocket = BlockedWebSocket()
+        await manager.register("s1", websocket)
+
+        for step in range(5):
+            await manager.send_event("s1", ProgressEvent(event_id=str(step), session_id="s1", payload={"step": step}))
+            await _settle()
+        websocket.release.set()
+        await _settle()
+
+        steps = [message["event"]["payload"]["step"] for message in websocket.sent]
+        assert steps == [0, 4]
+        assert manager.stats()["sessions"]["s1"]["coalesced"] == 3
+        await manager.disconnect("s1")
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_disconnected(self, monkeypatch):
+        """A client too far behind is closed with 1013 and its session released"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_SEND_QUEUE_SIZE", 1)
+        manager, _ = self._workers()
+        websocket = BlockedWebSocket()
+        await manager.register("s1", websocket)
+
+        for message in ("first", "second", "third"):
+            await manager.send_event("s1", _event("s1", message))
+            await _settle()
+
+        assert websocket.close_code == 1013
+        assert not manager.is_connected("s1")
+        assert "s1" not in manager.stats()["sessions"]
+
+
+    @pytest.mark.asyncio
+    async def test_failed_send_detaches_session(self, monkeypatch):
+        """A socket whose send fails is detached, starting the job's grace period"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0.01)
+        socket_worker, job_worker = self._workers()
+        websocket = BrokenWebSocket()
+        await socket_worker.register("s1", websocket)
+        task = await job_worker.start_job("s1", asyncio.sleep(10))
+
+        await job_worker.send_event("s1", _event("s1", "lost"))
+        await _settle()
+        # The endpoint's own disconnect comes later and finds nothing left to do
+        await socket_worker.disconnect("s1", websocket)
+        await asyncio.sleep(0.05)
+
+        assert task.cancelled()
+        assert "s1" not in socket_worker.active_connections
+        assert "s1" not in socket_worker.attachments
+        assert "s1" not in socket_worker.last_activity
+        assert "s1" not in socket_worker.stats()["sessions"]
+
+class TestSessionLifecycle:
+    """Test job caps, takeover and reaping of sessions"""
+
+    def _manager(self):
+        return ConnectionManager(RedisEventBus(FakeRedis().client()))
+
+    @pytest.mark.asyncio
+    async def test_per_client_cap(self, monkeypatch):
+        """A client at its job cap is refused; replacing its own session's job is not"""
+        monkeypatch.setattr("app.routes.websocket.settings.MAX_EDIT_JOBS_PER_CLIENT", 1)
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        manager = self._manager()
+        await manager.start_job("s1", asyncio.sleep(10), client_id="10.0.0.1")
+
+        job = asyncio.sleep(10)
+        with pytest.raises(TooManyJobsError):
+            await manager.start_job("s2", job, client_id="10.0.0.1")
+        replacement = await manager.start_job("s1", asyncio.sleep(10), client_id="10.0.0.1")
+        other = await manager.start_job("s3", asyncio.sleep(10), client_id="10.0.0.2")
+
+        assert job.cr_frame is None
+        assert manager.stats()["jobs_per_client"] == {"10.0.0.1": 1, "10.0.0.2": 1}
+        replacement.cancel()
+        other.cancel()
+        await _settle()
+        assert manager.stats()["jobs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_server_cap(self, monkeypatch):
+        """No client gets a job once the worker is at its cap"""
+        monkeypatch.setattr("app.routes.websocket.settings.MAX_EDIT_JOBS", 1)
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        manager = self._manager()
+        task = await manager.start_job("s1", asyncio.sleep(10))
+
+        with pytest.raises(TooManyJobsError):
+            await manager.start_job("s2", asyncio.sleep(10), client_id="10.0.0.2")
+        task.cancel()
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_new_socket_takes_over_session(self):
+        """Registering a second socket for a session closes the first one"""
+        manager = self._manager()
+        old, new = FakeWebSocket(), FakeWebSocket()
+        await manager.register("s1", old)
+        await manager.register("s1", new)
+
+        assert old.close_code == 4409
+        assert manager.active_connections["s1"] is new
+        await manager.disconnect("s1", new)
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_reap_idle_and_gone(self, monkeypatch):
+        """Gone and idle connections are reaped; idle ones with a running job are kept"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_IDLE_TIMEOUT_SECONDS", 60)
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        manager = self._manager()
+        idle, busy, gone, fresh = (FakeWebSocket() for _ in range(4))
+        for session_id, websocket in (("idle", idle), ("busy", busy), ("gone", gone), ("fresh", fresh)):
+            await manager.register(session_id, websocket)
+        job = await manager.start_job("busy", asyncio.sleep(10))
+        for session_id in ("idle", "busy"):
+            manager.last_activity[session_id] -= 120
+        gone.client_state = WebSocketState.DISCONNECTED
+
+        assert await manager.reap() == 2
+
+        assert idle.close_code == 1001
+        assert set(manager.active_connections) == {"busy", "fresh"}
+        job.cancel()
+        for session_id, websocket in (("busy", busy), ("fresh", fresh)):
+            await manager.disconnect(session_id, websocket)
+        await _settle()
+
+    @pytest.mark.asyncio
+    async def test_stats_count_buffered_bytes(self, monkeypatch):
+        """Stats include the bytes held in event logs"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        manager = self._manager()
+        release = asyncio.Event()
+        task = await manager.start_job("s1", release.wait())
+        await manager.send_event("s1", _event("s1", "kept"))
+
+        stats = manager.stats()
+
+        assert stats["jobs"] == 1
+        assert stats["event_logs"] == 1
+        assert stats["buffered_bytes"] > 0
+        release.set()
+        await _settle()
+        assert task.done()
+
+
+class TestEditDocumentationSocket:
+    """Test the edit WebSocket endpoint end to end on the in-process bus"""
+
+    def test_streams_job_events_then_finished(self, monkeypatch):
+        """Events of the edit job reach the socket, followed by the finished event"""
+        monkeypatch.setattr("app.routes.websocket.settings.WS_RESUME_GRACE_SECONDS", 0)
+        from unittest.mock import MagicMock
+        from fastapi.testclient import TestClient
+        from app.api.dependencies import get_edit_service
+        from app.main import app
+
+        async def stream(edit_request, session_id):
+            yield _event(session_id, "working")
+
+        edit_service = MagicMock()
+        edit_service.edit_documentation_stream = stream
+        app.dependency_overrides[get_edit_service] = lambda: edit_service
+        try:
+            with TestClient(app) as client, client.websocket_connect("/ws/edit-documentation") as websocket:
+                websocket.send_text(json.dumps({"session_id": "s1", "edit_request": {"query": "fix typos"}}))
+                first = websocket.receive_json()
+                second = websocket.receive_json()
+        finally:
+            app.dependency_overrides.clear()
+
+        assert first["event"]["payload"]["message"] == "working"
+        assert second["event"]["type"] == "finished"
+        assert (first["seq"], second["seq"]) == (1, 2)
+
+    def test_session_stats_route(self):
+        """The stats route reports this worker's sessions"""
+        from fastapi.testclient import TestClient
+        from app.main import app
+
+        with TestClient(app) as client:
+            response = client.get("/ws/sessions")
+
+        assert response.status_code == 200
+        assert {"connections", "jobs", "buffered_bytes"} <= set(response.json())
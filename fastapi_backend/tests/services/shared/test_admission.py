@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from app.core.exceptions import EditQueueFullError
+from app.services.shared.admission import EditAdmissionController
+
+
+async def _positions(controller, ticket, seen):
+    async for position, estimated_wait in controller.wait(ticket):
+        seen.append((position, estimated_wait))
+
+
+class TestEditAdmissionController:
+    """Test the EditAdmissionController class"""
+
+    def test_invalid_limits(self):
+        """A running limit below one or a negative queue is rejected"""
+        with pytest.raises(ValueError):
+            EditAdmissionController(max_running=0, max_queued=1)
+        with pytest.raises(ValueError):
+            EditAdmissionController(max_running=1, max_queued=-1)
+
+    def test_admits_while_room(self):
+        """Jobs are admitted at once up to the running limit"""
+        controller = EditAdmissionController(max_running=2, max_queued=2)
+
+        first, second, third = (controller.enqueue() for _ in range(3))
+
+        assert first.admitted and second.admitted
+        assert not third.admitted
+        assert controller.stats()["running"] == 2
+        assert controller.stats()["queued"] == 1
+
+    def test_sheds_load_when_queue_full(self):
+        """A job arriving at a full queue is refused with a retry hint"""
+        controller = EditAdmissionController(max_running=1, max_queued=1, initial_estimate=12)
+        controller.enqueue()
+        controller.enqueue()
+
+        with pytest.raises(EditQueueFullError) as error:
+            controller.enqueue()
+
+        assert error.value.retry_after == 12
+        assert controller.stats()["rejected"] == 1
+
+    @pytest.mark.asyncio
+    async def test_waiter_follows_position(self):
+        """A queued job sees its position and estimated wait change until admitted"""
+        controller = EditAdmissionController(max_running=1, max_queued=4, initial_estimate=10)
+        running = controller.enqueue()
+        ahead = controller.enqueue()
+        ticket = controller.enqueue()
+        seen = []
+        waiter = asyncio.create_task(_positions(controller, ticket, seen))
+        await asyncio.sleep(0)
+
+        controller.release(ahead)
+        await asyncio.sleep(0)
+        controller.release(running)
+        await waiter
+
+        assert seen == [(2, 20), (1, 10)]
+        assert ticket.admitted
+
+    def test_priority_then_arrival_order(self):
+        """Higher priority jobs are admitted first, equal ones in arrival order"""
+        controller = EditAdmissionController(max_running=1, max_queued=4)
+        running = controller.enqueue()
+        low = controller.enqueue("low")
+        first = controller.enqueue()
+        high = controller.enqueue("high")
+        second = controller.enqueue()
+
+        order = []
+        for _ in range(4):
+            controller.release(running)
+            running = next(t for t in (low, first, high, second) if t.admitted and t not in order)
+            order.append(running)
+
+        assert order == [high, first, second, low]
+
+    @pytest.mark.asyncio
+    async def test_cancelled_wait_gives_up_place(self):
+        """Releasing a queued ticket removes it without taking a slot"""
+        controller = EditAdmissionController(max_running=1, max_queued=2)
+        running = controller.enqueue()
+        ticket = controller.enqueue()
+        waiter = asyncio.create_task(_positions(controller, ticket, []))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        controller.release(ticket)
+        controller.release(running)
+
+        assert controller.stats()["queued"] == 0
+        assert controller.stats()["running"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slot_records_run_duration(self):
+        """The running average of run durations moves towards finished runs"""
+        controller = EditAdmissionController(max_running=1, max_queued=0, initial_estimate=100)
+
+        async with controller.slot():
+            assert controller.running == 1
+
+        assert controller.running == 0
+        assert controller.average_run < 100
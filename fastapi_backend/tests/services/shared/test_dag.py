@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.services.shared.dag import (
+    DagNode,
+    DependencyCycleError,
+    DependencyFailedError,
+    run_dag,
+)
+
+
+def _node(key, log, deps=(), result=None, error=None, gate=None):
+    async def run(prerequisites):
+        log.append(("start", key, dict(prerequisites)))
+        if gate is not None:
+            await gate.wait()
+        if error is not None:
+            raise error
+        log.append(("end", key))
+        return result if result is not None else key
+
+    return DagNode(key=key, run=run, deps=set(deps))
+
+
+class TestRunDag:
+    """Test the run_dag executor"""
+
+    @pytest.mark.asyncio
+    async def test_dependents_wait_only_on_their_prerequisites(self):
+        """An unrelated slow node does not hold back a dependency chain"""
+        log, slow_gate = [], asyncio.Event()
+        nodes = [
+            _node("slow", log, gate=slow_gate),
+            _node("parent", log, result={"en": "p1"}),
+            _node("child", log, deps=["parent"]),
+        ]
+
+        run = asyncio.create_task(run_dag(nodes, max_concurrency=4))
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert ("end", "child") in log
+        assert ("end", "slow") not in log
+        child_start = next(entry for entry in log if entry[:2] == ("start", "child"))
+        assert child_start[2] == {"parent": {"en": "p1"}}
+
+        slow_gate.set()
+        results = await run
+        assert results == {"slow": "slow", "parent": {"en": "p1"}, "child": "child"}
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """No more than max_concurrency nodes run at once"""
+        log, gate = [], asyncio.Event()
+        nodes = [_node(f"n{i}", log, gate=gate) for i in range(5)]
+
+        run = asyncio.create_task(run_dag(nodes, max_concurrency=2))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert sum(1 for entry in log if entry[0] == "start") == 2
+
+        gate.set()
+        results = await run
+        assert len(results) == 5
+
+    @pytest.mark.asyncio
+    async def test_failure_skips_downstream(self):
+        """Nodes downstream of a failure are skipped, siblings still run"""
+        log = []
+        nodes = [
+            _node("root", log, error=RuntimeError("boom")),
+            _node("child", log, deps=["root"]),
+            _node("grandchild", log, deps=["child"]),
+            _node("other", log),
+        ]
+
+        results = await run_dag(nodes, max_concurrency=2)
+
+        assert isinstance(results["root"], RuntimeError)
+        assert isinstance(results["child"], DependencyFailedError)
+        assert isinstance(results["grandchild"], DependencyFailedError)
+        assert results["other"] == "other"
+        assert not any(entry[1] in ("child", "grandchild") for entry in log)
+
+    @pytest.mark.asyncio
+    async def test_cycles_are_reported(self):
+        """Nodes in a cycle never run and do not block the rest"""
+        log = []
+        nodes = [
+            _node("a", log, deps=["b"]),
+            _node("b", log, deps=["a"]),
+            _node("c", log),
+        ]
+
+        results = await run_dag(nodes, max_concurrency=2)
+
+        assert isinstance(results["a"], DependencyCycleError)
+        assert isinstance(results["b"], DependencyCycleError)
+        assert results["c"] == "c"
+
+    @pytest.mark.asyncio
+    async def test_unknown_dependency(self):
+        """Dependencies on missing nodes are rejected up front"""
+        with pytest.raises(ValueError):
+            await run_dag([_node("a", [], deps=["missing"])], max_concurrency=1)
@@ -0,0 +1,37 @@
+import pytest
+
+from app.services.shared.event_log import SessionEventLog
+
+
+class TestSessionEventLog:
+    """Test the SessionEventLog class"""
+
+    def test_invalid_size(self):
+        """A size below one is rejected"""
+        with pytest.raises(ValueError):
+            SessionEventLog(0)
+
+    def test_numbers_messages_in_order(self):
+        """Messages are numbered from one and replayed after a given number"""
+        log = SessionEventLog(10)
+
+        assert [log.append(message) for message in ("a", "b", "c")] == [1, 2, 3]
+        assert log.since(1) == [(2, "b"), (3, "c")]
+        assert log.since(3) == []
+        assert log.next_seq == 4
+
+    def test_bounded(self):
+        """Only the newest messages are kept"""
+        log = SessionEventLog(2)
+        for message in ("a", "b", "c"):
+            log.append(message)
+
+        assert len(log) == 2
+        assert log.since(0) == [(2, "b"), (3, "c")]
+        assert log.size_bytes == 2
+
+    def test_continues_from_start(self):
+        """A log for a later job of the session continues the numbering"""
+        log = SessionEventLog(4, start=7)
+
+        assert log.append("a") == 8
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.services.shared.outbox import SessionOutbox, SlowConsumerError
+
+
+async def _drain(outbox):
+    messages = []
+    while outbox.depth:
+        message, _, _ = await outbox.get()
+        messages.append(message)
+    return messages
+
+
+class TestSessionOutbox:
+    """Test the SessionOutbox class"""
+
+    def test_invalid_arguments(self):
+        """A size below one or an unknown policy is rejected"""
+        with pytest.raises(ValueError):
+            SessionOutbox(0)
+        with pytest.raises(ValueError):
+            SessionOutbox(4, policy="block")
+
+    @pytest.mark.asyncio
+    async def test_progress_is_coalesced(self):
+        """A queued progress event is replaced by the next one, which moves to the back"""
+        outbox = SessionOutbox(8)
+        outbox.put("p1", "progress")
+        outbox.put("doc", "document_completed")
+        outbox.put("p2", "progress")
+
+        assert await _drain(outbox) == ["doc", "p2"]
+        assert outbox.stats.coalesced == 1
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_progress_first(self):
+        """With drop_progress a full queue makes room by dropping a progress event"""
+        outbox = SessionOutbox(2)
+        outbox.put("p1", "progress")
+        outbox.put("a", "document_completed")
+        outbox.put("b", "document_completed")
+
+        assert await _drain(outbox) == ["a", "b"]
+        assert outbox.stats.dropped == 1
+
+    def test_full_queue_drops_incoming_progress(self):
+        """A progress event arriving at a queue of important events is dropped"""
+        outbox = SessionOutbox(1)
+        outbox.put("a", "document_completed")
+        outbox.put("p1", "progress")
+
+        assert outbox.depth == 1
+        assert outbox.stats.dropped == 1
+
+    def test_full_queue_of_important_events_gives_up(self):
+        """With nothing left to drop the consumer is treated as too slow"""
+        outbox = SessionOutbox(1)
+        outbox.put("a", "document_completed")
+
+        with pytest.raises(SlowConsumerError):
+            outbox.put("b", "document_completed")
+
+    def test_disconnect_policy_gives_up_at_once(self):
+        """With disconnect a full queue raises even when progress could be dropped"""
+        outbox = SessionOutbox(1, policy="disconnect")
+        outbox.put("p1", "progress")
+
+        with pytest.raises(SlowConsumerError):
+            outbox.put("a", "document_completed")
+
+    @pytest.mark.asyncio
+    async def test_get_waits_for_message(self):
+        """get blocks until a message is queued"""
+        outbox = SessionOutbox(4)
+        waiter = asyncio.create_task(outbox.get())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        outbox.put("a", header="a-header")
+        message, header, enqueued_at = await waiter
+
+        assert message == "a"
+        assert header == "a-header"
+        assert enqueued_at > 0
+
+    def test_snapshot(self):
+        """snapshot reports depth, policy and send statistics"""
+        outbox = SessionOutbox(4)
+        outbox.put("a")
+        outbox.put("b")
+        outbox.stats.record_send(0.5)
+        outbox.stats.record_send(1.5)
+
+        snapshot = outbox.snapshot()
+
+        assert snapshot["depth"] == 2
+        assert snapshot["max_depth"] == 2
+        assert snapshot["policy"] == "drop_progress"
+        assert snapshot["avg_send_latency"] == 1.0
+        assert snapshot["max_send_latency"] == 1.5
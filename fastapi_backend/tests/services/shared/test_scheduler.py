@@ -0,0 +1,163 @@
+import asyncio
+
+import pytest
+
+from app.services.shared.scheduler import AgentRunScheduler
+
+
+async def _hold(scheduler, session_id, priority, started, release, name):
+    async with scheduler.slot(session_id, priority):
+        started.append(name)
+        await release.wait()
+
+
+class TestAgentRunScheduler:
+    """Test the AgentRunScheduler class"""
+
+    def test_invalid_limits(self):
+        """Limits below one are rejected"""
+        with pytest.raises(ValueError):
+            AgentRunScheduler(max_concurrency=0, max_per_session=1)
+        with pytest.raises(ValueError):
+            AgentRunScheduler(max_concurrency=1, max_per_session=0)
+
+    @pytest.mark.asyncio
+    async def test_global_cap(self):
+        """No more than max_concurrency runs hold a slot at once"""
+        scheduler = AgentRunScheduler(max_concurrency=2, max_per_session=10)
+        started, release = [], asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(
+                _hold(scheduler, f"s{i}", "medium", started, release, i)
+            )
+            for i in range(5)
+        ]
+        await asyncio.sleep(0)
+
+        assert scheduler.active == 2
+        assert scheduler.queued == 3
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(started) == 5
+        assert scheduler.active == 0
+        assert scheduler.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_per_session_cap(self):
+        """A session cannot exceed max_per_session even with free global slots"""
+        scheduler = AgentRunScheduler(max_concurrency=10, max_per_session=2)
+        started, release = [], asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(
+                _hold(scheduler, "same", "medium", started, release, i)
+            )
+            for i in range(4)
+        ]
+        await asyncio.sleep(0)
+
+        assert scheduler.active == 2
+        assert scheduler.stats()["sessions"] == {"same": 2}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert len(started) == 4
+
+    @pytest.mark.asyncio
+    async def test_priority_order(self):
+        """Queued runs are served high before medium before low"""
+        scheduler = AgentRunScheduler(max_concurrency=1, max_per_session=10)
+        started, release = [], asyncio.Event()
+
+        blocker = asyncio.create_task(
+            _hold(scheduler, "a", "high", started, release, "blocker")
+        )
+        await asyncio.sleep(0)
+
+        tasks = [
+            asyncio.create_task(_hold(scheduler, "a", p, started, release, p))
+            for p in ["low", "medium", "high"]
+        ]
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(blocker, *tasks)
+
+        assert started == ["blocker", "high", "medium", "low"]
+
+    @pytest.mark.asyncio
+    async def test_fairness_across_sessions(self):
+        """A session with runs in flight yields to a session with none"""
+        scheduler = AgentRunScheduler(max_concurrency=2, max_per_session=2)
+        started, release_busy, release_rest = [], asyncio.Event(), asyncio.Event()
+
+        busy = asyncio.create_task(
+            _hold(scheduler, "busy", "medium", started, release_busy, "busy-1")
+        )
+        other = asyncio.create_task(
+            _hold(scheduler, "other", "medium", started, release_busy, "other-1")
+        )
+        await asyncio.sleep(0)
+
+        # Both sessions queue more work; "busy" queued first
+        queued = [
+            asyncio.create_task(
+                _hold(scheduler, "busy", "medium", started, release_rest, "busy-2")
+            ),
+            asyncio.create_task(
+                _hold(scheduler, "fresh", "medium", started, release_rest, "fresh-1")
+            ),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queued == 2
+
+        # Free one slot: "busy" still has a run in flight, "fresh" has none
+        other.cancel()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert started[-1] == "fresh-1"
+
+        release_busy.set()
+        release_rest.set()
+        await asyncio.gather(busy, *queued)
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_is_removed(self):
+        """Cancelling a queued run removes it without leaking a slot"""
+        scheduler = AgentRunScheduler(max_concurrency=1, max_per_session=1)
+        started, release = [], asyncio.Event()
+
+        holder = asyncio.create_task(
+            _hold(scheduler, "s", "medium", started, release, "holder")
+        )
+        waiter = asyncio.create_task(
+            _hold(scheduler, "s", "medium", started, release, "waiter")
+        )
+        await asyncio.sleep(0)
+        assert scheduler.queued == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.queued == 0
+
+        release.set()
+        await holder
+        assert scheduler.active == 0
+        assert started == ["holder"]
+
+    @pytest.mark.asyncio
+    async def test_wait_metrics(self):
+        """Queue waits are recorded per priority"""
+        scheduler = AgentRunScheduler(max_concurrency=4, max_per_session=4)
+
+        result = await scheduler.run("s", "high", lambda: asyncio.sleep(0, "done"))
+        await scheduler.run("s", "unknown", lambda: asyncio.sleep(0))
+
+        assert result == "done"
+        wait = scheduler.stats()["wait"]
+        assert wait["high"]["count"] == 1
+        # Unknown priorities fall back to medium
+        assert wait["medium"]["count"] == 1
+        assert wait["high"]["max_wait"] >= 0.0
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from app.services.shared.single_flight import SingleFlight
+
+
+class _Source:
+    """A stream that yields what it is given, counting how often it was started"""
+
+    def __init__(self):
+        self.starts = 0
+        self.queue = asyncio.Queue()
+        self.cancelled = False
+
+    async def stream(self):
+        self.starts += 1
+        try:
+            while True:
+                item = await self.queue.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+async def _collect(flights, key, source, into):
+    async for event in flights.join(key, source.stream):
+        into.append(event)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestSingleFlight:
+    """Test the SingleFlight class"""
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_one_run(self):
+        """A request joining mid-run gets earlier events, then live ones, from the same run"""
+        flights, source = SingleFlight(), _Source()
+        first, second = [], []
+        leader = asyncio.create_task(_collect(flights, "k", source, first))
+        source.queue.put_nowait("a")
+        await _settle()
+
+        follower = asyncio.create_task(_collect(flights, "k", source, second))
+        await _settle()
+        assert flights.stats()["subscribers"] == 2
+        source.queue.put_nowait("b")
+        source.queue.put_nowait(None)
+        await asyncio.gather(leader, follower)
+
+        assert first == second == ["a", "b"]
+        assert source.starts == 1
+        assert flights.stats() == {"in_flight": 0, "subscribers": 0, "started": 1, "joined": 1}
+
+    @pytest.mark.asyncio
+    async def test_different_keys_run_separately(self):
+        """Requests with different keys each get their own run"""
+        flights, source = SingleFlight(), _Source()
+        one = asyncio.create_task(_collect(flights, "one", source, []))
+        two = asyncio.create_task(_collect(flights, "two", source, []))
+        await _settle()
+
+        assert source.starts == 2
+        source.queue.put_nowait(None)
+        source.queue.put_nowait(None)
+        await asyncio.gather(one, two)
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_subscriber(self):
+        """A run that fails raises in every subscriber after its events"""
+        flights, source = SingleFlight(), _Source()
+        first, second = [], []
+        tasks = [
+            asyncio.create_task(_collect(flights, "k", source, first)),
+            asyncio.create_task(_collect(flights, "k", source, second)),
+        ]
+        await _settle()
+        source.queue.put_nowait("a")
+        source.queue.put_nowait(ValueError("boom"))
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert [type(result) for result in results] == [ValueError, ValueError]
+        assert first == second == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_run_continues_while_anyone_listens(self):
+        """One subscriber leaving does not cancel the run; the last one leaving does"""
+        flights, source = SingleFlight(), _Source()
+        first = asyncio.create_task(_collect(flights, "k", source, []))
+        second = asyncio.create_task(_collect(flights, "k", source, []))
+        await _settle()
+
+        first.cancel()
+        await _settle()
+        assert not source.cancelled
+
+        second.cancel()
+        await _settle()
+        assert source.cancelled
+        assert flights.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_finished_run_is_not_reused(self):
+        """A request after the run finished starts a new run"""
+        flights, source = SingleFlight(), _Source()
+        source.queue.put_nowait(None)
+        await _collect(flights, "k", source, [])
+        source.queue.put_nowait(None)
+        await _collect(flights, "k", source, [])
+
+        assert source.starts == 2
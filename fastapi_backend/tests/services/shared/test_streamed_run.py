@@ -0,0 +1,186 @@
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from app.services.shared.streamed_run import PartialJSONTextReader, StreamedAgentRun
+
+
+def _read(reader, fragments):
+    """Text pieces decoded from ``fragments``, merged per path"""
+    pieces = []
+    for fragment in fragments:
+        for path, text in reader.feed(fragment):
+            if pieces and pieces[-1][0] == path:
+                pieces[-1] = (path, pieces[-1][1] + text)
+            else:
+                pieces.append((path, text))
+    return pieces
+
+
+class _FakeStreamedResult:
+    """Stands in for RunResultStreaming, producing text deltas of ``output``"""
+
+    def __init__(self, deltas, final_output=None, error=None, guardrail_done_after=0, tripped=False):
+        self.deltas = deltas
+        self.final_output = final_output
+        self.error = error
+        self.guardrail_done_after = guardrail_done_after
+        self.tripped = tripped
+        self.input_guardrail_results = []
+        self.is_complete = False
+        self.cancelled = False
+
+    async def stream_events(self):
+        yield SimpleNamespace(type="agent_updated_stream_event", data=None)
+        for index, delta in enumerate(self.deltas):
+            if index == self.guardrail_done_after:
+                self.input_guardrail_results.append(
+                    SimpleNamespace(output=SimpleNamespace(tripwire_triggered=self.tripped))
+                )
+            yield SimpleNamespace(
+                type="raw_response_event",
+                data=SimpleNamespace(type="response.output_text.delta", delta=delta),
+            )
+        if self.error:
+            raise self.error
+        self.is_complete = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def final_output_as(self, cls):
+        return self.final_output
+
+
+class TestPartialJSONTextReader:
+    """Test reading string fields out of partial JSON"""
+
+    def test_one_character_at_a_time(self):
+        """Text is decoded as it arrives, whatever the fragment boundaries"""
+        document = {
+            "documents": [
+                {"name": "a", "markdown_content_en": "# A\n\nSay \"hi\" \\ 日本 😀"},
+                {"name": "b", "markdown_content_ja": None, "markdown_content_en": "B"},
+            ],
+            "error": None,
+        }
+        encoded = json.dumps(document)
+        reader = PartialJSONTextReader(["markdown_content_en"])
+
+        assert _read(reader, list(encoded)) == [
+            (["documents", 0, "markdown_content_en"], "# A\n\nSay \"hi\" \\ 日本 😀"),
+            (["documents", 1, "markdown_content_en"], "B"),
+        ]
+
+    def test_ignores_other_fields_and_keys(self):
+        """Only string values under the requested keys are returned"""
+        reader = PartialJSONTextReader(["edited_text"])
+        encoded = json.dumps({"edited_text_note": "x", "tags": ["edited_text"], "edited_text": "done"})
+
+        assert _read(reader, [encoded[:10], encoded[10:30], encoded[30:]]) == [(["edited_text"], "done")]
+
+    def test_text_before_string_closes(self):
+        """A fragment ending mid-string returns the text so far"""
+        reader = PartialJSONTextReader(["edited_text"])
+
+        assert reader.feed('{"edited_text": "Hel') == [(["edited_text"], "Hel")]
+        assert reader.feed('lo\\u00e9') == [(["edited_text"], "loé")]
+        assert reader.feed('"}') == []
+
+
+class TestStreamedAgentRun:
+    """Test streaming an agent run's output text"""
+
+    async def _collect(self, result, flush_interval, guardrails=0):
+        agent = SimpleNamespace(input_guardrails=[object()] * guardrails)
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result):
+            run = StreamedAgentRun(agent, "input", ["edited_text"], flush_interval=flush_interval)
+            return run, [piece async for piece in run.deltas()]
+
+    @pytest.mark.asyncio
+    async def test_first_piece_at_once_then_batched(self):
+        """The first text goes out straight away; later deltas are batched"""
+        result = _FakeStreamedResult(['{"edited_text": "He', "l", "lo", '"}'], final_output="final")
+        run, pieces = await self._collect(result, flush_interval=60)
+
+        assert pieces == [(["edited_text"], "He"), (["edited_text"], "llo")]
+        assert run.final_output_as(str) == "final"
+        assert not result.cancelled
+
+    @pytest.mark.asyncio
+    async def test_every_delta_without_batching(self):
+        """With no flush interval every delta is its own piece"""
+        result = _FakeStreamedResult(['{"edited_text": "He', "l", "lo", '"}'])
+        _, pieces = await self._collect(result, flush_interval=0)
+
+        assert [text for _, text in pieces] == ["He", "l", "lo"]
+
+    @pytest.mark.asyncio
+    async def test_held_until_guardrails_pass(self):
+        """Text written before the input guardrails pass is held, then sent together"""
+        result = _FakeStreamedResult(['{"edited_text": "He', "l", "lo", " more", '"}'], guardrail_done_after=2)
+        agent = SimpleNamespace(input_guardrails=[object()])
+        pieces = []
+
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result):
+            run = StreamedAgentRun(agent, "input", ["edited_text"], flush_interval=0)
+            async for piece in run.deltas():
+                pieces.append((piece, len(result.input_guardrail_results)))
+
+        assert pieces == [((["edited_text"], "Hello"), 1), ((["edited_text"], " more"), 1)]
+
+    @pytest.mark.asyncio
+    async def test_nothing_sent_when_guardrail_trips(self):
+        """A tripped guardrail raises without any of the text written so far"""
+        result = _FakeStreamedResult(['{"edited_text": "He', "llo"], error=RuntimeError("tripwire"), guardrail_done_after=99)
+        agent = SimpleNamespace(input_guardrails=[object()])
+        pieces = []
+
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result):
+            run = StreamedAgentRun(agent, "input", ["edited_text"], flush_interval=0)
+            with pytest.raises(RuntimeError, match="tripwire"):
+                async for piece in run.deltas():
+                    pieces.append(piece)
+
+        assert pieces == []
+
+    @pytest.mark.asyncio
+    async def test_nothing_sent_when_guardrail_result_is_tripped(self):
+        """A tripped guardrail result recorded while text is held does not release it"""
+        result = _FakeStreamedResult(
+            ['{"edited_text": "He', "l", "lo"], error=RuntimeError("tripwire"), guardrail_done_after=1, tripped=True
+        )
+        agent = SimpleNamespace(input_guardrails=[object()])
+        pieces = []
+
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result):
+            run = StreamedAgentRun(agent, "input", ["edited_text"], flush_interval=0)
+            with pytest.raises(RuntimeError, match="tripwire"):
+                async for piece in run.deltas():
+                    pieces.append(piece)
+
+        assert pieces == []
+
+    @pytest.mark.asyncio
+    async def test_held_text_dropped_without_guardrail_result(self):
+        """A run that ends before its guardrails report sends only the final output"""
+        result = _FakeStreamedResult(['{"edited_text": "Hi"}'], final_output="final", guardrail_done_after=99)
+        agent = SimpleNamespace(input_guardrails=[object()])
+
+        with patch("app.services.shared.streamed_run.Runner.run_streamed", return_value=result):
+            run = StreamedAgentRun(agent, "input", ["edited_text"], flush_interval=0)
+            pieces = [piece async for piece in run.deltas()]
+
+        assert pieces == []
+        assert run.final_output_as(str) == "final"
+
+    @pytest.mark.asyncio
+    async def test_error_is_raised_and_run_cancelled(self):
+        """Errors of the run come out of deltas() and the run is cancelled"""
+        result = _FakeStreamedResult(['{"edited_text": "x'], error=RuntimeError("tripped"))
+
+        with pytest.raises(RuntimeError, match="tripped"):
+            await self._collect(result, flush_interval=0)
+        assert result.cancelled
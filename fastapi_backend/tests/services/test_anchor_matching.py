@@ -0,0 +1,124 @@
+from app.services.anchor_matching import NormalizedText, find_normalized, normalize
+from app.services.patching import apply_changes
+from app.services.shared.models import ContentChange
+
+
+def _change(old, new):
+    return ContentChange(old_string=old, new_string=new)
+
+
+class TestNormalizedText:
+    def test_collapses_whitespace_markers_and_quotes(self):
+        """Whitespace, <br>, bullet markers and smart quotes normalize away"""
+        raw = "Intro  text<br>\n* first\n2. second “quoted”"
+
+        assert NormalizedText(raw).text == 'Intro text - first - second "quoted"'
+
+    def test_offsets_map_back_to_raw(self):
+        """Every normalized span maps back to the raw text it came from"""
+        raw = "alpha\n\n   beta<br/>gamma"
+        index = NormalizedText(raw)
+
+        start = index.text.index("beta gamma")
+        raw_start, raw_end = index.to_raw(start, start + len("beta gamma"))
+
+        assert raw[raw_start:raw_end] == "beta<br/>gamma"
+
+    def test_list_match_keeps_preceding_newline(self):
+        """A match that starts at a bullet marker does not swallow the newline"""
+        raw = "intro\n- item"
+        index = NormalizedText(raw)
+
+        start = index.text.index("- item")
+        raw_start, _ = index.to_raw(start, start + len("- item"))
+
+        assert raw[raw_start:] == "- item"
+
+    def test_normalize_strips(self):
+        """normalize drops surrounding whitespace"""
+        assert normalize("\n  some   text \n") == "some text"
+
+
+class TestFindNormalized:
+    def test_resolves_whitespace_drift(self):
+        """An anchor with different spacing resolves with full confidence"""
+        raw = "# Title\n\nSome text   with\nextra spacing.\n"
+
+        match = find_normalized(NormalizedText(raw), "Some text with extra spacing.")
+
+        assert match.status == "found"
+        assert raw[match.start:match.end] == "Some text   with\nextra spacing."
+        assert match.confidence == 1.0
+
+    def test_marker_drift_lowers_confidence(self):
+        """List marker differences resolve but score below an exact match"""
+        raw = "Steps:\n* install\n* configure\n"
+
+        match = find_normalized(NormalizedText(raw), "- install\n- configure")
+
+        assert match.status == "found"
+        assert raw[match.start:match.end] == "* install\n* configure"
+        assert 0.75 < match.confidence < 1.0
+
+    def test_leading_whitespace_keeps_list_marker_gap(self):
+        """An anchor's leading whitespace does not widen over the space after a bullet"""
+        raw = "- item one"
+
+        match = find_normalized(NormalizedText(raw), "  item one")
+
+        assert match.status == "found"
+        assert raw[:match.start] == "- "
+        assert apply_changes(raw, [_change("  item one", "Q")]).content == "- Q"
+
+    def test_leading_whitespace_widens_over_blank_lines(self):
+        """Whitespace the anchor starts with is still taken from plain text"""
+        raw = "intro\n\nbody text"
+
+        match = find_normalized(NormalizedText(raw), "\n\nbody text")
+
+        assert raw[match.start:match.end] == "\n\nbody text"
+
+    def test_ambiguous_after_normalization(self):
+        """Anchors that repeat once normalized are reported as ambiguous"""
+        raw = "see  the docs\n\nsee the\ndocs"
+
+        assert find_normalized(NormalizedText(raw), "see the docs").status == "ambiguous"
+
+    def test_not_found(self):
+        """Anchors absent even after normalization are not found"""
+        assert find_normalized(NormalizedText("abc"), "xyz").status == "not_found"
+        assert find_normalized(NormalizedText("abc"), "  \n").status == "not_found"
+
+
+class TestApplyChangesNormalized:
+    def test_near_miss_anchor_is_applied(self):
+        """A near-miss anchor is applied locally and reported as normalized"""
+        original = "# Setup\n\nRun the “install” command.<br>Then restart.\n"
+
+        result = apply_changes(original, [
+            _change('Run the "install" command.\nThen restart.', "Run `make install`."),
+        ])
+
+        assert result.ok
+        assert result.content == "# Setup\n\nRun `make install`.\n"
+        change = result.changes[0]
+        assert change.match == "normalized"
+        assert change.confidence < 1.0
+
+    def test_exact_anchor_reports_exact(self):
+        """Exact anchors skip normalization entirely"""
+        result = apply_changes("plain text", [_change("plain", "simple")])
+
+        assert result.changes[0].match == "exact"
+        assert result.changes[0].confidence == 1.0
+
+    def test_low_confidence_is_a_conflict(self):
+        """Matches below the threshold are reported instead of applied"""
+        original = "Options:\n* a\n* b\n"
+
+        result = apply_changes(original, [_change("- a\n- b", "none")], min_confidence=0.99)
+
+        assert not result.ok
+        assert result.changes[0].status == "low_confidence"
+        assert result.content == original
+        assert "confidence" in result.conflict_summary()
@@ -1,10 +1,13 @@
+import asyncio
+
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 from app.services.content_processor import (
     detect_language,
     extract_urls_from_markdown,
-    process_document_content
+    process_document_content,
+    process_documents_content,
 )
 
 
@@ -116,4 +119,55 @@ class TestContentProcessor:
             # Verify mocks were called appropriately
             mock_embedding.assert_called_once_with(markdown_content)
             mock_keywords.assert_called_once_with(markdown_content, "en")
-            mock_summary.assert_called_once_with(markdown_content, "en")
\ No newline at end of file
+            mock_summary.assert_called_once_with(markdown_content, "en")
+
+    @pytest.mark.asyncio
+    async def test_process_documents_content_batches_embeddings(self):
+        """Embeddings are requested per batch and results keep input order."""
+        items = [(f"# Doc {i}\n\nhttps://example.com/{i}", "en") for i in range(5)] + [("", None)]
+
+        async def fake_embeddings(texts):
+            return [[float(len(text))] for text in texts]
+
+        with patch('app.services.content_processor.create_embeddings', side_effect=fake_embeddings) as mock_embeddings, \
+             patch('app.services.content_processor.extract_keywords', return_value=["doc"]) as mock_keywords, \
+             patch('app.services.content_processor.generate_summary', return_value="A doc."), \
+             patch('app.services.content_processor.settings') as mock_settings:
+            mock_settings.ENRICHMENT_MAX_CONCURRENCY = 2
+            mock_settings.VECTOR_DIMENSION = 3
+
+            results = await process_documents_content(items)
+
+        mock_embeddings.assert_called_once()
+        assert len(results) == 6
+        assert results[2]["urls_array"] == ["https://example.com/2"]
+        assert results[2]["embedding"] == [float(len(items[2][0]))]
+        assert results[2]["keywords_array"] == ["doc"]
+        # Empty content skips the chat calls
+        assert mock_keywords.call_count == 5
+        assert results[5]["summary"] == "No content available"
+        assert results[5]["language"] == "en"
+
+    @pytest.mark.asyncio
+    async def test_process_documents_content_falls_back_concurrently(self):
+        """Texts whose embedding failed get a summary embedding, requested concurrently."""
+        items = [("# One", "en"), ("# Two", "en"), ("# Three", "en")]
+        in_flight = []
+        peak = []
+
+        async def fake_embedding(text):
+            in_flight.append(text)
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(text)
+            return [float(len(text))]
+
+        with patch('app.services.content_processor.create_embeddings', AsyncMock(return_value=[None, [0.5], None])), \
+             patch('app.services.content_processor.create_embedding', side_effect=fake_embedding) as mock_embedding, \
+             patch('app.services.content_processor.extract_keywords', AsyncMock(return_value=["doc"])), \
+             patch('app.services.content_processor.generate_summary', AsyncMock(return_value="Summary.")):
+            results = await process_documents_content(items)
+
+        assert [result["embedding"] for result in results] == [[8.0], [0.5], [8.0]]
+        assert mock_embedding.call_count == 2
+        assert max(peak) == 2
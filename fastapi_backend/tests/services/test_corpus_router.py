@@ -0,0 +1,60 @@
+from app.services.corpus_router import CorpusRouter
+from app.services.retrieval import CandidateDocument, RetrievalResult
+
+
+def _retrieval(api_score=None, docs_score=None):
+    return RetrievalResult(
+        query_embedding=[0.1],
+        api_references=[CandidateDocument(id="a", similarity=api_score, is_api_ref=True)] if api_score is not None else [],
+        documentation=[CandidateDocument(id="d", similarity=docs_score)] if docs_score is not None else [],
+    )
+
+
+class TestCorpusRouter:
+    def test_runs_both_without_retrieval(self):
+        """Missing scores never skip a corpus"""
+        router = CorpusRouter(margin=0.1)
+
+        assert router.route(None).corpora == [True, False]
+        assert router.route(RetrievalResult()).corpora == [True, False]
+        assert router.stats()["skipped"] == 0
+
+    def test_skips_corpus_behind_by_margin(self):
+        """The weaker corpus is skipped once the gap reaches the margin"""
+        router = CorpusRouter(margin=0.1)
+
+        api_route = router.route(_retrieval(api_score=0.9, docs_score=0.7))
+        docs_route = router.route(_retrieval(api_score=0.5, docs_score=0.85))
+
+        assert api_route.corpora == [True]
+        assert api_route.skipped is False
+        assert docs_route.corpora == [False]
+        assert docs_route.skipped is True
+        assert router.skip_rate == 1.0
+
+    def test_runs_both_within_margin(self):
+        """Close scores keep both runs"""
+        router = CorpusRouter(margin=0.1)
+
+        route = router.route(_retrieval(api_score=0.82, docs_score=0.78))
+
+        assert route.corpora == [True, False]
+        assert route.skipped is None
+
+    def test_disabled(self):
+        """A disabled router always runs both corpora"""
+        router = CorpusRouter(margin=0.0, enabled=False)
+
+        assert router.route(_retrieval(api_score=0.9)).corpora == [True, False]
+
+    def test_record_outcome_tracks_fallbacks(self):
+        """Fallback runs after an empty routed run are counted"""
+        router = CorpusRouter(margin=0.1)
+        route = router.route(_retrieval(api_score=0.9, docs_score=0.1))
+
+        router.record_outcome(route, suggestions=0, fallback_suggestions=0)
+
+        stats = router.stats()
+        assert stats["fallbacks"] == 1
+        assert stats["empty_after_skip"] == 1
+        assert stats["fallback_rate"] == 1.0
@@ -0,0 +1,65 @@
+from app.services.diffing import diff_texts
+
+
+def _page(lines):
+    return "".join(f"{line}\n" for line in lines)
+
+
+class TestDiffTexts:
+    def test_identical_texts_have_no_hunks(self):
+        """Equal texts produce an empty diff"""
+        assert diff_texts("a\nb\n", "a\nb\n").hunks == []
+
+    def test_hunk_has_context_and_line_numbers(self):
+        """A change is reported with surrounding context and 1-based line numbers"""
+        old = _page(f"line {i}" for i in range(20))
+        new = old.replace("line 10\n", "line ten\n")
+
+        result = diff_texts(old, new)
+
+        assert result.added == 1 and result.removed == 1
+        [hunk] = result.hunks
+        assert (hunk.old_start, hunk.old_count, hunk.new_start, hunk.new_count) == (8, 7, 8, 7)
+        removed = [line for line in hunk.lines if line.op == "removed"]
+        assert removed[0].old_line == 11
+        assert [line.op for line in hunk.lines[:3]] == ["context"] * 3
+
+    def test_distant_changes_get_separate_hunks(self):
+        """Changes further apart than twice the context are split into hunks"""
+        old = _page(f"line {i}" for i in range(50))
+        new = old.replace("line 5\n", "changed\n").replace("line 40\n", "")
+
+        result = diff_texts(old, new)
+
+        assert len(result.hunks) == 2
+        assert result.hunks[1].lines[3].op == "removed"
+
+    def test_word_segments_for_similar_lines(self):
+        """Changed lines that pair up carry word-level segments"""
+        result = diff_texts("Call the `create` endpoint first.\n", "Call the `update` endpoint first.\n")
+
+        removed, added = result.hunks[0].lines
+        assert [segment.op for segment in added.segments] == ["equal", "added", "equal"]
+        assert "".join(segment.text for segment in added.segments) == added.text
+        assert [s.text for s in removed.segments if s.op == "removed"] == ["create"]
+
+    def test_unrelated_lines_have_no_segments(self):
+        """Rewritten lines are shown whole rather than word by word"""
+        result = diff_texts("alpha beta\n", "completely different words here\n")
+
+        assert all(line.segments is None for line in result.hunks[0].lines)
+
+    def test_hunks_reproduce_both_sides(self):
+        """Each hunk's lines rebuild the old and new ranges it covers"""
+        old = _page(f"row {i % 7}" for i in range(60))
+        new_lines = [f"row {i % 7}" for i in range(60)]
+        new_lines[3:5] = ["inserted", "rows"]
+        del new_lines[30]
+        new_lines.append("tail")
+        new = _page(new_lines)
+
+        for hunk in diff_texts(old, new).hunks:
+            old_side = [line.text for line in hunk.lines if line.op != "added"]
+            new_side = [line.text for line in hunk.lines if line.op != "removed"]
+            assert old_side == old.splitlines()[hunk.old_start - 1 : hunk.old_start - 1 + hunk.old_count]
+            assert new_side == new_lines[hunk.new_start - 1 : hunk.new_start - 1 + hunk.new_count]
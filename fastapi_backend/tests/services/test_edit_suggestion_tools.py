@@ -0,0 +1,88 @@
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from agents.tool_context import ToolContext
+
+from app.services.shared.models import ApiRef
+from app.services.tools.edit_suggesstion_tools import (
+    SimilarDocumentsResponse,
+    get_all_document_summaries,
+    get_similar_documents_based_on_embeddings,
+)
+
+MULTILINGUAL_DOC = {
+    "id": "doc-1",
+    "title": "Agents",
+    "path": "agents",
+    "is_api_ref": False,
+    "current_version_id": "v-en",
+    "language_versions": {"en": "v-en", "ja": "v-ja"},
+    "document_contents": {
+        "version": "v-en",
+        "summary": "About agents",
+        "language": "en",
+        "keywords_array": [],
+        "urls_array": [],
+    },
+}
+
+JA_CONTENT = {"version": "v-ja", "summary": "エージェント", "language": "ja", "keywords_array": [], "urls_array": []}
+
+
+def _table(rows):
+    """A supabase table whose query chain returns ``rows``"""
+    table = MagicMock()
+    query = MagicMock()
+    for name in ("select", "eq", "order", "in_", "is_"):
+        getattr(query, name).return_value = query
+    query.not_ = query
+    query.execute.return_value = MagicMock(data=rows)
+    table.select.return_value = query
+    return table
+
+
+def _supabase():
+    supabase = MagicMock()
+    tables = {"documents": _table([MULTILINGUAL_DOC]), "document_contents": _table([JA_CONTENT])}
+    supabase.table.side_effect = lambda name: tables[name]
+    supabase.rpc.return_value.execute.return_value = MagicMock(
+        data=[{**MULTILINGUAL_DOC["document_contents"], "id": "doc-1", "title": "Agents", "path": "agents",
+               "markdown_content": None, "similarity": 0.9, "is_api_ref": False}]
+    )
+    return supabase
+
+
+async def _invoke(tool, arguments):
+    context = ToolContext(
+        context=ApiRef(is_api_ref=False),
+        tool_name=tool.name,
+        tool_call_id="call-1",
+        tool_arguments=json.dumps(arguments),
+    )
+    return await tool.on_invoke_tool(context, json.dumps(arguments))
+
+
+class TestMultilingualDocuments:
+    """Test the edit suggestion tools on a document with several language heads"""
+
+    @pytest.mark.asyncio
+    async def test_summaries_list_every_language_head(self):
+        """All document summaries include the secondary language's current version"""
+        with patch("app.services.tools.edit_suggesstion_tools.supabase", _supabase()):
+            result = await _invoke(get_all_document_summaries, {})
+
+        assert isinstance(result, SimilarDocumentsResponse)
+        assert [(doc.version, doc.language) for doc in result.documents] == [("v-en", "en"), ("v-ja", "ja")]
+        assert result.documents[1].id == "doc-1"
+
+    @pytest.mark.asyncio
+    async def test_similarity_search_returns_matches(self):
+        """The similarity search returns the matched rows"""
+        with patch("app.services.tools.edit_suggesstion_tools.supabase", _supabase()), patch(
+            "app.services.tools.edit_suggesstion_tools.create_embedding", AsyncMock(return_value=[0.1])
+        ):
+            result = await _invoke(get_similar_documents_based_on_embeddings, {"config": {"query": "agents"}})
+
+        assert isinstance(result, SimilarDocumentsResponse)
+        assert [doc.version for doc in result.documents] == ["v-en"]
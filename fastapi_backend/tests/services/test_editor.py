@@ -1,6 +1,7 @@
+import json
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
-from app.services.editor import MainEditor
+from app.services.editor import MainEditor, merge_document_edits
 from app.models.edit_documentation import EditDocumentationResponse
 
 
@@ -216,6 +217,29 @@ class TestMainEditor:
         mock_runner.assert_called_once()
         mock_response.final_output_as.assert_called_once()
     
+    @pytest.mark.asyncio
+    @patch('app.services.editor.StreamedAgentRun')
+    async def test_handle_create_intent_streaming_forwards_deltas(self, mock_run_class):
+        """The streaming create handler yields content deltas before the created documents"""
+        from app.services.shared.models import GeneratedDocument
+
+        async def deltas():
+            yield ["documents", 0, "markdown_content_en"], "# Intro"
+
+        document = GeneratedDocument(name="intro", title="Intro", markdown_content_en="# Intro")
+        mock_run = MagicMock()
+        mock_run.deltas = deltas
+        mock_run.final_output_as.return_value = MagicMock(documents=[document])
+        mock_run_class.return_value = mock_run
+        mock_intent = MagicMock(task="create task", reason="create reason")
+
+        editor = MainEditor("create new documentation")
+        events = [event async for event in editor._handle_create_intent_streaming(mock_intent, "s1")]
+
+        assert [event.type for event in events] == ["progress", "content_delta", "document_created"]
+        assert events[1].payload == {"path": ["documents", 0, "markdown_content_en"], "delta": "# Intro"}
+        assert editor.create_documents == [document]
+
     @pytest.mark.asyncio
     @patch('app.services.editor.MainEditor._process_edit_suggestions')
     @patch('app.services.editor.MainEditor._get_edit_suggestions')
@@ -253,36 +277,37 @@ class TestMainEditor:
         mock_get_suggestions.assert_called_once_with(mock_intent)
     
     @pytest.mark.asyncio
-    @patch('app.services.editor.asyncio.gather', new_callable=AsyncMock)
-    @patch('app.services.editor.Runner.run')
-    async def test_process_edit_suggestions_success(self, mock_runner, mock_gather):
+    @patch('app.services.editor.MainEditor._run_edit_content_agent', new_callable=AsyncMock)
+    async def test_process_edit_suggestions_success(self, mock_run_agent):
         """Test _process_edit_suggestions method success"""
+        from app.services.agents.editor_agent import ContentChange, DocumentEdit
+
         # Create a mock suggestion with model_dump method
         mock_suggestion = MagicMock()
         mock_suggestion.model_dump.return_value = {"suggestion": "test suggestion"}
         
         # Mock the response from Runner.run
         mock_edit_response = MagicMock()
-        mock_changes = [MagicMock()]
+        mock_changes = [DocumentEdit(document_id="doc-1", version="v1", changes=[
+            ContentChange(old_string="old", new_string="new"),
+        ])]
         mock_edits = MagicMock()
         mock_edits.changes = mock_changes
         mock_edit_response.final_output_as.return_value = mock_edits
         
-        # Mock asyncio.gather to return the response
-        mock_gather.return_value = [mock_edit_response]
+        mock_run_agent.return_value = mock_edit_response
         
         editor = MainEditor("test query")
         result = await editor._process_edit_suggestions([mock_suggestion])
         
         assert len(result) == 1
         assert result[0] == mock_changes[0]
-        mock_gather.assert_called_once()
+        mock_run_agent.assert_awaited_once()
         mock_suggestion.model_dump.assert_called_once()
     
     @pytest.mark.asyncio
-    @patch('app.services.editor.asyncio.gather', new_callable=AsyncMock)
-    @patch('app.services.editor.Runner.run')
-    async def test_process_edit_suggestions_multiple(self, mock_runner, mock_gather):
+    @patch('app.services.editor.MainEditor._run_edit_content_agent', new_callable=AsyncMock)
+    async def test_process_edit_suggestions_multiple(self, mock_run_agent):
         """Test _process_edit_suggestions with multiple suggestions"""
         # Create mock suggestions with model_dump method
         mock_suggestion1 = MagicMock()
@@ -303,13 +328,297 @@ class TestMainEditor:
         mock_edits2.changes = mock_changes2
         mock_edit_response2.final_output_as.return_value = mock_edits2
         
-        # Mock asyncio.gather to return both responses
-        mock_gather.return_value = [mock_edit_response1, mock_edit_response2]
+        # One editor run per suggestion's document
+        mock_run_agent.side_effect = [mock_edit_response1, mock_edit_response2]
         
         editor = MainEditor("test query")
         result = await editor._process_edit_suggestions([mock_suggestion1, mock_suggestion2])
         
         assert len(result) == 3  # 1 from first response + 2 from second response
-        mock_gather.assert_called_once()
+        assert mock_run_agent.await_count == 2
         mock_suggestion1.model_dump.assert_called_once()
         mock_suggestion2.model_dump.assert_called_once()
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.MainEditor._run_edit_content_agent', new_callable=AsyncMock)
+    async def test_process_edit_suggestions_groups_by_document(self, mock_run_agent):
+        """Suggestions for the same document version share one editor run"""
+        from app.services.agents.edit_suggestion_agent import EditSuggestion
+        from app.services.agents.editor_agent import ContentChange, DocumentEdit, Edits
+
+        suggestions = [
+            EditSuggestion(document_id="doc-1", changes="a", version="v1", path="p/", priority="low"),
+            EditSuggestion(document_id="doc-2", changes="b", version="v2", path="q/"),
+            EditSuggestion(document_id="doc-1", changes="c", version="v1", path="p/", priority="high"),
+        ]
+
+        def make_result(task_input, priority):
+            group = json.loads(task_input)["suggestions"]
+            doc_id, version = group[0]["document_id"], group[0]["version"]
+            result = MagicMock()
+            result.final_output_as.return_value = Edits(changes=[
+                DocumentEdit(document_id=doc_id, version=version, changes=[
+                    ContentChange(old_string=f"old {doc_id}", new_string=f"new {doc_id}"),
+                ]),
+                # A duplicate edit for the same document is folded in
+                DocumentEdit(document_id=doc_id, version=version, changes=[
+                    ContentChange(old_string=f"old {doc_id}", new_string=f"new {doc_id}"),
+                    ContentChange(old_string=f"more {doc_id}", new_string=f"extra {doc_id}"),
+                ]),
+            ])
+            return result
+
+        mock_run_agent.side_effect = make_result
+
+        editor = MainEditor("test query")
+        result = await editor._process_edit_suggestions(suggestions)
+
+        assert mock_run_agent.call_count == 2
+        first_input, first_priority = mock_run_agent.call_args_list[0].args
+        assert len(json.loads(first_input)["suggestions"]) == 2
+        assert first_priority == "high"
+
+        assert [edit.document_id for edit in result] == ["doc-1", "doc-2"]
+        assert [c.old_string for c in result[0].changes] == ["old doc-1", "more doc-1"]
+
+
+class TestMergeDocumentEdits:
+    """Test folding edits for the same document version together"""
+
+    def test_dedupes_combined_changes_without_mutating_inputs(self):
+        """Repeats are dropped across all edits, including the first, and the inputs keep their changes"""
+        from app.services.agents.editor_agent import ContentChange, DocumentEdit
+
+        first = DocumentEdit(document_id="doc-1", version="v1", changes=[
+            ContentChange(old_string="a", new_string="b"),
+            ContentChange(old_string="a", new_string="b"),
+        ])
+        second = DocumentEdit(document_id="doc-1", version="v1", changes=[
+            ContentChange(old_string="a", new_string="b"),
+            ContentChange(old_string="c", new_string="d"),
+        ])
+        other = DocumentEdit(document_id="doc-2", version="v1", changes=[
+            ContentChange(old_string="a", new_string="b"),
+        ])
+
+        merged = merge_document_edits([first, second, other])
+
+        assert [(edit.document_id, [c.old_string for c in edit.changes]) for edit in merged] == [
+            ("doc-1", ["a", "c"]),
+            ("doc-2", ["a"]),
+        ]
+        assert merged[0] is not first
+        assert len(first.changes) == 2
+        assert len(second.changes) == 2
+
+
+class TestStreaming:
+    """Test the concurrent streaming path"""
+
+    @pytest.mark.asyncio
+    async def test_merge_event_streams_completion_order(self):
+        """Events are yielded in the order they are produced across streams"""
+        import asyncio
+        from app.services.editor import merge_event_streams
+
+        async def stream(name, delay):
+            await asyncio.sleep(delay)
+            yield f"{name}-1"
+            await asyncio.sleep(delay)
+            yield f"{name}-2"
+
+        events = [e async for e in merge_event_streams([stream("slow", 0.03), stream("fast", 0.01)])]
+
+        assert events.index("fast-2") < events.index("slow-1")
+        assert sorted(events) == ["fast-1", "fast-2", "slow-1", "slow-2"]
+
+    @pytest.mark.asyncio
+    async def test_merge_event_streams_propagates_errors(self):
+        """A failing stream raises in the consumer and cancels the others"""
+        import asyncio
+        from app.services.editor import merge_event_streams
+
+        cancelled = asyncio.Event()
+
+        async def failing():
+            yield "first"
+            raise RuntimeError("boom")
+
+        async def endless():
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield "tick"
+            finally:
+                cancelled.set()
+
+        with pytest.raises(RuntimeError, match="boom"):
+            async for _ in merge_event_streams([failing(), endless()]):
+                pass
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.MainEditor._handle_delete_intent_streaming')
+    @patch('app.services.editor.MainEditor._handle_create_intent_streaming')
+    @patch('app.services.editor.MainEditor._detect_intent')
+    async def test_run_with_streaming_runs_intents_concurrently(
+        self, mock_detect_intent, mock_create, mock_delete
+    ):
+        """A slow intent does not hold back events from a fast one"""
+        import asyncio
+        from app.services.agents.intent_detection_agent import Detected_Intent, Intent_Item
+        from app.models.websocket_events import ProgressEvent
+
+        mock_detect_intent.return_value = Detected_Intent(intents=[
+            Intent_Item(reason="r", intent="create", task="t"),
+            Intent_Item(reason="r", intent="delete", task="t"),
+        ])
+
+        def handler(name, delay):
+            async def gen(intent, session_id):
+                await asyncio.sleep(delay)
+                yield ProgressEvent(event_id=name, session_id=session_id, payload={"message": name})
+            return gen
+
+        mock_create.side_effect = handler("create-done", 0.05)
+        mock_delete.side_effect = handler("delete-done", 0.0)
+
+        editor = MainEditor("create and delete")
+        events = [e async for e in editor.run_with_streaming("session-1")]
+        ids = [e.event_id for e in events]
+
+        assert ids.index("delete-done") < ids.index("create-done")
+        assert events[-1].payload["message"] == "All operations completed"
+
+
+class TestSpeculativeRetrieval:
+    """Test retrieval started alongside intent detection"""
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.retrieve_candidates')
+    @patch('app.services.editor.MainEditor._detect_intent')
+    async def test_retrieval_cancelled_without_actionable_intents(self, mock_detect_intent, mock_retrieve):
+        """Speculative retrieval is cancelled when no intent needs it"""
+        import asyncio
+        from app.services.agents.intent_detection_agent import Detected_Intent, Intent_Item
+
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def slow_retrieval(query):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        async def detect():
+            await started.wait()
+            return Detected_Intent(intents=[Intent_Item(reason="r", intent="other", task="t")])
+
+        mock_retrieve.side_effect = slow_retrieval
+        mock_detect_intent.side_effect = detect
+
+        editor = MainEditor("what is the weather")
+        await editor.run()
+        await asyncio.sleep(0)
+
+        assert cancelled.is_set()
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.Runner.run')
+    @patch('app.services.editor.retrieve_candidates')
+    @patch('app.services.editor.MainEditor._detect_intent')
+    async def test_retrieval_results_reach_handlers(self, mock_detect_intent, mock_retrieve, mock_runner):
+        """Warmed candidates are included in the delete agent's input"""
+        from app.services.agents.intent_detection_agent import Detected_Intent, Intent_Item
+        from app.services.retrieval import CandidateDocument, RetrievalResult
+
+        mock_retrieve.return_value = RetrievalResult(
+            documentation=[CandidateDocument(id="doc-42", version="v1", similarity=0.9)]
+        )
+        mock_detect_intent.return_value = Detected_Intent(
+            intents=[Intent_Item(reason="r", intent="delete", task="t")]
+        )
+        mock_response = MagicMock()
+        mock_response.final_output_as.return_value.documents_to_delete = []
+        mock_runner.return_value = mock_response
+
+        editor = MainEditor("delete the old page")
+        await editor.run()
+
+        agent_input = mock_runner.call_args.args[1]
+        assert "doc-42" in agent_input
+        mock_retrieve.assert_called_once_with("delete the old page")
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.Runner.run')
+    @patch('app.services.editor.retrieve_candidates')
+    async def test_failed_retrieval_falls_back(self, mock_retrieve, mock_runner):
+        """A failing retrieval leaves the agent input unchanged"""
+        mock_retrieve.side_effect = RuntimeError("embedding service down")
+        intent = MagicMock(task="t", reason="r")
+
+        editor = MainEditor("query")
+        editor._start_retrieval()
+        agent_input = await editor._agent_input(intent, "Do the task")
+
+        assert agent_input == "User query: query Task: t Reason: r. Do the task"
+
+
+class TestCorpusRouting:
+    """Test corpus routing of edit suggestion runs"""
+
+    @staticmethod
+    def _response(suggestions):
+        from app.services.agents.edit_suggestion_agent import EditAgentResponse
+
+        response = MagicMock()
+        response.final_output_as.return_value = EditAgentResponse(suggestions=suggestions)
+        return response
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.MainEditor._get_retrieval')
+    @patch('app.services.editor.Runner.run')
+    async def test_routed_to_single_corpus(self, mock_runner, mock_get_retrieval):
+        """Only the winning corpus' agent runs when scores are far apart"""
+        from app.services.agents.edit_suggestion_agent import EditSuggestion
+        from app.services.retrieval import CandidateDocument, RetrievalResult
+
+        mock_get_retrieval.return_value = RetrievalResult(
+            query_embedding=[0.1],
+            api_references=[CandidateDocument(id="a", similarity=0.95, is_api_ref=True)],
+            documentation=[CandidateDocument(id="d", similarity=0.2)],
+        )
+        suggestion = EditSuggestion(document_id="a", changes="c", version="v", path="p/", is_api_ref=True)
+        mock_runner.return_value = self._response([suggestion])
+
+        editor = MainEditor("update the Runner.run signature")
+        result = await editor._get_edit_suggestions(MagicMock(task="t", reason="r"))
+
+        assert mock_runner.call_count == 1
+        assert mock_runner.call_args.kwargs["context"].is_api_ref is True
+        assert result.suggestions == [suggestion]
+
+    @pytest.mark.asyncio
+    @patch('app.services.editor.MainEditor._get_retrieval')
+    @patch('app.services.editor.Runner.run')
+    async def test_fallback_when_routed_run_is_empty(self, mock_runner, mock_get_retrieval):
+        """The skipped corpus runs when the routed one finds nothing"""
+        from app.services.agents.edit_suggestion_agent import EditSuggestion
+        from app.services.retrieval import CandidateDocument, RetrievalResult
+
+        mock_get_retrieval.return_value = RetrievalResult(
+            query_embedding=[0.1],
+            documentation=[CandidateDocument(id="d", similarity=0.9)],
+        )
+        suggestion = EditSuggestion(document_id="a", changes="c", version="v", path="p/", is_api_ref=True)
+        mock_runner.side_effect = [self._response([]), self._response([suggestion])]
+
+        editor = MainEditor("query")
+        result = await editor._get_edit_suggestions(MagicMock(task="t", reason="r"))
+
+        contexts = [call.kwargs["context"].is_api_ref for call in mock_runner.call_args_list]
+        assert contexts == [False, True]
+        assert result.suggestions == [suggestion]
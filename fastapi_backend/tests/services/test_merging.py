@@ -0,0 +1,47 @@
+from app.services.merging import three_way_merge
+
+
+class TestThreeWayMerge:
+    def test_disjoint_changes_merge_cleanly(self):
+        """Changes to different regions are both kept"""
+        base = "# Title\n\nintro\n\n## A\n\nalpha\n\n## B\n\nbeta\n"
+        ours = base.replace("alpha", "alpha (ours)")
+        theirs = base.replace("beta", "beta (theirs)")
+
+        result = three_way_merge(base, ours, theirs)
+
+        assert result.ok
+        assert result.content == base.replace("alpha", "alpha (ours)").replace("beta", "beta (theirs)")
+
+    def test_identical_changes_are_taken_once(self):
+        """Both sides making the same change is not a conflict"""
+        base = "one\ntwo\nthree\n"
+        changed = "one\n2\nthree\n"
+
+        result = three_way_merge(base, changed, changed)
+
+        assert result.ok
+        assert result.content == changed
+
+    def test_insertions_at_both_ends(self):
+        """Insertions on each side at different places are combined"""
+        result = three_way_merge("a\nb\n", "a\nb\nours\n", "theirs\na\nb\n")
+
+        assert result.ok
+        assert result.content == "theirs\na\nb\nours\n"
+
+    def test_overlapping_changes_conflict(self):
+        """Only regions both sides changed differently are reported"""
+        base = "keep\nshared\nkeep too\nother\n"
+        ours = "keep\nshared (ours)\nkeep too\nother (ours)\n"
+        theirs = "keep\nshared (theirs)\nkeep too\nother\n"
+
+        result = three_way_merge(base, ours, theirs)
+
+        assert not result.ok
+        assert len(result.conflicts) == 1
+        conflict = result.conflicts[0]
+        assert (conflict.base, conflict.ours, conflict.theirs) == (
+            "shared\n", "shared (ours)\n", "shared (theirs)\n"
+        )
+        assert result.conflict_summary() == "lines 2-2"
@@ -1,8 +1,11 @@
+import httpx
+import openai
 import pytest
 from unittest.mock import patch, AsyncMock, MagicMock
 
 from app.services.openai_service import (
     create_embedding,
+    create_embeddings,
     extract_keywords,
     generate_summary
 )
@@ -37,6 +40,73 @@ class TestOpenAIService:
             args, kwargs = mock_client.embeddings.create.call_args
             assert kwargs["input"] == "Test text"
     
+    @pytest.mark.asyncio
+    async def test_create_embeddings_single_request(self):
+        """Test several texts are embedded in one request, empty ones skipped."""
+        with patch('app.services.openai_service.openai_client') as mock_client:
+            first, second = MagicMock(index=0, embedding=[0.1]), MagicMock(index=1, embedding=[0.2])
+            mock_client.embeddings.create = AsyncMock(return_value=MagicMock(data=[second, first]))
+
+            result = await create_embeddings(["one", "", "three"])
+
+            assert result[0] == [0.1]
+            assert result[1] == [0.0] * 1536
+            assert result[2] == [0.2]
+            mock_client.embeddings.create.assert_called_once()
+            assert mock_client.embeddings.create.call_args.kwargs["input"] == ["one", "three"]
+
+    @pytest.mark.asyncio
+    async def test_create_embeddings_failure(self):
+        """Test a failed batch request yields None for the non-empty texts."""
+        with patch('app.services.openai_service.openai_client') as mock_client:
+            mock_client.embeddings.create = AsyncMock(side_effect=Exception("rate limited"))
+
+            result = await create_embeddings(["one", ""])
+
+            assert result[0] is None
+            assert result[1] == [0.0] * 1536
+    
+    @pytest.mark.asyncio
+    async def test_create_embeddings_batches_by_tokens(self):
+        """Test requests stay within the text count and the estimated token budget."""
+        async def fake_create(model, input, dimensions):
+            return MagicMock(data=[MagicMock(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)])
+
+        texts = ["a" * 300, "b" * 300, "c" * 30, "d" * 30, "e" * 30, "f" * 30]
+        with patch('app.services.openai_service.openai_client') as mock_client, \
+             patch('app.services.openai_service.settings') as mock_settings:
+            mock_client.embeddings.create = AsyncMock(side_effect=fake_create)
+            mock_settings.ENRICHMENT_BATCH_SIZE = 3
+            mock_settings.EMBEDDING_BATCH_MAX_TOKENS = 150
+            mock_settings.VECTOR_DIMENSION = 1
+
+            result = await create_embeddings(texts)
+
+        batches = [call.kwargs["input"] for call in mock_client.embeddings.create.call_args_list]
+        assert batches == [[texts[0]], [texts[1], texts[2], texts[3]], [texts[4], texts[5]]]
+        assert result == [[float(len(text))] for text in texts]
+
+    @pytest.mark.asyncio
+    async def test_create_embeddings_isolates_rejected_text(self):
+        """Test a rejected batch is split so only the text the API refuses is None."""
+        rejected = openai.BadRequestError(
+            "maximum context length exceeded",
+            response=httpx.Response(400, request=httpx.Request("POST", "https://api.openai.com/v1/embeddings")),
+            body=None,
+        )
+
+        async def fake_create(model, input, dimensions):
+            if "huge" in input:
+                raise rejected
+            return MagicMock(data=[MagicMock(index=i, embedding=[float(len(text))]) for i, text in enumerate(input)])
+
+        with patch('app.services.openai_service.openai_client') as mock_client:
+            mock_client.embeddings.create = AsyncMock(side_effect=fake_create)
+
+            result = await create_embeddings(["one", "huge", "three", "four"])
+
+        assert result == [[3.0], None, [5.0], [4.0]]
+
     @pytest.mark.asyncio
     async def test_create_embedding_empty_text(self):
         """Test creating embeddings with empty text."""
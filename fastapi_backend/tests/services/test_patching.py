@@ -0,0 +1,137 @@
+import time
+
+import pytest
+
+from app.services.patching import apply_changes
+from app.services.shared.models import ContentChange
+
+
+def _change(old, new):
+    return ContentChange(old_string=old, new_string=new)
+
+
+class TestApplyChanges:
+    def test_applies_all_changes_in_one_rebuild(self):
+        """Independent changes are all applied against the original"""
+        original = "# Title\n\nAlpha section\n\nBeta section\n"
+
+        result = apply_changes(original, [
+            _change("Beta section", "Beta section (updated)"),
+            _change("Alpha section", "Alpha section (updated)"),
+        ])
+
+        assert result.ok
+        assert result.content == "# Title\n\nAlpha section (updated)\n\nBeta section (updated)\n"
+        assert [c.status for c in result.changes] == ["applied", "applied"]
+
+    def test_anchors_are_matched_against_the_original(self):
+        """A replacement cannot create or destroy a later anchor"""
+        original = "one two three"
+
+        result = apply_changes(original, [
+            _change("one", "three"),
+            _change("three", "four"),
+        ])
+
+        # Sequential str.replace would have rewritten the inserted "three"
+        assert result.content == "three two four"
+        assert result.ok
+
+    def test_reports_missing_and_ambiguous_anchors(self):
+        """Anchors that are absent or repeated are reported, not dropped silently"""
+        original = "repeat\nrepeat\nunique\n"
+
+        result = apply_changes(original, [
+            _change("missing", "x"),
+            _change("repeat", "y"),
+            _change("unique", "z"),
+            _change("", "w"),
+        ])
+
+        statuses = [c.status for c in result.changes]
+        assert statuses == ["not_found", "ambiguous", "applied", "empty_anchor"]
+        assert result.content == "repeat\nrepeat\nz\n"
+        assert not result.ok
+        assert "change 1" in result.conflict_summary()
+
+    def test_overlapping_anchors_conflict(self):
+        """Overlapping anchors are rejected together"""
+        original = "abcdefgh"
+
+        result = apply_changes(original, [
+            _change("abcd", "1"),
+            _change("cdef", "2"),
+            _change("gh", "3"),
+        ])
+
+        assert [c.status for c in result.changes] == ["overlap", "overlap", "applied"]
+        assert result.content == "abcdef3"
+
+    def test_identical_changes_apply_once(self):
+        """A repeated identical change is applied once and marked duplicate"""
+        result = apply_changes("hello world", [
+            _change("world", "there"),
+            _change("world", "there"),
+        ])
+
+        assert result.content == "hello there"
+        assert [c.status for c in result.changes] == ["applied", "duplicate"]
+        assert result.ok
+
+    def test_adjacent_anchors_and_deletions(self):
+        """Touching anchors do not overlap and empty replacements delete text"""
+        result = apply_changes("aaabbb", [
+            _change("aaa", ""),
+            _change("bbb", "c"),
+        ])
+
+        assert result.content == "c"
+        assert result.ok
+
+
+def _sequential_replace(original, changes):
+    for change in changes:
+        if change.old_string and change.new_string:
+            original = original.replace(change.old_string, change.new_string, 1)
+    return original
+
+
+@pytest.mark.slow
+class TestApplyChangesBenchmark:
+    """Compare the patch engine against sequential str.replace on large pages"""
+
+    @pytest.mark.parametrize("sections,edits", [(800, 40), (2000, 80)])
+    def test_large_page(self, sections, edits):
+        original = "".join(
+            f"## Section {i}\n\nParagraph {i} describing `Runner.run` usage in detail.\n"
+            f"```python\nresult = await Runner.run(agent_{i}, input)\n```\n\n"
+            for i in range(sections)
+        )
+        assert len(original) > 100_000
+        step = sections // edits
+        changes = [
+            _change(
+                f"Paragraph {i} describing `Runner.run` usage in detail.\n",
+                f"Paragraph {i} describing `Runner.run_streamed` usage in detail.\n",
+            )
+            for i in range(0, sections, step)
+        ]
+
+        rounds = 20
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            result = apply_changes(original, changes)
+        engine = (time.perf_counter() - begin) / rounds
+
+        begin = time.perf_counter()
+        for _ in range(rounds):
+            expected = _sequential_replace(original, changes)
+        sequential = (time.perf_counter() - begin) / rounds
+
+        print(
+            f"\n{len(original) // 1024}KB, {len(changes)} changes: "
+            f"patch engine {engine * 1000:.2f}ms, sequential replace {sequential * 1000:.2f}ms"
+        )
+        assert result.ok
+        assert result.content == expected
+        assert engine < 0.5
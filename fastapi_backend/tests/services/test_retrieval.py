@@ -0,0 +1,71 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.retrieval import (
+    CandidateDocument,
+    RetrievalResult,
+    retrieve_candidates,
+)
+
+
+def _rpc_result(rows):
+    result = MagicMock()
+    result.data = rows
+    return result
+
+
+class TestRetrieval:
+    @pytest.mark.asyncio
+    async def test_retrieve_candidates_ranks_each_corpus(self):
+        """Both corpora are searched and ranked by similarity"""
+        rows_by_corpus = {
+            True: [
+                {"id": "a1", "version": "v1", "similarity": 0.7, "is_api_ref": True},
+                {"id": "a2", "version": "v2", "similarity": 0.9, "is_api_ref": True},
+            ],
+            False: [{"id": "d1", "version": "v3", "similarity": 0.8}],
+        }
+
+        def rpc(name, params):
+            assert name == "execute_similarity_search"
+            query = MagicMock()
+            query.execute.return_value = _rpc_result(rows_by_corpus[params["api_ref"]])
+            return query
+
+        with patch('app.services.retrieval.create_embedding', new_callable=AsyncMock) as mock_embedding, \
+             patch('app.services.retrieval.supabase') as mock_supabase:
+            mock_embedding.return_value = [0.1, 0.2]
+            mock_supabase.rpc.side_effect = rpc
+
+            result = await retrieve_candidates("How do handoffs work?", top_k=3)
+
+        assert result.query_embedding == [0.1, 0.2]
+        assert [d.id for d in result.api_references] == ["a2", "a1"]
+        assert [d.id for d in result.documentation] == ["d1"]
+        assert result.documentation[0].is_api_ref is False
+        assert [d.id for d in result.candidates()] == ["a2", "d1", "a1"]
+        assert mock_supabase.rpc.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_retrieve_candidates_without_embedding(self):
+        """No search is run when the query cannot be embedded"""
+        with patch('app.services.retrieval.create_embedding', new_callable=AsyncMock) as mock_embedding, \
+             patch('app.services.retrieval.supabase') as mock_supabase:
+            mock_embedding.return_value = None
+
+            result = await retrieve_candidates("query")
+
+        assert result.query_embedding is None
+        assert result.candidates() == []
+        mock_supabase.rpc.assert_not_called()
+
+    def test_to_prompt(self):
+        """Candidates render as a hint block, empty when there are none"""
+        result = RetrievalResult(
+            api_references=[CandidateDocument(id="a1", version="v1", path="agent/", similarity=0.91, is_api_ref=True)]
+        )
+
+        hint = result.to_prompt(is_api_ref=True)
+        assert "id: a1" in hint
+        assert "similarity: 0.910" in hint
+        assert result.to_prompt(is_api_ref=False) == ""
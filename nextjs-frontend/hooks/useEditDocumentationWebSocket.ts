@@ -10,7 +10,8 @@ export type EditProgressEventType =
   | 'document_deleted'
   | 'error'
   | 'finished'
-  | 'progress';
+  | 'progress'
+  | 'content_delta';
 
 export interface BaseEvent {
   event_id: string;
@@ -46,6 +47,8 @@ export interface UseEditDocumentationWebSocketReturn {
   currentStep: number;
   totalSteps: number;
   events: EditProgressEvent[];
+  // Agent output streamed so far, keyed by its JSON path (e.g. "documents.0.markdown_content_en")
+  drafts: Record<string, string>;
   error: string | null;
   startEdit: (editRequest: EditRequest) => void;
   clearEvents: () => void;
@@ -69,6 +72,7 @@ export function useEditDocumentationWebSocket(
   const [currentStep, setCurrentStep] = useState(0);
   const [totalSteps, setTotalSteps] = useState(4);
   const [events, setEvents] = useState<EditProgressEvent[]>([]);
+  const [drafts, setDrafts] = useState<Record<string, string>>({});
   const [error, setError] = useState<string | null>(null);
 
   const wsRef = useRef<WebSocket | null>(null);
@@ -112,6 +116,14 @@ export function useEditDocumentationWebSocket(
           const message: WebSocketMessage = JSON.parse(event.data);
           const progressEvent = message.event;
 
+          // Text deltas build up drafts instead of the event list
+          if (progressEvent.type === 'content_delta') {
+            const key = progressEvent.payload.path.join('.');
+            setDrafts(prev => ({ ...prev, [key]: (prev[key] ?? '') + progressEvent.payload.delta }));
+            onEvent?.(progressEvent);
+            return;
+          }
+
           // Update state based on event type
           switch (progressEvent.type) {
             case 'progress':
@@ -215,6 +227,7 @@ export function useEditDocumentationWebSocket(
       
       // Clear previous events and reset state
       setEvents([]);
+      setDrafts({});
       setError(null);
       setIsProcessing(true);
       setCurrentStep(0);
@@ -240,6 +253,7 @@ export function useEditDocumentationWebSocket(
 
   const clearEvents = useCallback(() => {
     setEvents([]);
+    setDrafts({});
     setError(null);
     setCurrentStep(0);
   }, []);
@@ -257,6 +271,7 @@ export function useEditDocumentationWebSocket(
     currentStep,
     totalSteps,
     events,
+    drafts,
     error,
     startEdit,
     clearEvents,